@@ -0,0 +1,122 @@
+"""
+Cold-start benchmark: how long a fresh worker takes to become useful.
+
+Measures, each --repeat times in a new interpreter:
+
+  import      `import main` as reported by python -X importtime, plus the
+              slowest modules it pulls in
+  first       time from starting `uvicorn main:app` to the first successful
+              response, which includes the lifespan's pool warm-up
+
+Prints medians and saves them as JSON with the git commit, like run_load,
+so restarts can be compared across changes. Exits with status 1 when the
+time to first request exceeds --budget-ms.
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.bench_cold_start --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.common import git_revision
+
+
+def import_times() -> Tuple[float, Dict[str, float]]:
+    """Runs `import main` under -X importtime; returns (total ms, {module: cumulative ms})."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue  # header line
+        # Top-level packages only; submodules are already part of their cumulative time
+        if "." not in name.strip():
+            cumulative[name.strip()] = max(cumulative.get(name.strip(), 0), int(cumulative_us) / 1000)
+    return cumulative["main"], cumulative
+
+
+def time_to_first_request(port: int, timeout: float = 30.0) -> float:
+    """Starts uvicorn and returns the ms until GET / first answers 200."""
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/"
+        while time.perf_counter() - started < timeout:
+            try:
+                if httpx.get(url, timeout=1).status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except httpx.TransportError:
+                pass
+            time.sleep(0.005)
+        raise RuntimeError(f"server on port {port} did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to list")
+    parser.add_argument("--port", type=int, default=8769)
+    parser.add_argument("--budget-ms", type=float, help="fail when the median time to first request is slower")
+    parser.add_argument("--output", help="report path (default benchmarks/results/<time>-<commit>-cold-start.json)")
+    args = parser.parse_args()
+
+    imports: List[float] = []
+    modules: Dict[str, List[float]] = {}
+    firsts: List[float] = []
+    for _ in range(args.repeat):
+        total, cumulative = import_times()
+        imports.append(total)
+        for name, value in cumulative.items():
+            modules.setdefault(name, []).append(value)
+        firsts.append(time_to_first_request(args.port))
+
+    slowest = sorted(((statistics.median(values), name) for name, values in modules.items() if name != "main"),
+                     reverse=True)[:args.top]
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git": git_revision(),
+        "database": os.getenv("DATABASE_URL", "").split("://")[0] or "mysql",
+        "repeat": args.repeat,
+        "import_main_ms": round(statistics.median(imports), 1),
+        "time_to_first_request_ms": round(statistics.median(firsts), 1),
+        "slowest_imports_ms": {name: round(value, 1) for value, name in slowest},
+    }
+
+    print(f"import main            median={report['import_main_ms']:8.1f}ms  min={min(imports):8.1f}ms")
+    print(f"time to first request  median={report['time_to_first_request_ms']:8.1f}ms  min={min(firsts):8.1f}ms")
+    for name, value in report["slowest_imports_ms"].items():
+        print(f"  {name:<24} {value:8.1f}ms")
+
+    output = args.output or os.path.join(
+        "benchmarks", "results",
+        f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{(report['git']['commit'] or 'nogit')[:10]}"
+        "-cold-start.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"report saved to {output}")
+
+    if args.budget_ms is not None and report["time_to_first_request_ms"] > args.budget_ms:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
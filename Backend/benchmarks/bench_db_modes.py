@@ -0,0 +1,108 @@
+"""
+Load test of the async database stack against the threadpool (sync) path.
+
+Starts the app once per DATABASE_ASYNC mode against the same database, then
+drives GET /debts and GET /my_debts/sum with concurrent clients and prints
+throughput and latency percentiles for each mode.
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.bench_db_modes --clients 200
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import percentile, running_server
+
+ENDPOINTS = ["/debts", "/my_debts/sum"]
+
+
+def seed(num_debts: int) -> str:
+    """Creates a benchmark user with num_debts debts and returns a token for it."""
+    from sqlalchemy import insert
+
+    from config.db_configuration import Base, SessionLocal, engine
+    from models import group, user  # Registers every mapper the relationships refer to
+    from models.debts import Debt
+    from models.user import User
+    from models.user_balance import UserBalance
+    from utils.auth import create_access_token
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        bench_user = db.query(User).filter(User.username == "bench_debtor").first()
+        if not bench_user:
+            creditor = User(username="bench_creditor", email="bench_creditor@example.com", password="-")
+            bench_user = User(username="bench_debtor", email="bench_debtor@example.com", password="-")
+            db.add_all([creditor, bench_user])
+            db.flush()
+            db.execute(insert(Debt), [
+                {"title": f"bench {i}", "receiver": creditor.username, "receiver_id": creditor.id,
+                 "amount_cents": 100, "user_id": bench_user.id}
+                for i in range(num_debts)
+            ])
+            db.add_all([
+                UserBalance(user_id=bench_user.id, total_owed_cents=100 * num_debts, total_receivable_cents=0),
+                UserBalance(user_id=creditor.id, total_owed_cents=0, total_receivable_cents=100 * num_debts),
+            ])
+            db.commit()
+        return create_access_token(data={"sub": bench_user.username})
+    finally:
+        db.close()
+
+
+async def drive(base_url: str, token: str, clients: int, duration: float) -> dict:
+    latencies = {endpoint: [] for endpoint in ENDPOINTS}
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, headers={"Authorization": f"Bearer {token}"},
+                                 limits=limits, timeout=30) as client:
+        async def worker(offset: int):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                endpoint = ENDPOINTS[i % len(ENDPOINTS)]
+                started = time.perf_counter()
+                response = await client.get(endpoint)
+                if response.status_code != 200:
+                    errors += 1
+                latencies[endpoint].append((time.perf_counter() - started) * 1000)
+                i += 1
+
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+
+    return {"latencies": latencies, "errors": errors, "duration": duration}
+
+
+def run_mode(mode: str, token: str, args) -> dict:
+    with running_server(args.port, env={"DATABASE_ASYNC": mode}) as base_url:
+        return asyncio.run(drive(base_url, token, args.clients, args.duration))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--debts", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    token = seed(args.debts)
+    for mode in ("false", "true"):
+        result = run_mode(mode, token, args)
+        total = sum(len(values) for values in result["latencies"].values())
+        label = "async" if mode == "true" else "sync"
+        print(f"[{label}] {total / result['duration']:.1f} req/s, {result['errors']} errors")
+        for endpoint, values in result["latencies"].items():
+            print(f"  {endpoint:<16} p50={percentile(values, 50):7.2f}ms "
+                  f"p95={percentile(values, 95):7.2f}ms p99={percentile(values, 99):7.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
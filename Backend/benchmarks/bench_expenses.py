@@ -0,0 +1,89 @@
+"""
+Throughput of batch expense settlement (POST /split-expenses/).
+
+Builds --expenses random expenses among --members users, each with one to
+three payers, a random subset of participants and some weights, then times:
+
+  parse     validating the JSON body into ExpenseBatchRequest
+  settle    settle_expenses: shares, cent rounding, netting and transfers
+  per-call  the same expenses settled one at a time, as separate
+            /split-debts/-style calls would
+  endpoint  the whole batch through the running app, debts written and committed
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.bench_expenses --expenses 10000
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.common import running_server, seed_users
+
+
+def generate_expenses(num_expenses: int, user_ids: list, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    expenses = []
+    for _ in range(num_expenses):
+        people = rng.choice(user_ids, size=int(rng.integers(2, min(12, len(user_ids)) + 1)), replace=False).tolist()
+        num_payers = int(rng.integers(1, min(3, len(people)) + 1))
+        amounts = rng.integers(1, 20_000, size=num_payers)
+        expenses.append({
+            "total_cost": int(amounts.sum()) / 100,
+            "payers": [{"user_id": user_id, "amount": int(amount) / 100}
+                       for user_id, amount in zip(people[:num_payers], amounts.tolist())],
+            "participants": people[num_payers:],
+            "weights": {str(people[-1]): 2} if rng.random() < 0.3 else None,
+        })
+    return expenses
+
+
+def timed(function, repeat: int) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--expenses", type=int, default=10_000)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8771)
+    args = parser.parse_args()
+
+    from models.expense_request import ExpenseBatchRequest
+    from services.expense_service import settle_expenses
+
+    users = seed_users("bench_expenses", args.members)
+    user_ids, token = [user_id for user_id, _, _ in users], users[0][2]
+    body = {"expenses": generate_expenses(args.expenses, user_ids)}
+    payload = json.dumps(body)
+
+    parse_ms, batch = timed(lambda: ExpenseBatchRequest.model_validate_json(payload), args.repeat)
+    settle_ms, (_, transfers) = timed(lambda: settle_expenses(batch.expenses), args.repeat)
+    per_call_ms, per_call = timed(lambda: [settle_expenses([expense])[1] for expense in batch.expenses], 1)
+
+    with running_server(args.port) as base_url:
+        with httpx.Client(base_url=base_url, timeout=120, headers={"Authorization": f"Bearer {token}"}) as client:
+            endpoint_ms, response = timed(lambda: client.post("/split-expenses/", content=payload,
+                                                              headers={"Content-Type": "application/json"}),
+                                          args.repeat)
+    response.raise_for_status()
+
+    print(f"expenses={args.expenses} members={args.members} body={len(payload) / 1e6:.1f}MB")
+    print(f"parse     {parse_ms:9.1f}ms")
+    print(f"settle    {settle_ms:9.1f}ms  {len(transfers)} debts")
+    print(f"per-call  {per_call_ms:9.1f}ms  {sum(len(plan) for plan in per_call)} debts")
+    print(f"endpoint  {endpoint_ms:9.1f}ms  {args.expenses / endpoint_ms * 1000:,.0f} expenses/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Fan-out of ledger events to many idle subscribers.
+
+  hub     in-process: --subscribers queues on an EventHub, spread over
+          --users users; times publish-to-delivery for events that reach
+          two users each, the shape of a created debt
+  stream  end to end: opens --connections GET /events/ledger streams against
+          a uvicorn worker, reads the open connection count from /metrics,
+          then times POST /debts until the creditor's stream shows the event
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.bench_fanout --subscribers 10000 --connections 2000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import List, Tuple
+
+import httpx
+
+from benchmarks.common import percentile, running_server, seed_users
+
+
+def report(label: str, latencies: List[float]) -> None:
+    print(f"{label:<8} n={len(latencies)} p50={percentile(latencies, 50):.3f}ms "
+          f"p95={percentile(latencies, 95):.3f}ms p99={percentile(latencies, 99):.3f}ms max={max(latencies):.3f}ms")
+
+
+async def bench_hub(subscribers: int, users: int, events: int) -> List[float]:
+    from contextlib import AsyncExitStack
+
+    from utils.event_hub import EventHub, LocalBroker
+
+    hub = EventHub(broker=LocalBroker())
+    await hub.start()
+    latencies = []
+    async with AsyncExitStack() as stack:
+        queues = [await stack.enter_async_context(hub.subscribe(i % users)) for i in range(subscribers)]
+        for event in range(events):
+            debtor, creditor = event % users, (event + 1) % users
+            started = time.perf_counter()
+            await hub.publish({debtor: {"owedDelta": 1.0}, creditor: {"receivableDelta": 1.0}})
+            latencies.append((time.perf_counter() - started) * 1000)
+            for queue in queues[debtor::users] + queues[creditor::users]:
+                queue.get_nowait()
+    return latencies
+
+
+async def read_stream(client: httpx.AsyncClient, token: str, inbox: asyncio.Queue, ready: asyncio.Event) -> None:
+    async with client.stream("GET", "/events/ledger", params={"token": token}) as response:
+        ready.set()
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                inbox.put_nowait(json.loads(line[len("data: "):]))
+
+
+async def bench_streams(base_url: str, users, connections: int, events: int) -> Tuple[int, List[float]]:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+        inboxes = [asyncio.Queue() for _ in users]
+        readers = []
+        for i in range(connections):
+            ready = asyncio.Event()
+            readers.append(asyncio.create_task(read_stream(client, users[i % len(users)][2], inboxes[i % len(users)],
+                                                           ready)))
+            await ready.wait()
+
+        metrics = (await client.get("/metrics")).text
+        open_streams = int(float(next(line.split()[-1] for line in metrics.splitlines()
+                                      if line.startswith("event_subscribers"))))
+
+        latencies = []
+        streams_per_user = max(connections // len(users), 1)
+        for event in range(events):
+            debtor, creditor = event % 2, 2 + event % (min(len(users), connections) - 2)
+            started = time.perf_counter()
+            response = await client.post("/debts", headers={"Authorization": f"Bearer {users[debtor][2]}"}, json={
+                "title": "bench fanout", "receiver": users[creditor][1], "receiver_id": users[creditor][0],
+                "amount": 1.0, "user_id": users[debtor][0]})
+            response.raise_for_status()
+            for _ in range(streams_per_user):
+                await inboxes[creditor].get()
+            latencies.append((time.perf_counter() - started) * 1000)
+            while not inboxes[debtor].empty():
+                inboxes[debtor].get_nowait()
+
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+    return open_streams, latencies
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=10_000, help="in-process hub subscribers")
+    parser.add_argument("--connections", type=int, default=2_000, help="open /events/ledger streams")
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8770)
+    args = parser.parse_args()
+
+    report("hub", asyncio.run(bench_hub(args.subscribers, args.users, args.events)))
+    print(f"         {args.subscribers} subscribers over {args.users} users")
+
+    users = seed_users("bench_fanout", args.users)
+    with running_server(args.port) as base_url:
+        open_streams, latencies = asyncio.run(bench_streams(base_url, users, args.connections, args.events))
+    report("stream", latencies)
+    print(f"         {open_streams} open streams reported by /metrics (POST /debts until the creditor's stream)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
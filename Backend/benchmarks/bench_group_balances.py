@@ -0,0 +1,120 @@
+"""
+Benchmark for GET /groups/{group_id}/balances.
+
+Seeds one group with --members members and --debts debts between them (once,
+reused on later runs), then times the aggregated balances query on its own
+and the endpoint end to end. Exits with status 1 when the endpoint median
+exceeds the budget.
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.bench_group_balances --debts 100000
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.common import running_server
+
+
+def seed(num_debts: int, num_members: int) -> tuple:
+    """Creates the benchmark group if needed and returns (group_id, token of a member)."""
+    from sqlalchemy import insert, select
+
+    from config.db_configuration import Base, SessionLocal, engine
+    from models import group, user  # Registers every mapper the relationships refer to
+    from models.debts import Debt
+    from models.group import Group, user_group_association
+    from models.user import User
+    from models.user_balance import UserBalance
+    from utils.auth import create_access_token
+
+    Base.metadata.create_all(bind=engine)
+    name = f"Bench balances {num_members}x{num_debts}"
+    prefix = f"bench_balances_{num_members}x{num_debts}_"
+    db = SessionLocal()
+    try:
+        group_id = db.scalar(select(Group.id).where(Group.name == name))
+        if group_id is None:
+            members = [User(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com", password="-")
+                       for i in range(num_members)]
+            bench_group = Group(name=name)
+            db.add_all(members + [bench_group])
+            db.flush()
+            group_id = bench_group.id
+            member_ids = np.array([member.id for member in members])
+            db.execute(insert(user_group_association),
+                       [{"user_id": int(member_id), "group_id": group_id} for member_id in member_ids])
+
+            rng = np.random.default_rng(0)
+            debtors = rng.integers(0, num_members, size=num_debts)
+            creditors = (debtors + rng.integers(1, num_members, size=num_debts)) % num_members
+            amounts = rng.integers(100, 10_000, size=num_debts)
+            db.execute(insert(Debt), [
+                {"title": "bench", "receiver": f"{prefix}{creditor}", "receiver_id": int(member_ids[creditor]),
+                 "amount_cents": amount, "user_id": int(member_ids[debtor]), "group_id": group_id}
+                for debtor, creditor, amount in zip(debtors.tolist(), creditors.tolist(), amounts.tolist())
+            ])
+            owed = np.bincount(debtors, weights=amounts, minlength=num_members).astype(np.int64)
+            receivable = np.bincount(creditors, weights=amounts, minlength=num_members).astype(np.int64)
+            db.execute(insert(UserBalance), [
+                {"user_id": int(member_id), "total_owed_cents": int(owed[i]),
+                 "total_receivable_cents": int(receivable[i])}
+                for i, member_id in enumerate(member_ids)
+            ])
+            db.commit()
+        return group_id, create_access_token(data={"sub": f"{prefix}0"})
+    finally:
+        db.close()
+
+
+def time_query(group_id: int, repeat: int) -> list:
+    from config.db_configuration import engine
+    from services.group_balance_service import group_balances_statement
+
+    timings = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(group_balances_statement(group_id)).all()
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def time_endpoint(base_url: str, group_id: int, token: str, repeat: int) -> list:
+    timings = []
+    with httpx.Client(base_url=base_url, headers={"Authorization": f"Bearer {token}"}) as client:
+        client.get(f"/groups/{group_id}/balances").raise_for_status()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            client.get(f"/groups/{group_id}/balances").raise_for_status()
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--debts", type=int, default=100_000)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--budget-ms", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    group_id, token = seed(args.debts, args.members)
+    query = time_query(group_id, args.repeat)
+    with running_server(args.port) as base_url:
+        endpoint = time_endpoint(base_url, group_id, token, args.repeat)
+
+    print(f"debts={args.debts} members={args.members}")
+    for label, timings in (("query", query), ("endpoint", endpoint)):
+        print(f"{label:<9} median={statistics.median(timings):.3f}ms min={min(timings):.3f}ms "
+              f"max={max(timings):.3f}ms")
+    print(f"budget={args.budget_ms}ms (endpoint median)")
+    return 0 if statistics.median(endpoint) <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
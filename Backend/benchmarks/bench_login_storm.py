@@ -0,0 +1,92 @@
+"""
+Latency of cheap endpoints during a login storm.
+
+Measures GET /my_debts/sum with a few probe clients, first on an idle server
+and then while many clients hammer POST /login. Password hashing runs in the
+process pool, so the probe p99 should stay close to the idle p99. Logins
+beyond the pool's queue limit are answered with 503 + Retry-After, and
+logins beyond the per-IP rate of admission control with 429 + Retry-After.
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.bench_login_storm --login-clients 200
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import percentile, running_server
+
+PASSWORD = "bench-password"
+
+
+def seed() -> str:
+    """Creates the benchmark user with a real bcrypt hash and returns a token for it."""
+    from config.db_configuration import Base, SessionLocal, engine
+    from models import group, user  # Registers every mapper the relationships refer to
+    from models.user import User
+    from utils.auth import create_access_token, hash_password
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if not db.query(User).filter(User.username == "bench_login").first():
+            db.add(User(username="bench_login", email="bench_login@example.com", password=hash_password(PASSWORD)))
+            db.commit()
+        return create_access_token(data={"sub": "bench_login"})
+    finally:
+        db.close()
+
+
+async def probe(client: httpx.AsyncClient, token: str, deadline: float, latencies: list) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get("/my_debts/sum", headers={"Authorization": f"Bearer {token}"})
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def login(client: httpx.AsyncClient, deadline: float, statuses: dict) -> None:
+    while time.perf_counter() < deadline:
+        response = await client.post("/login", json={"username": "bench_login", "password": PASSWORD})
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code in (429, 503):
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+
+
+async def measure(base_url: str, token: str, args, with_storm: bool) -> tuple:
+    latencies = []
+    statuses = {}
+    deadline = time.perf_counter() + args.duration
+    limits = httpx.Limits(max_connections=args.login_clients + args.probe_clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        tasks = [probe(client, token, deadline, latencies) for _ in range(args.probe_clients)]
+        if with_storm:
+            tasks += [login(client, deadline, statuses) for _ in range(args.login_clients)]
+        await asyncio.gather(*tasks)
+    return latencies, statuses
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--login-clients", type=int, default=100)
+    parser.add_argument("--probe-clients", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    token = seed()
+    with running_server(args.port) as base_url:
+        idle, _ = asyncio.run(measure(base_url, token, args, with_storm=False))
+        storm, statuses = asyncio.run(measure(base_url, token, args, with_storm=True))
+
+    for label, latencies in (("idle", idle), ("login storm", storm)):
+        print(f"[{label}] /my_debts/sum n={len(latencies)} p50={percentile(latencies, 50):.2f}ms "
+              f"p99={percentile(latencies, 99):.2f}ms")
+    print(f"/login responses: {dict(sorted(statuses.items()))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Microbenchmark of the per-request cost of loading and serializing a page of
+debts, before and after the typed response schemas.
+
+Runs against its own in-memory SQLite database, so it needs no setup. For
+each size it times:
+
+  orm+encoder    select(Debt) ORM objects, jsonable_encoder and JSONResponse,
+                 what routes returning dicts of ORM objects went through
+  orm+model      select(Debt) ORM objects validated by the response model
+  columns+model  only the DebtSchema columns as dicts, validated by the
+                 response model and dumped to JSON bytes by pydantic; the
+                 path GET /debts takes now
+  columns+orjson same, but dumped to Python and rendered with orjson, what an
+                 orjson default response class would do
+
+    python -m benchmarks.bench_serialization --sizes 1000 100000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+
+def seed(num_debts: int) -> Session:
+    from config.db_configuration import Base
+    from models import group, user  # Registers every mapper the relationships refer to
+    from models.debts import Debt
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    session.execute(insert(Debt), [
+        {"title": f"Debt {i}", "receiver": "bench_creditor", "receiver_id": 2, "amount_cents": i % 10_000,
+         "user_id": 1, "group_id": None}
+        for i in range(num_debts)
+    ])
+    session.commit()
+    return session
+
+
+def page(docs) -> dict:
+    return {"docs": docs, "total_docs": None, "total_pages": None, "has_next_page": False, "next_cursor": None}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20, help="runs per variant, fewer for large sizes")
+    args = parser.parse_args()
+
+    from models.debts import Debt
+    from schemas import PaginatedSchema
+    from schemas.debt_schema import DebtSchema
+
+    field = create_model_field("Response_debts", PaginatedSchema[DebtSchema], mode="serialization")
+    columns = [getattr(Debt, name) for name in DebtSchema.model_fields]
+
+    def load_orm(session):
+        session.expunge_all()
+        return session.scalars(select(Debt)).all()
+
+    def load_columns(session):
+        return [row._asdict() for row in session.execute(select(*columns))]
+
+    def encoder(docs) -> bytes:
+        return JSONResponse(jsonable_encoder(page(docs))).body
+
+    def model_json(docs) -> bytes:
+        return asyncio.run(serialize_response(field=field, response_content=page(docs), dump_json=True))
+
+    def model_orjson(docs) -> bytes:
+        content = asyncio.run(serialize_response(field=field, response_content=page(docs)))
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+    variants = [
+        ("orm+encoder", load_orm, encoder),
+        ("orm+model", load_orm, model_json),
+        ("columns+model", load_columns, model_json),
+        ("columns+orjson", load_columns, model_orjson),
+    ]
+
+    print(f"{'debts':>8} {'variant':<15} {'load ms':>9} {'serialize ms':>13} {'total ms':>9} {'bytes':>10}")
+    for size in args.sizes:
+        session = seed(size)
+        repeat = max(3, args.repeat * 1000 // max(size, 1000))
+        for name, load, serialize in variants:
+            loads, serializes = [], []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                docs = load(session)
+                loaded = time.perf_counter()
+                body = serialize(docs)
+                loads.append((loaded - started) * 1000)
+                serializes.append((time.perf_counter() - loaded) * 1000)
+            load_ms, serialize_ms = statistics.median(loads), statistics.median(serializes)
+            print(f"{size:>8} {name:<15} {load_ms:>9.2f} {serialize_ms:>13.2f} {load_ms + serialize_ms:>9.2f} "
+                  f"{len(body):>10}")
+        session.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
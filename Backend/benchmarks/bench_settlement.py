@@ -0,0 +1,69 @@
+"""
+Benchmark for the group settlement engine.
+
+Builds random groups of IOUs and times net balance computation plus transfer
+planning. Exits with status 1 when the median exceeds the budget.
+
+    python -m benchmarks.bench_settlement --debts 5000 --members 200
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from utils.settlement import build_settle_plan
+
+
+def generate_debts(num_debts: int, num_members: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    debtors = rng.integers(1, num_members + 1, size=num_debts)
+    creditors = rng.integers(1, num_members + 1, size=num_debts)
+    # Nobody owes themselves
+    creditors = np.where(creditors == debtors, creditors % num_members + 1, creditors)
+    amounts = rng.integers(1, 50_000, size=num_debts)
+    return np.stack([debtors, creditors, amounts], axis=1).astype(np.int64)
+
+
+def check_plan(debts: np.ndarray, transfers) -> None:
+    """The plan must leave every member with exactly the same net balance."""
+    expected = {}
+    for debtor_id, creditor_id, amount in debts.tolist():
+        expected[debtor_id] = expected.get(debtor_id, 0) - amount
+        expected[creditor_id] = expected.get(creditor_id, 0) + amount
+    planned = {}
+    for debtor_id, creditor_id, amount in transfers:
+        planned[debtor_id] = planned.get(debtor_id, 0) - amount
+        planned[creditor_id] = planned.get(creditor_id, 0) + amount
+    expected = {k: v for k, v in expected.items() if v}
+    if expected != planned:
+        raise AssertionError("settle plan does not reproduce the net balances")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--debts", type=int, default=5000)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--budget-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    debts = generate_debts(args.debts, args.members)
+    transfers = build_settle_plan(debts)
+    check_plan(debts, transfers)
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        build_settle_plan(debts)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    median = statistics.median(timings)
+    print(f"debts={args.debts} members={args.members} transfers={len(transfers)}")
+    print(f"median={median:.3f}ms min={min(timings):.3f}ms max={max(timings):.3f}ms budget={args.budget_ms}ms")
+    return 0 if median <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
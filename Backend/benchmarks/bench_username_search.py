@@ -0,0 +1,72 @@
+"""
+Microbenchmark of username autocomplete: the in-memory UsernameIndex against
+the range query /users/search falls back to before the index is loaded.
+
+Runs against its own in-memory SQLite database, so it needs no setup.
+
+    python -m benchmarks.bench_username_search --users 100000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import string
+import sys
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+
+async def run(num_users: int, repeat: int, limit: int) -> None:
+    from config.db_configuration import Base
+    from models import group, user  # Registers every mapper the relationships refer to
+    from models.user import User
+    from utils.username_index import UsernameIndex
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        rng = random.Random(0)
+        await conn.execute(insert(User), [
+            {"username": "".join(rng.choices(string.ascii_lowercase, k=8)) + str(i),
+             "email": f"{i}@example.com", "password": "-"}
+            for i in range(num_users)
+        ])
+
+    async with async_sessionmaker(engine)() as db:
+        started = time.perf_counter()
+        index = UsernameIndex(max_size=num_users)
+        index.load(await User.getUsernameDirectory(db, num_users))
+        load_ms = (time.perf_counter() - started) * 1000
+
+        prefixes = ["".join(random.Random(i).choices(string.ascii_lowercase, k=2)) for i in range(repeat)]
+        timings = {"index": [], "sql": []}
+        for prefix in prefixes:
+            started = time.perf_counter()
+            expected = index.search(prefix, limit)
+            timings["index"].append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            found = await User.searchUsernames(db, prefix, limit)
+            timings["sql"].append((time.perf_counter() - started) * 1000)
+            assert found == expected, prefix
+    await engine.dispose()
+
+    print(f"users={num_users} limit={limit} index load={load_ms:.1f}ms")
+    for label, values in timings.items():
+        print(f"{label:<6} median={statistics.median(values):.4f}ms max={max(values):.4f}ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.repeat, args.limit))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(pct) - 1]
+
+
+def git_revision() -> Dict[str, object]:
+    def git(*command):
+        return subprocess.run(["git", *command], capture_output=True, text=True, check=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def seed_users(prefix: str, count: int) -> List[Tuple[int, str, str]]:
+    """Creates the users {prefix}_0 .. {prefix}_{count - 1} if needed and returns (id, username, token) for each."""
+    from sqlalchemy import insert, select
+
+    from config.db_configuration import Base, SessionLocal, engine
+    from models import group, user  # Registers every mapper the relationships refer to
+    from models.user import User
+    from utils.auth import create_access_token
+
+    Base.metadata.create_all(bind=engine)
+    usernames = [f"{prefix}_{i}" for i in range(count)]
+    db = SessionLocal()
+    try:
+        existing = set(db.scalars(select(User.username).where(User.username.in_(usernames))))
+        missing = [name for name in usernames if name not in existing]
+        if missing:
+            db.execute(insert(User), [{"username": name, "email": f"{name}@example.com", "password": "-"}
+                                      for name in missing])
+            db.commit()
+        ids = dict(db.execute(select(User.username, User.id).where(User.username.in_(usernames))).all())
+    finally:
+        db.close()
+    return [(ids[name], name, create_access_token(data={"sub": name})) for name in usernames]
+
+
+def wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+@contextmanager
+def running_server(port: int, env: Optional[dict] = None) -> Iterator[str]:
+    """Starts `uvicorn main:app` in a subprocess and yields its base URL."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=dict(os.environ, **(env or {})), stdout=subprocess.DEVNULL,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        wait_until_ready(base_url)
+        yield base_url
+    finally:
+        server.terminate()
+        server.wait()
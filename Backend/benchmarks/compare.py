@@ -0,0 +1,55 @@
+"""
+Compares two reports written by benchmarks.run_load.
+
+Prints throughput and p50/p95/p99 per endpoint with the relative change.
+Exits with status 1 when --max-regression is given and any endpoint's p95
+got slower by more than that many percent.
+
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json --max-regression 10
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--max-regression", type=float, help="allowed p95 slowdown in percent")
+    args = parser.parse_args()
+
+    with open(args.before) as before_file, open(args.after) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+
+    for label, report in (("before", before), ("after", after)):
+        commit = (report["git"]["commit"] or "?")[:10] + ("+dirty" if report["git"]["dirty"] else "")
+        print(f"{label:<7} {commit:<17} {report['database']:<14} {report['dataset']}")
+
+    regressions = []
+    print(f"\n{'endpoint':<30}" + "".join(f"{metric:>26}" for metric in METRICS))
+    for endpoint in sorted(set(before["endpoints"]) | set(after["endpoints"])):
+        old, new = before["endpoints"].get(endpoint), after["endpoints"].get(endpoint)
+        if not old or not new:
+            print(f"{endpoint:<30} only in {'after' if new else 'before'}")
+            continue
+        cells = [f"{old[metric]:>9.2f} -> {new[metric]:>9.2f} {change(old[metric], new[metric]):>+4.0f}%"
+                 for metric in METRICS]
+        print(f"{endpoint:<30}" + "".join(f"{cell:>26}" for cell in cells))
+        if args.max_regression is not None and change(old["p95_ms"], new["p95_ms"]) > args.max_regression:
+            regressions.append(endpoint)
+
+    if regressions:
+        print(f"\np95 regressed by more than {args.max_regression}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
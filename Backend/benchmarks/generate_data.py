@@ -0,0 +1,152 @@
+"""
+Synthetic data generator for the benchmarks.
+
+Builds users, groups and debts with bulk inserts, from 10k up to 10M debts.
+Users are split into groups of uneven size; some belong to a second group
+and some to none. Debts run between members of the same group with
+log-normally distributed amounts and are tagged with that group. user_balances is filled to match, so the
+database is consistent (python cli.py check-balances passes).
+
+Every user's password is bench-password. The same --seed always gives the
+same data.
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.generate_data --debts 1000000 --reset
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+from sqlalchemy import func, insert, select
+
+PASSWORD = "bench-password"
+USERNAME_PREFIX = "bench_user_"
+TITLES = ("Groceries", "Rent", "Dinner", "Taxi", "Tickets", "Utilities", "Coffee", "Trip", "Gift", "Drinks")
+
+
+def plan_groups(rng: np.random.Generator, num_users: int, group_size: int):
+    """
+    Returns (home_group, group_starts, group_sizes, extra_memberships) for users
+    0..num_users-1. Users in a home group are contiguous so a random co-member
+    can be drawn with offset arithmetic. The last 10% of users have no group.
+    """
+    grouped = max(2, int(num_users * 0.9))
+    sizes = []
+    remaining = grouped
+    while remaining > 0:
+        size = int(min(remaining, rng.integers(2, 2 * group_size)))
+        if remaining - size == 1:
+            size += 1
+        sizes.append(size)
+        remaining -= size
+    group_sizes = np.array(sizes, dtype=np.int64)
+    group_starts = np.concatenate([[0], np.cumsum(group_sizes)[:-1]])
+    home_group = np.repeat(np.arange(len(sizes)), group_sizes)
+
+    # A fifth of the grouped users also joins a second, random group
+    joiners = rng.choice(grouped, size=grouped // 5, replace=False)
+    second = rng.integers(0, len(sizes), size=len(joiners))
+    extra = [(int(user), int(group)) for user, group in zip(joiners, second) if group != home_group[user]]
+    return home_group, group_starts, group_sizes, extra
+
+
+def generate_debt_batch(rng: np.random.Generator, size: int, home_group, group_starts, group_sizes):
+    """Returns (debtor, creditor, amount) arrays of user indexes and amounts in cents for one batch."""
+    debtors = rng.integers(0, len(home_group), size=size)
+    groups = home_group[debtors]
+    starts, sizes = group_starts[groups], group_sizes[groups]
+    offsets = rng.integers(1, sizes)
+    creditors = starts + (debtors - starts + offsets) % sizes
+    amounts = np.maximum(np.round(rng.lognormal(mean=np.log(2500), sigma=1.0, size=size)), 1).astype(np.int64)
+    return debtors, creditors, amounts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--debts", type=int, default=10_000)
+    parser.add_argument("--users", type=int, help="default: one user per 50 debts, at least 50")
+    parser.add_argument("--group-size", type=int, default=8, help="average group size")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="rows per INSERT transaction")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate every table first")
+    args = parser.parse_args()
+
+    from config.db_configuration import Base, engine
+    from models import group, user  # Registers every mapper the relationships refer to
+    from models.debts import Debt
+    from models.group import Group, user_group_association
+    from models.user import User
+    from models.user_balance import UserBalance
+    from utils.auth import hash_password
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    num_users = args.users or max(50, args.debts // 50)
+    rng = np.random.default_rng(args.seed)
+    home_group, group_starts, group_sizes, extra = plan_groups(rng, num_users, args.group_size)
+    started = time.perf_counter()
+
+    with engine.begin() as conn:
+        if conn.scalar(select(func.count()).select_from(User).where(User.username.like(f"{USERNAME_PREFIX}%"))):
+            print("benchmark users already exist, rerun with --reset", file=sys.stderr)
+            return 1
+        user_offset = (conn.scalar(select(func.max(User.id))) or 0) + 1
+        group_offset = (conn.scalar(select(func.max(Group.id))) or 0) + 1
+
+    def insert_batches(table, total: int, rows_for) -> None:
+        """Inserts rows_for(start, stop) for every batch of [0, total), one transaction per batch."""
+        for start in range(0, total, args.batch_size):
+            with engine.begin() as conn:
+                if engine.dialect.name == "sqlite":
+                    conn.exec_driver_sql("PRAGMA synchronous = OFF")
+                conn.execute(insert(table), rows_for(start, min(total, start + args.batch_size)))
+
+    password_hash = hash_password(PASSWORD)
+
+    def users_rows(start, stop):
+        return [{"id": user_offset + i, "username": f"{USERNAME_PREFIX}{user_offset + i}",
+                 "email": f"{USERNAME_PREFIX}{user_offset + i}@example.com", "password": password_hash}
+                for i in range(start, stop)]
+    insert_batches(User.__table__, num_users, users_rows)
+
+    def groups_rows(start, stop):
+        return [{"id": group_offset + i, "name": f"Bench group {group_offset + i}"} for i in range(start, stop)]
+    insert_batches(Group.__table__, len(group_sizes), groups_rows)
+
+    memberships = [(int(member), int(group)) for member, group in enumerate(home_group)] + extra
+
+    def membership_rows(start, stop):
+        return [{"user_id": user_offset + member, "group_id": group_offset + group}
+                for member, group in memberships[start:stop]]
+    insert_batches(user_group_association, len(memberships), membership_rows)
+
+    owed = np.zeros(num_users, dtype=np.int64)
+    receivable = np.zeros(num_users, dtype=np.int64)
+
+    def debt_rows(start, stop):
+        debtors, creditors, amounts = generate_debt_batch(rng, stop - start, home_group, group_starts, group_sizes)
+        owed[:] += np.bincount(debtors, weights=amounts, minlength=num_users).astype(np.int64)
+        receivable[:] += np.bincount(creditors, weights=amounts, minlength=num_users).astype(np.int64)
+        return [{"title": f"{TITLES[i % len(TITLES)]} #{i}", "receiver": f"{USERNAME_PREFIX}{user_offset + creditor}",
+                 "receiver_id": user_offset + creditor, "amount_cents": amount, "user_id": user_offset + debtor,
+                 "group_id": group_offset + group}
+                for i, debtor, creditor, amount, group in zip(range(start, stop), debtors.tolist(), creditors.tolist(),
+                                                              amounts.tolist(), home_group[debtors].tolist())]
+    insert_batches(Debt.__table__, args.debts, debt_rows)
+
+    def balance_rows(start, stop):
+        return [{"user_id": user_offset + i, "total_owed_cents": int(owed[i]),
+                 "total_receivable_cents": int(receivable[i])}
+                for i in range(start, stop)]
+    insert_batches(UserBalance.__table__, num_users, balance_rows)
+
+    elapsed = time.perf_counter() - started
+    print(f"{num_users} users, {len(group_sizes)} groups, {len(memberships)} memberships, {args.debts} debts "
+          f"in {elapsed:.1f}s ({args.debts / elapsed:,.0f} debts/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
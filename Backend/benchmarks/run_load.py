@@ -0,0 +1,266 @@
+"""
+Load driver for the main API flows.
+
+Runs a weighted mix of POST /login, GET /debts, GET /my_debts/sum,
+POST /split-debts/ and POST /groups/{id}/add_users with concurrent
+closed-loop clients against data made by benchmarks.generate_data. Prints
+throughput and p50/p95/p99 per endpoint and saves them as JSON together
+with the git commit, so runs can be compared with benchmarks.compare.
+
+Starts its own uvicorn unless --base-url points at a running server. Set
+DATABASE_URL to the same database the generator filled, SQLite or the
+MySQL container from docker-compose.yml. All clients share one IP, so set
+ADMISSION_CONTROL=false to measure the endpoints rather than the rate limits.
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.run_load --clients 50 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import git_revision, percentile, running_server
+from benchmarks.generate_data import PASSWORD, USERNAME_PREFIX
+
+DEFAULT_MIX = "login=5,debts=40,sum=35,split=10,add_users=10"
+ADD_USERS_BATCH = 5
+
+
+class Context:
+    """Users and groups sampled from the database, shared by every client."""
+
+    def __init__(self, groups: Dict[int, List[int]], usernames: Dict[int, str], tokens: Dict[int, str]):
+        self.groups = groups
+        self.group_ids = list(groups)
+        self.usernames = usernames
+        self.user_ids = list(usernames)
+        self.tokens = tokens
+
+    def headers(self, user_id: int) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.tokens[user_id]}"}
+
+
+def load_context(sample_groups: int, seed: int) -> Context:
+    """Picks random benchmark groups, their members and a token per member."""
+    from sqlalchemy import func, select
+
+    from config.db_configuration import SessionLocal
+    from models import group, user  # Registers every mapper the relationships refer to
+    from models.group import Group, user_group_association
+    from models.user import User
+    from utils.auth import create_access_token
+
+    db = SessionLocal()
+    try:
+        low, high = db.execute(select(func.min(Group.id), func.max(Group.id))
+                               .where(Group.name.like("Bench group %"))).one()
+        if low is None:
+            raise SystemExit("no benchmark data, run python -m benchmarks.generate_data first")
+        rng = random.Random(seed)
+        picked = rng.sample(range(low, high + 1), min(sample_groups, high - low + 1))
+        rows = db.execute(select(user_group_association.c.group_id, User.id, User.username)
+                          .join(User, User.id == user_group_association.c.user_id)
+                          .where(user_group_association.c.group_id.in_(picked),
+                                 User.username.like(f"{USERNAME_PREFIX}%"))).all()
+    finally:
+        db.close()
+
+    groups: Dict[int, List[int]] = {}
+    usernames: Dict[int, str] = {}
+    for group_id, user_id, username in rows:
+        groups.setdefault(group_id, []).append(user_id)
+        usernames[user_id] = username
+    groups = {group_id: members for group_id, members in groups.items() if len(members) >= 2}
+    tokens = {user_id: create_access_token(data={"sub": username}) for user_id, username in usernames.items()}
+    return Context(groups, usernames, tokens)
+
+
+def dataset_size() -> Dict[str, int]:
+    from sqlalchemy import func, select
+
+    from config.db_configuration import SessionLocal
+    from models import group, user  # Registers every mapper the relationships refer to
+    from models.debts import Debt
+    from models.group import Group
+    from models.user import User
+
+    db = SessionLocal()
+    try:
+        return {name: db.scalar(select(func.count()).select_from(model))
+                for name, model in (("users", User), ("groups", Group), ("debts", Debt))}
+    finally:
+        db.close()
+
+
+class Client:
+    """
+    One closed-loop client. Each scenario does its (unmeasured) setup and
+    returns the endpoint name and the request coroutine to time.
+    """
+
+    def __init__(self, http: httpx.AsyncClient, context: Context, rng: random.Random, run_id: str):
+        self.http = http
+        self.context = context
+        self.rng = rng
+        self.run_id = run_id
+        self.add_users_group = None
+        self.add_users_owner = None
+        self.add_users_offset = 0
+
+    def _user(self) -> int:
+        return self.rng.choice(self.context.user_ids)
+
+    async def login(self):
+        username = self.context.usernames[self._user()]
+        return "POST /login", self.http.post("/login", json={"username": username, "password": PASSWORD})
+
+    async def debts(self):
+        return "GET /debts", self.http.get("/debts", headers=self.context.headers(self._user()))
+
+    async def sum(self):
+        return "GET /my_debts/sum", self.http.get("/my_debts/sum", headers=self.context.headers(self._user()))
+
+    async def split(self):
+        members = self.context.groups[self.rng.choice(self.context.group_ids)]
+        participants = self.rng.sample(members, min(len(members), self.rng.randint(2, 10)))
+        costs = 10 * len(participants)
+        payments = {user_id: 0 for user_id in participants}
+        payments[participants[0]] = costs
+        return "POST /split-debts/", self.http.post("/split-debts/", json={"costs": costs, "payments": payments})
+
+    async def add_users(self):
+        # Each call adds users the current group has not seen yet; a fresh group
+        # is created (outside the measurement) once every sampled user was added.
+        if self.add_users_group is None or self.add_users_offset >= len(self.context.user_ids):
+            self.add_users_owner = self._user()
+            name = f"Load {self.run_id} {id(self)} {time.perf_counter_ns()}"
+            response = await self.http.post("/groups", params={"name": name},
+                                            headers=self.context.headers(self.add_users_owner))
+            response.raise_for_status()
+            self.add_users_group = response.json()["group"]["id"]
+            self.add_users_offset = 0
+        batch = [user_id for user_id in self.context.user_ids[self.add_users_offset:self.add_users_offset + ADD_USERS_BATCH]
+                 if user_id != self.add_users_owner]
+        self.add_users_offset += ADD_USERS_BATCH
+        return ("POST /groups/{id}/add_users",
+                self.http.post(f"/groups/{self.add_users_group}/add_users",
+                               headers=self.context.headers(self.add_users_owner), json={"user_ids": batch}))
+
+
+async def drive(base_url: str, context: Context, args, mix: Dict[str, int]) -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+    scenarios, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + args.duration
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as http:
+        async def worker(index: int):
+            rng = random.Random(args.seed * 100_003 + index)
+            client = Client(http, context, rng, run_id)
+            while time.perf_counter() < deadline:
+                scenario = rng.choices(scenarios, weights)[0]
+                endpoint, request = await getattr(client, scenario)()
+                started = time.perf_counter()
+                try:
+                    status = (await request).status_code
+                except httpx.HTTPError as error:
+                    status = type(error).__name__
+                elapsed = (time.perf_counter() - started) * 1000
+                result = results.setdefault(endpoint, {"latencies": [], "statuses": {}})
+                result["latencies"].append(elapsed)
+                result["statuses"][str(status)] = result["statuses"].get(str(status), 0) + 1
+
+        await asyncio.gather(*(worker(i) for i in range(args.clients)))
+    return results
+
+
+def summarize(results: Dict[str, dict], duration: float) -> Dict[str, dict]:
+    summary = {}
+    for endpoint, result in sorted(results.items()):
+        latencies = sorted(result["latencies"])
+        errors = sum(count for status, count in result["statuses"].items() if not status.startswith(("2", "3")))
+        summary[endpoint] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "statuses": dict(sorted(result["statuses"].items())),
+            "throughput_rps": round(len(latencies) / duration, 2),
+            "mean_ms": round(sum(latencies) / len(latencies), 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2),
+        }
+    return summary
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("login", "debts", "sum", "split", "add_users"):
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}")
+        mix[name] = int(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--sample-groups", type=int, default=200, help="groups whose members act as clients")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url", help="use a running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--output", help="report path (default benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    context = load_context(args.sample_groups, args.seed)
+    dataset = dataset_size()
+    started_at = datetime.now(timezone.utc)
+
+    if args.base_url:
+        results = asyncio.run(drive(args.base_url, context, args, args.mix))
+    else:
+        with running_server(args.port) as base_url:
+            results = asyncio.run(drive(base_url, context, args, args.mix))
+
+    endpoints = summarize(results, args.duration)
+    total = sum(endpoint["requests"] for endpoint in endpoints.values())
+    report = {
+        "started_at": started_at.isoformat(),
+        "git": git_revision(),
+        "database": os.getenv("DATABASE_URL", "").split("://")[0] or "mysql",
+        "dataset": dataset,
+        "config": {"clients": args.clients, "duration": args.duration, "mix": args.mix, "seed": args.seed},
+        "totals": {"requests": total, "errors": sum(endpoint["errors"] for endpoint in endpoints.values()),
+                   "throughput_rps": round(total / args.duration, 2)},
+        "endpoints": endpoints,
+    }
+
+    for endpoint, stats in endpoints.items():
+        print(f"{endpoint:<30} {stats['throughput_rps']:8.1f} req/s  p50={stats['p50_ms']:8.2f}ms "
+              f"p95={stats['p95_ms']:8.2f}ms p99={stats['p99_ms']:8.2f}ms  errors={stats['errors']}")
+    print(f"{'total':<30} {report['totals']['throughput_rps']:8.1f} req/s")
+
+    output = args.output or os.path.join(
+        "benchmarks", "results",
+        f"{started_at.strftime('%Y%m%dT%H%M%S')}-{(report['git']['commit'] or 'nogit')[:10]}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"report saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
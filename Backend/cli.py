@@ -0,0 +1,88 @@
+"""
+Maintenance commands for the DebtApp backend.
+
+    python cli.py check-balances      # compare user_balances with debts, exit 1 on drift
+    python cli.py rebuild-balances    # recompute user_balances from debts
+    python cli.py check-query-plans   # EXPLAIN the hot queries, exit 1 on a full table scan
+    python cli.py create-schema       # create missing tables on an empty database (dev, tests)
+    python cli.py archive-debts       # move settled debts to debts_history now, in chunks
+
+Schema changes are handled by Alembic: alembic upgrade head
+"""
+import argparse
+import asyncio
+import sys
+
+from config.db_configuration import create_schema, dispose_engines, get_async_engine, get_async_session_local
+from models import group, user  # Registers every mapper the relationships refer to
+from models.user_balance import UserBalance
+from services.debt_lifecycle_service import DEBT_ARCHIVE_CHUNK_SIZE, archive_settled_debts
+from utils.query_plans import find_full_scans
+
+
+async def check_balances(args) -> int:
+    async with get_async_session_local()() as db:
+        mismatches = await UserBalance.findInconsistencies(db)
+
+    for mismatch in mismatches:
+        print(f"user {mismatch['user_id']}: expected (owed, receivable) cents={mismatch['expected']} "
+              f"stored={mismatch['stored']}")
+    print(f"{len(mismatches)} inconsistent balance(s)")
+    return 1 if mismatches else 0
+
+
+async def rebuild_balances(args) -> int:
+    async with get_async_session_local()() as db:
+        written = await UserBalance.rebuild(db)
+
+    print(f"Rebuilt {written} balance row(s)")
+    return 0
+
+
+async def check_query_plans(args) -> int:
+    async with get_async_engine().connect() as conn:
+        failures = await conn.run_sync(find_full_scans)
+
+    for name, scans in failures.items():
+        print(f"{name}: full table scan -> {'; '.join(scans)}")
+    print(f"{len(failures)} hot quer{'y' if len(failures) == 1 else 'ies'} without a usable index")
+    return 1 if failures else 0
+
+
+async def create_tables(args) -> int:
+    await asyncio.to_thread(create_schema)
+    print("Schema created")
+    return 0
+
+
+async def archive_debts(args) -> int:
+    moved = await archive_settled_debts(chunk_size=args.chunk_size)
+    print(f"Archived {moved} settled debt(s)")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("check-balances", help="Compare user_balances with the debts table").set_defaults(func=check_balances)
+    commands.add_parser("rebuild-balances", help="Recompute user_balances from the debts table").set_defaults(func=rebuild_balances)
+    commands.add_parser("check-query-plans", help="Fail if a hot query does a full table scan").set_defaults(func=check_query_plans)
+    archive = commands.add_parser("archive-debts", help="Move settled debts to debts_history")
+    archive.add_argument("--chunk-size", type=int, default=DEBT_ARCHIVE_CHUNK_SIZE)
+    archive.set_defaults(func=archive_debts)
+    commands.add_parser("create-schema", help="Create missing tables (use Alembic on existing databases)").set_defaults(func=create_tables)
+
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+async def run(args) -> int:
+    try:
+        return await args.func(args)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from utils.auth import request_subject
+from utils.cache import TTLCache
+from utils.instrumentation import instrument_engine
+from utils.threaded_session import ThreadedSession
+
+load_dotenv()
+
+ASYNC_DRIVERS = {
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+def connect_args_for(url: str) -> dict:
+    # SQLite connections are handed between threadpool workers
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+
+DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+pymysql://{os.getenv('DATABASE_USERNAME')}:{os.getenv('DATABASE_PASSWORD')}@{os.getenv('DATABASE_HOST')}:{os.getenv('DATABASE_PORT')}/{os.getenv('DATABASE_NAME')}"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+# Read replica for the read-only routes, unset sends every query to DATABASE_URL
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+ASYNC_DATABASE_READ_URL = os.getenv("ASYNC_DATABASE_READ_URL") or (DATABASE_READ_URL and to_async_url(DATABASE_READ_URL))
+# A user's reads stay on the primary this long after a request of theirs used it, so they see their own writes
+DATABASE_READ_STICKY_SECONDS = float(os.getenv("DATABASE_READ_STICKY_SECONDS", "5"))
+# true: routes run on AsyncSession, false: routes run on the blocking Session in the threadpool
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "true").lower() in ("1", "true", "yes")
+# Logs every statement, for debugging only
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() in ("1", "true", "yes")
+# Connections opened at startup, so the first requests do not pay for connecting
+DATABASE_POOL_WARMUP = int(os.getenv("DATABASE_POOL_WARMUP", "1"))
+
+POOL_DEFAULTS = {"pool_size": 5, "max_overflow": 10, "pool_pre_ping": False, "pool_recycle": -1}
+
+
+def pool_options(prefix: str, defaults: dict = POOL_DEFAULTS) -> dict:
+    """Pool settings from {prefix}_POOL_SIZE, _MAX_OVERFLOW, _POOL_PRE_PING and _POOL_RECYCLE."""
+    pre_ping = os.getenv(f"{prefix}_POOL_PRE_PING")
+    return {
+        "pool_size": int(os.getenv(f"{prefix}_POOL_SIZE", defaults["pool_size"])),
+        "max_overflow": int(os.getenv(f"{prefix}_MAX_OVERFLOW", defaults["max_overflow"])),
+        "pool_pre_ping": defaults["pool_pre_ping"] if pre_ping is None else pre_ping.lower() in ("1", "true", "yes"),
+        "pool_recycle": int(os.getenv(f"{prefix}_POOL_RECYCLE", defaults["pool_recycle"])),
+    }
+
+
+def engine_options(url: str, pool: dict) -> dict:
+    if url.startswith("sqlite") and (url.split("://", 1)[1] in ("", "/", "/:memory:") or "mode=memory" in url):
+        # In-memory SQLite runs on a single shared connection, there is no pool to size
+        pool = {key: value for key, value in pool.items() if key not in ("pool_size", "max_overflow")}
+    return {"echo": SQL_ECHO, **pool}
+
+
+Base = declarative_base()
+
+
+class DatabaseRole:
+    """
+    One database the app talks to, the primary or a read replica, with its
+    own pool settings. Engines are created on first use: importing this
+    module neither loads a database driver nor connects, so tests, the CLI
+    and workers start fast.
+    """
+
+    def __init__(self, url: str, async_url: str, pool: dict):
+        self.url = url
+        self.async_url = async_url
+        self.pool = pool
+        self._engine: Optional[Engine] = None
+        self._async_engine: Optional[AsyncEngine] = None
+        self._session_local: Optional[sessionmaker] = None
+        self._async_session_local: Optional[async_sessionmaker] = None
+
+    def get_engine(self) -> Engine:
+        if self._engine is None:
+            self._engine = create_engine(self.url, connect_args=connect_args_for(self.url),
+                                         **engine_options(self.url, self.pool))
+            instrument_engine(self._engine)
+        return self._engine
+
+    def get_async_engine(self) -> AsyncEngine:
+        if self._async_engine is None:
+            self._async_engine = create_async_engine(self.async_url, **engine_options(self.async_url, self.pool))
+            instrument_engine(self._async_engine.sync_engine)
+        return self._async_engine
+
+    def get_session_local(self) -> sessionmaker:
+        if self._session_local is None:
+            self._session_local = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False,
+                                               bind=self.get_engine())
+        return self._session_local
+
+    def get_async_session_local(self) -> async_sessionmaker:
+        if self._async_session_local is None:
+            self._async_session_local = async_sessionmaker(self.get_async_engine(), autoflush=False,
+                                                           expire_on_commit=False)
+        return self._async_session_local
+
+    async def warm_up(self, connections: int) -> None:
+        if DATABASE_ASYNC:
+            conns = await asyncio.gather(*(self.get_async_engine().connect() for _ in range(connections)))
+            for conn in conns:
+                await conn.execute(text("SELECT 1"))
+                await conn.close()
+        else:
+            def check_all():
+                # All open at once, so the pool keeps `connections` of them
+                conns = [self.get_engine().connect() for _ in range(connections)]
+                for conn in conns:
+                    conn.execute(text("SELECT 1"))
+                    conn.close()
+            await run_in_threadpool(check_all)
+
+    async def dispose(self) -> None:
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+        if self._engine is not None:
+            self._engine.dispose()
+
+
+writer = DatabaseRole(DATABASE_URL, ASYNC_DATABASE_URL, pool_options("DATABASE"))
+# Without a replica the reader is the primary itself, same engines and pool
+reader = (DatabaseRole(DATABASE_READ_URL, ASYNC_DATABASE_READ_URL, pool_options("DATABASE_READ", writer.pool))
+          if DATABASE_READ_URL else writer)
+
+# Subjects of the users who recently used the primary, see DATABASE_READ_STICKY_SECONDS
+recent_writers = TTLCache(maxsize=int(os.getenv("DATABASE_READ_STICKY_MAX_SIZE", "100000")),
+                          ttl=DATABASE_READ_STICKY_SECONDS)
+
+
+def has_read_replica() -> bool:
+    return reader is not writer
+
+
+def get_engine() -> Engine:
+    return writer.get_engine()
+
+
+def get_async_engine() -> AsyncEngine:
+    return writer.get_async_engine()
+
+
+def get_session_local() -> sessionmaker:
+    return writer.get_session_local()
+
+
+def get_async_session_local() -> async_sessionmaker:
+    return writer.get_async_session_local()
+
+
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "async_engine": get_async_engine,
+    "SessionLocal": get_session_local,
+    "AsyncSessionLocal": get_async_session_local,
+}
+
+
+def __getattr__(name: str):
+    # Keeps `from config.db_configuration import engine, SessionLocal, ...` working without eager engines
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def warm_up_pool(connections: int = DATABASE_POOL_WARMUP) -> None:
+    """Opens `connections` pooled connections of each engine the routes use and checks each with SELECT 1."""
+    if connections <= 0:
+        return
+    await writer.warm_up(connections)
+    if has_read_replica():
+        await reader.warm_up(connections)
+
+
+async def dispose_engines() -> None:
+    await writer.dispose()
+    if has_read_replica():
+        await reader.dispose()
+
+
+def create_schema() -> None:
+    """Creates every table that does not exist yet. Use Alembic for existing databases."""
+    from models import debt_history, debts, group, user, user_balance  # Registers every table on Base.metadata
+
+    Base.metadata.create_all(bind=get_engine())
+
+
+@asynccontextmanager
+async def open_session(read_only: bool = False):
+    """
+    A session on the engine the routes use, for work outside a request such
+    as background refreshes. read_only sessions go to the read replica.
+    """
+    role = reader if read_only else writer
+    if DATABASE_ASYNC:
+        async with role.get_async_session_local()() as db:
+            yield db
+    else:
+        db = ThreadedSession(role.get_session_local()())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+
+async def get_db(request: Request):
+    subject = request_subject(request) if has_read_replica() else None
+    if subject is not None:
+        recent_writers.set(subject, True)
+    try:
+        async with open_session() as db:
+            yield db
+    finally:
+        if subject is not None:
+            # Again once done, the sticky window counts from the commit
+            recent_writers.set(subject, True)
+
+
+def reads_from_replica(request: Request) -> bool:
+    """
+    Whether a read-only request goes to the read replica: yes, except for a
+    user whose requests used the primary in the last
+    DATABASE_READ_STICKY_SECONDS, so they read their own writes.
+    """
+    if not has_read_replica():
+        return False
+    subject = request_subject(request)
+    return subject is None or recent_writers.get(subject) is None
+
+
+async def get_read_db(request: Request):
+    """Session for routes that only read, on the read replica when reads_from_replica says so."""
+    async with open_session(read_only=reads_from_replica(request)) as db:
+        yield db
@@ -1,39 +1,82 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from models import user
-from config.db_configuration import engine
-from routes import user_routes, debts_routes, group_routes
+from config.db_configuration import dispose_engines, open_session, warm_up_pool
+from models.user import User
+from services.debt_lifecycle_service import debt_archiver
+from routes import user_routes, debts_routes, events_routes, group_routes, metrics_routes
 from fastapi.middleware.cors import CORSMiddleware
+from schemas import MessageSchema
+from utils.admission import AdmissionControlMiddleware
+from utils.event_hub import ledger_hub
+from utils.instrumentation import InstrumentedRoute, RequestMetricsMiddleware
+from utils.password_pool import password_pool
+from utils.username_index import username_index
+
+
+async def load_username_directory(max_size: int):
+    async with open_session() as db:
+        return await User.getUsernameDirectory(db, max_size)
+
 
-user.Base.metadata.create_all(bind=engine)
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The schema is not created here: run `python cli.py create-schema` or `alembic upgrade head` once
+    await warm_up_pool()
+    await ledger_hub.start()
+    # Loads in the background, /users/search queries the database until the first load is done
+    username_index.start(load_username_directory)
+    debt_archiver.start()
+    yield
+    await username_index.stop()
+    await debt_archiver.stop()
+    await ledger_hub.stop()
+    password_pool.shutdown()
+    await dispose_engines()
 
-app.include_router(debts_routes.router)
-app.include_router(user_routes.router)
-app.include_router(group_routes.router)
 
 origins =[
     "http://localhost:3000",
     "http://localhost:8000",
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"]
-)
 
+def create_app() -> FastAPI:
+    """Builds the application. Importing it connects to nothing; the lifespan opens the pool."""
+    app = FastAPI(lifespan=lifespan)
+    app.router.route_class = InstrumentedRoute
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    app.include_router(debts_routes.router)
+    app.include_router(user_routes.router)
+    app.include_router(group_routes.router)
+    app.include_router(metrics_routes.router)
+    app.include_router(events_routes.router)
+
+    @app.get("/", response_model=MessageSchema)
+    async def root():
+        return MessageSchema(message="Hello World")
 
-@app.get("/")
-async def root():
-    return {"message": "Hello World"}
+    @app.get("/hello/{name}", response_model=MessageSchema)
+    async def say_hello(name: str):
+        return MessageSchema(message=f"Hello {name}")
 
+    # Inside the metrics middleware, so request durations include the time spent queued
+    app.add_middleware(AdmissionControlMiddleware)
+    app.add_middleware(RequestMetricsMiddleware)
 
-@app.get("/hello/{name}")
-async def say_hello(name: str):
-    return {"message": f"Hello {name}"}
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"]
+    )
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=8000)
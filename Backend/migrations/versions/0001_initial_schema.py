@@ -0,0 +1,84 @@
+"""Initial schema, as created by Base.metadata.create_all before migrations existed
+
+Databases that were created by create_all should be stamped instead of
+upgraded: alembic stamp 0001
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('username', sa.String(length=255), nullable=False),
+        sa.Column('email', sa.String(length=100), nullable=False),
+        sa.Column('password', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'groups',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_groups_id', 'groups', ['id'])
+
+    op.create_table(
+        'user_group_association',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['group_id'], ['groups.id']),
+        sa.PrimaryKeyConstraint('user_id', 'group_id'),
+    )
+
+    op.create_table(
+        'debts',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('title', sa.String(length=100), nullable=True),
+        sa.Column('receiver', sa.String(length=100), nullable=True),
+        sa.Column('receiver_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['receiver_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_debts_id', 'debts', ['id'])
+
+    op.create_table(
+        'user_balances',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_owed', sa.Float(), nullable=False),
+        sa.Column('total_receivable', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_balances')
+    op.drop_index('ix_debts_id', table_name='debts')
+    op.drop_table('debts')
+    op.drop_table('user_group_association')
+    op.drop_index('ix_groups_id', table_name='groups')
+    op.drop_table('groups')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_index('ix_users_username', table_name='users')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_table('users')
@@ -0,0 +1,27 @@
+"""Composite indexes for the debts hot paths
+
+(user_id, id) serves the keyset-paginated /debts listing and per-debtor
+filters, (receiver_id, user_id) serves creditor lookups and group netting.
+Both also cover their foreign keys, so MySQL does not need separate ones.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_debts_user_id_id', 'debts', ['user_id', 'id'])
+    op.create_index('ix_debts_receiver_id_user_id', 'debts', ['receiver_id', 'user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_debts_receiver_id_user_id', table_name='debts')
+    op.drop_index('ix_debts_user_id_id', table_name='debts')
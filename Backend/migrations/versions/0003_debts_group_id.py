@@ -0,0 +1,40 @@
+"""Optional group on debts
+
+Adds the nullable debts.group_id and the two covering indexes behind
+/groups/{id}/balances: (group_id, user_id, amount) for the debtor side and
+(group_id, receiver_id, amount) for the creditor side. The first also
+covers the foreign key on MySQL. Memberships get a (group_id, user_id)
+index, as the primary key leads with user_id and every per-group member
+lookup scanned it.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('debts') as batch_op:
+        batch_op.add_column(sa.Column('group_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_debts_group_id_groups', 'groups', ['group_id'], ['id'])
+        batch_op.create_index('ix_debts_group_id_user_id', ['group_id', 'user_id', 'amount'])
+        batch_op.create_index('ix_debts_group_id_receiver_id', ['group_id', 'receiver_id', 'amount'])
+    op.create_index('ix_user_group_association_group_id_user_id', 'user_group_association', ['group_id', 'user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_group_association_group_id_user_id', table_name='user_group_association')
+    with op.batch_alter_table('debts') as batch_op:
+        # MySQL refuses to drop the index backing the foreign key while the key exists
+        batch_op.drop_constraint('fk_debts_group_id_groups', type_='foreignkey')
+        batch_op.drop_index('ix_debts_group_id_receiver_id')
+        batch_op.drop_index('ix_debts_group_id_user_id')
+        batch_op.drop_column('group_id')
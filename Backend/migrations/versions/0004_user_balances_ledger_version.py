@@ -0,0 +1,28 @@
+"""Ledger version on user balances
+
+Adds user_balances.ledger_version, bumped together with the totals on every
+debt insert or delete. GET /debts and /my_debts/sum use it as their ETag, so
+an unchanged ledger is answered with 304 from a primary key lookup.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('user_balances') as batch_op:
+        batch_op.add_column(sa.Column('ledger_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user_balances') as batch_op:
+        batch_op.drop_column('ledger_version')
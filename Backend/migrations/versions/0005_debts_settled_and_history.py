@@ -0,0 +1,67 @@
+"""Settled debts and debts_history
+
+Adds debts.settled_at and the debts_history table settled debts are
+archived to. The group balances covering indexes get settled_at after
+group_id, so they still cover the per-member sums now that those only
+count open debts, and (settled_at, id) lets the archiver find settled rows
+without a scan.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('debts') as batch_op:
+        batch_op.add_column(sa.Column('settled_at', sa.DateTime(), nullable=True))
+        # On MySQL these indexes back the group foreign key, which has to go while they are swapped
+        batch_op.drop_constraint('fk_debts_group_id_groups', type_='foreignkey')
+        batch_op.drop_index('ix_debts_group_id_user_id')
+        batch_op.drop_index('ix_debts_group_id_receiver_id')
+        batch_op.create_index('ix_debts_group_id_user_id', ['group_id', 'settled_at', 'user_id', 'amount'])
+        batch_op.create_index('ix_debts_group_id_receiver_id', ['group_id', 'settled_at', 'receiver_id', 'amount'])
+        batch_op.create_foreign_key('fk_debts_group_id_groups', 'groups', ['group_id'], ['id'])
+        batch_op.create_index('ix_debts_settled_at_id', ['settled_at', 'id'])
+
+    op.create_table(
+        'debts_history',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('title', sa.String(length=100), nullable=True),
+        sa.Column('receiver', sa.String(length=100), nullable=True),
+        sa.Column('receiver_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=True),
+        sa.Column('settled_at', sa.DateTime(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['receiver_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['group_id'], ['groups.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_debts_history_user_id_id', 'debts_history', ['user_id', 'id'])
+    op.create_index('ix_debts_history_receiver_id_id', 'debts_history', ['receiver_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_debts_history_receiver_id_id', table_name='debts_history')
+    op.drop_index('ix_debts_history_user_id_id', table_name='debts_history')
+    op.drop_table('debts_history')
+    with op.batch_alter_table('debts') as batch_op:
+        batch_op.drop_index('ix_debts_settled_at_id')
+        batch_op.drop_constraint('fk_debts_group_id_groups', type_='foreignkey')
+        batch_op.drop_index('ix_debts_group_id_receiver_id')
+        batch_op.drop_index('ix_debts_group_id_user_id')
+        batch_op.create_index('ix_debts_group_id_user_id', ['group_id', 'user_id', 'amount'])
+        batch_op.create_index('ix_debts_group_id_receiver_id', ['group_id', 'receiver_id', 'amount'])
+        batch_op.create_foreign_key('fk_debts_group_id_groups', 'groups', ['group_id'], ['id'])
+        batch_op.drop_column('settled_at')
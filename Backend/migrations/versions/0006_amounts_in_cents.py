@@ -0,0 +1,97 @@
+"""Amounts in integer cents
+
+Replaces the Float money columns with BIGINT cents: debts.amount_cents,
+debts_history.amount_cents and user_balances.total_owed_cents /
+total_receivable_cents. Sums over them are exact integer SUMs in the
+database instead of drifting float additions.
+
+Each debt is rounded to the nearest cent once. The balances are not
+converted from the stored float totals but recomputed from the converted
+open debts, so they start out exactly equal to what the debts add up to.
+The group balances covering indexes are rebuilt over amount_cents.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def _amount_to_cents(table: str) -> None:
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.add_column(sa.Column('amount_cents', sa.BigInteger(), nullable=True))
+    op.execute(f"UPDATE {table} SET amount_cents = ROUND(amount * 100)")
+
+
+def _cents_to_amount(table: str) -> None:
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.add_column(sa.Column('amount', sa.Float(), nullable=True))
+    op.execute(f"UPDATE {table} SET amount = amount_cents / 100.0")
+
+
+def upgrade() -> None:
+    _amount_to_cents('debts')
+    with op.batch_alter_table('debts') as batch_op:
+        # On MySQL these indexes back the group foreign key, which has to go while they are rebuilt
+        batch_op.drop_constraint('fk_debts_group_id_groups', type_='foreignkey')
+        batch_op.drop_index('ix_debts_group_id_user_id')
+        batch_op.drop_index('ix_debts_group_id_receiver_id')
+        batch_op.drop_column('amount')
+        batch_op.alter_column('amount_cents', existing_type=sa.BigInteger(), nullable=False)
+        batch_op.create_index('ix_debts_group_id_user_id', ['group_id', 'settled_at', 'user_id', 'amount_cents'])
+        batch_op.create_index('ix_debts_group_id_receiver_id',
+                              ['group_id', 'settled_at', 'receiver_id', 'amount_cents'])
+        batch_op.create_foreign_key('fk_debts_group_id_groups', 'groups', ['group_id'], ['id'])
+
+    _amount_to_cents('debts_history')
+    with op.batch_alter_table('debts_history') as batch_op:
+        batch_op.drop_column('amount')
+        batch_op.alter_column('amount_cents', existing_type=sa.BigInteger(), nullable=False)
+
+    with op.batch_alter_table('user_balances') as batch_op:
+        batch_op.add_column(sa.Column('total_owed_cents', sa.BigInteger(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('total_receivable_cents', sa.BigInteger(), nullable=False, server_default='0'))
+    op.execute(
+        "UPDATE user_balances SET "
+        "total_owed_cents = (SELECT COALESCE(SUM(amount_cents), 0) FROM debts "
+        "WHERE debts.user_id = user_balances.user_id AND debts.settled_at IS NULL), "
+        "total_receivable_cents = (SELECT COALESCE(SUM(amount_cents), 0) FROM debts "
+        "WHERE debts.receiver_id = user_balances.user_id AND debts.settled_at IS NULL)"
+    )
+    with op.batch_alter_table('user_balances') as batch_op:
+        batch_op.drop_column('total_owed')
+        batch_op.drop_column('total_receivable')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user_balances') as batch_op:
+        batch_op.add_column(sa.Column('total_owed', sa.Float(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('total_receivable', sa.Float(), nullable=False, server_default='0'))
+    op.execute("UPDATE user_balances SET total_owed = total_owed_cents / 100.0, "
+               "total_receivable = total_receivable_cents / 100.0")
+    with op.batch_alter_table('user_balances') as batch_op:
+        batch_op.drop_column('total_owed_cents')
+        batch_op.drop_column('total_receivable_cents')
+
+    _cents_to_amount('debts_history')
+    with op.batch_alter_table('debts_history') as batch_op:
+        batch_op.drop_column('amount_cents')
+        batch_op.alter_column('amount', existing_type=sa.Float(), nullable=False)
+
+    _cents_to_amount('debts')
+    with op.batch_alter_table('debts') as batch_op:
+        batch_op.drop_constraint('fk_debts_group_id_groups', type_='foreignkey')
+        batch_op.drop_index('ix_debts_group_id_receiver_id')
+        batch_op.drop_index('ix_debts_group_id_user_id')
+        batch_op.drop_column('amount_cents')
+        batch_op.alter_column('amount', existing_type=sa.Float(), nullable=False)
+        batch_op.create_index('ix_debts_group_id_user_id', ['group_id', 'settled_at', 'user_id', 'amount'])
+        batch_op.create_index('ix_debts_group_id_receiver_id', ['group_id', 'settled_at', 'receiver_id', 'amount'])
+        batch_op.create_foreign_key('fk_debts_group_id_groups', 'groups', ['group_id'], ['id'])
@@ -0,0 +1,36 @@
+"""Debt ids are never reused
+
+Archived debts keep their id in debts_history, and archiving skips ids
+already there. Without AUTOINCREMENT SQLite hands out the id of the
+newest debt again once it was archived, so debts is rebuilt with it and
+its counter starts past every archived id. MySQL (InnoDB, 8.0+) never
+reuses an auto-increment value and is left as it is.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('debts', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+        pass
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'debts'")
+    op.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'debts', COALESCE(MAX(id), 0) FROM "
+               "(SELECT MAX(id) AS id FROM debts UNION ALL SELECT MAX(id) FROM debts_history)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('debts', recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+        pass
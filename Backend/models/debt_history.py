@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import (BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, delete, exists, insert, literal,
+                        select)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.db_configuration import Base
+from models.debts import Debt
+
+# Columns copied from debts as they are
+ARCHIVED_COLUMNS = ("id", "title", "receiver", "receiver_id", "amount_cents", "user_id", "group_id", "settled_at")
+
+
+class DebtHistory(Base):
+    """
+    Settled debts moved out of the debts table, so live queries only walk
+    open rows. Keeps the debt's id, so a debt another archiver already
+    copied is skipped instead of copied twice.
+    """
+    __tablename__ = 'debts_history'
+    __table_args__ = (
+        Index('ix_debts_history_user_id_id', 'user_id', 'id'),  # Keyset listing, debtor side
+        Index('ix_debts_history_receiver_id_id', 'receiver_id', 'id'),  # Keyset listing, creditor side
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String(100))
+    receiver = Column(String(100))
+    receiver_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    amount_cents = Column(BigInteger, nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    group_id = Column(Integer, ForeignKey('groups.id'), nullable=True)
+    settled_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, nullable=False)
+
+    @staticmethod
+    async def archiveSettledChunk(db: AsyncSession, chunk_size: int) -> int:
+        """
+        Moves up to chunk_size of the oldest settled debts into debts_history
+        and commits, so locks are held for one chunk only. Returns how many
+        rows were moved.
+        """
+        ids = list(await db.scalars(
+            select(Debt.id).where(Debt.settled_at.is_not(None)).order_by(Debt.settled_at, Debt.id).limit(chunk_size)
+        ))
+        if not ids:
+            return 0
+        return await DebtHistory.archiveDebts(db, ids)
+
+    @staticmethod
+    async def archiveDebts(db: AsyncSession, ids: List[int]) -> int:
+        """
+        Copies the settled debts among ids that are not in debts_history yet,
+        then deletes every one of them that is, and commits. Safe to run from
+        several workers over the same ids: each debt ends up archived once
+        and a worker that comes second moves nothing. Returns the rows deleted.
+        """
+        already_archived = exists().where(DebtHistory.id == Debt.id)
+        try:
+            archived_at = datetime.now(timezone.utc).replace(tzinfo=None)
+            columns = [getattr(Debt, name) for name in ARCHIVED_COLUMNS]
+            await db.execute(
+                insert(DebtHistory).from_select(
+                    [*ARCHIVED_COLUMNS, "archived_at"],
+                    select(*columns, literal(archived_at, DateTime))
+                    .where(Debt.id.in_(ids), Debt.settled_at.is_not(None), ~already_archived),
+                )
+                # A concurrent copy committed after the NOT EXISTS check is skipped too
+                .prefix_with("OR IGNORE", dialect="sqlite").prefix_with("IGNORE", dialect="mysql")
+            )
+            result = await db.execute(delete(Debt).where(Debt.id.in_(ids), Debt.settled_at.is_not(None),
+                                                         already_archived))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return result.rowcount
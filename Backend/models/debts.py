@@ -1,48 +1,111 @@
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.asyncio import AsyncSession
 from config.db_configuration import Base
-from requests import Session
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, ForeignKey, Index, func, select, update
 
 class Debt(Base):
     __tablename__ = 'debts'
+    __table_args__ = (
+        Index('ix_debts_user_id_id', 'user_id', 'id'),  # Keyset listing of a debtor's debts
+        Index('ix_debts_receiver_id_user_id', 'receiver_id', 'user_id'),  # Creditor side and netting
+        # Covering indexes for the per-member sums of /groups/{id}/balances over open debts
+        Index('ix_debts_group_id_user_id', 'group_id', 'settled_at', 'user_id', 'amount_cents'),
+        Index('ix_debts_group_id_receiver_id', 'group_id', 'settled_at', 'receiver_id', 'amount_cents'),
+        Index('ix_debts_settled_at_id', 'settled_at', 'id'),  # Settled rows waiting for the archiver
+        # Archived debts keep their id in debts_history, so SQLite must not hand it out again
+        {'sqlite_autoincrement': True},
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String(100))
     receiver = Column(String(100))
     receiver_id = Column(Integer, ForeignKey('users.id'), nullable=False)  # Creditor's User ID
-    amount = Column(Float, nullable=False)
+    amount_cents = Column(BigInteger, nullable=False)  # Integer cents, so sums are exact
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)  # Debtor's User ID
+    group_id = Column(Integer, ForeignKey('groups.id'), nullable=True)  # Group the debt was made in, if any
+    # Set when the debt is settled up; settled rows are moved to debts_history by the archiver
+    settled_at = Column(DateTime, nullable=True)
 
     # Relationships
     debtor_user = relationship("User", foreign_keys=[user_id], backref="debts_owed")
     creditor_user = relationship("User", foreign_keys=[receiver_id], backref="debts_owed_to")
 
-    def createDebt(db: Session, title: str, receiver: str, amount: float, user_id: int) -> 'Debt':
+    async def createDebt(db: AsyncSession, title: str, receiver: str, amount_cents: int, user_id: int,
+                         group_id: int = None) -> 'Debt':
         """Creates a new debt and saves it to the database."""
-        new_debt = Debt(title=title, receiver=receiver, amount=amount, user_id=user_id)
+        from models.user_balance import UserBalance
+
+        new_debt = Debt(title=title, receiver=receiver, amount_cents=amount_cents, user_id=user_id, group_id=group_id)
         db.add(new_debt)
-        db.commit()
-        db.refresh(new_debt)
+        await db.flush()
+        await UserBalance.applyDebtChanges(db, [(new_debt.user_id, new_debt.receiver_id, new_debt.amount_cents)])
+        await db.commit()
+        await db.refresh(new_debt)
         return new_debt
 
     @staticmethod
-    def findAllDebts(db: Session) -> list:
+    async def findAllDebts(db: AsyncSession) -> list:
         """Finds and returns all debts."""
-        return db.query(Debt).all()
+        return (await db.scalars(select(Debt))).all()
 
     @staticmethod
-    def findDebtById(db: Session, debt_id: int) -> 'Debt':
+    async def findDebtById(db: AsyncSession, debt_id: int) -> 'Debt':
         """Finds a debt by its ID."""
-        debt = db.query(Debt).filter(Debt.id == debt_id).first()
+        debt = await db.get(Debt, debt_id)
         if not debt:
             raise ValueError(f"Debt with ID {debt_id} does not exist")
         return debt
 
-    def deleteUserDebtById(db: Session, debt_id: int) -> None:
-        debt = db.query(Debt).filter(Debt.id == debt_id).first()
+    async def deleteUserDebtById(db: AsyncSession, debt_id: int) -> None:
+        from models.user_balance import UserBalance
+
+        debt = await db.get(Debt, debt_id)
         if not debt:
             raise ValueError(f"Debt with ID {debt_id} does not exist")
+        if debt.settled_at is not None:
+            raise ValueError(f"Debt with ID {debt_id} is already settled")
+
+        await UserBalance.applyDebtChanges(db, [(debt.user_id, debt.receiver_id, debt.amount_cents)], sign=-1)
+        await db.delete(debt)
+        await db.commit()
+
+    @staticmethod
+    async def settleDebts(db: AsyncSession, *criteria) -> List[Tuple[int, int, int]]:
+        """
+        Marks every open debt matching the criteria as settled and takes them
+        off both sides' balances. Returns the settled (debtor_id, creditor_id,
+        amount_cents) totals per pair. Does not commit.
+
+        Raises DebtsChanged when a concurrent transaction settled or added
+        matching debts in between, the caller should roll back and retry.
+        """
+        from models.user_balance import UserBalance
+
+        criteria = (*criteria, Debt.settled_at.is_(None))
+        pairs = (await db.execute(
+            select(Debt.user_id, Debt.receiver_id, func.sum(Debt.amount_cents), func.count(), func.max(Debt.id))
+            .where(*criteria).group_by(Debt.user_id, Debt.receiver_id).with_for_update()
+        )).all()
+        if not pairs:
+            return []
+
+        result = await db.execute(
+            update(Debt).where(*criteria, Debt.id <= max(pair[4] for pair in pairs))
+            .values(settled_at=datetime.now(timezone.utc).replace(tzinfo=None))
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != sum(pair[3] for pair in pairs):
+            raise DebtsChanged()
+
+        # int(): MySQL returns SUM over integers as DECIMAL
+        changes = [(debtor_id, creditor_id, int(amount_cents)) for debtor_id, creditor_id, amount_cents, _, _ in pairs]
+        await UserBalance.applyDebtChanges(db, changes, sign=-1)
+        return changes
+
 
-        db.delete(debt)
-        db.commit()
\ No newline at end of file
+class DebtsChanged(Exception):
+    """The debts being settled were changed by another transaction."""
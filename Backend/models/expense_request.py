@@ -1,7 +1,20 @@
-from pydantic import BaseModel
-from typing import List, Dict
+from pydantic import BaseModel, Field
+from typing import List, Dict, Optional
+
+# Expenses accepted by one POST /split-expenses/ call
+MAX_EXPENSES_PER_BATCH = 50_000
+
+class ExpensePayer(BaseModel):
+    user_id: int
+    amount: float = Field(ge=0, allow_inf_nan=False)
 
 class ExpenseRequest(BaseModel):
-    total_cost: float
-    payers: List[Dict[str, float]]  # List of {"user_id": int, "amount": float}
-    participants: List[int]  # List of user IDs who haven't paid
\ No newline at end of file
+    total_cost: float = Field(gt=0, allow_inf_nan=False)
+    payers: List[ExpensePayer]  # List of {"user_id": int, "amount": float}
+    participants: List[int]  # List of user IDs who haven't paid
+    # Share of the cost per user id, 1 for everyone left out; payers and participants all share the cost
+    weights: Optional[Dict[int, float]] = None
+
+class ExpenseBatchRequest(BaseModel):
+    expenses: List[ExpenseRequest] = Field(min_length=1, max_length=MAX_EXPENSES_PER_BATCH)
+    group_id: Optional[int] = None
@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, Table
+from typing import Iterable, Set, Tuple
+
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, Index, Table, delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import relationship
 from config.db_configuration import Base
 
@@ -7,7 +10,8 @@ user_group_association = Table(
     'user_group_association',
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
-    Column('group_id', Integer, ForeignKey('groups.id'), primary_key=True)
+    Column('group_id', Integer, ForeignKey('groups.id'), primary_key=True),
+    Index('ix_user_group_association_group_id_user_id', 'group_id', 'user_id'),  # Members of a group
 )
 
 class Group(Base):
@@ -15,4 +19,50 @@ class Group(Base):
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(255), nullable=False)
-    users = relationship('User', secondary=user_group_association, back_populates='groups')
\ No newline at end of file
+    users = relationship('User', secondary=user_group_association, back_populates='groups')
+
+    @staticmethod
+    async def addMembers(db: AsyncSession, group_id: int, user_ids: Iterable[int]) -> int:
+        """
+        Adds the users to the group with one INSERT ... SELECT that skips unknown
+        users and existing members. Returns how many were added. Does not commit.
+        """
+        from models.user import User
+
+        user_ids = set(user_ids)
+        if not user_ids:
+            return 0
+        statement = (
+            insert(user_group_association)
+            .from_select(["user_id", "group_id"], select(User.id, literal(group_id)).where(User.id.in_(user_ids)))
+            .prefix_with("OR IGNORE", dialect="sqlite")
+            .prefix_with("IGNORE", dialect="mysql")
+        )
+        return (await db.execute(statement)).rowcount
+
+    @staticmethod
+    async def removeMembers(db: AsyncSession, group_id: int, user_ids: Iterable[int]) -> int:
+        """Removes the users from the group with one DELETE. Returns how many were removed. Does not commit."""
+        user_ids = set(user_ids)
+        if not user_ids:
+            return 0
+        statement = delete(user_group_association).where(user_group_association.c.group_id == group_id,
+                                                         user_group_association.c.user_id.in_(user_ids))
+        return (await db.execute(statement)).rowcount
+
+    @staticmethod
+    async def countMembers(db: AsyncSession, group_id: int) -> int:
+        return await db.scalar(select(func.count()).select_from(user_group_association)
+                               .where(user_group_association.c.group_id == group_id))
+
+
+    @staticmethod
+    async def findMemberships(db: AsyncSession, user_ids: Iterable[int], group_ids: Iterable[int]) -> Set[Tuple[int, int]]:
+        """Returns the (user_id, group_id) pairs among the given users and groups that are memberships."""
+        user_ids, group_ids = set(user_ids), set(group_ids)
+        if not user_ids or not group_ids:
+            return set()
+        rows = await db.execute(select(user_group_association.c.user_id, user_group_association.c.group_id)
+                                .where(user_group_association.c.user_id.in_(user_ids),
+                                       user_group_association.c.group_id.in_(group_ids)))
+        return {(user_id, group_id) for user_id, group_id in rows}
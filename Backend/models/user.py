@@ -1,21 +1,43 @@
-from requests import Session
-from sqlalchemy import Column, Integer, String, func
+import os
+
+from sqlalchemy import Column, Integer, String, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import relationship
 
 from config.db_configuration import Base
 from models.debts import Debt
-from utils.auth import hash_password, verify_password
-
+from models.user_balance import UserBalance
+from utils.password_pool import password_pool
 
-from requests import Session
 from fastapi import Depends, HTTPException
-from config.db_configuration import get_db
+from config.db_configuration import has_read_replica, open_session
 from fastapi.security import OAuth2PasswordBearer
+from schemas.user_schema import Principal
 from utils.auth import decode_access_token
+from utils.cache import TTLCache
+from utils.username_index import username_index
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Verified token subject -> Principal, saves a users lookup on every authenticated request
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_MAX_SIZE", "10000")),
+    ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", "60")),
+)
+
+
+def username_prefix_upper_bound(prefix: str):
+    """The smallest string greater than every string starting with prefix, None if there is none."""
+    while prefix and ord(prefix[-1]) == 0x10FFFF:
+        prefix = prefix[:-1]
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else None
+
+
+def invalidate_cached_user(username: str) -> None:
+    """Must be called whenever a user row is created, changed or deleted."""
+    principal_cache.pop(username)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -28,58 +50,109 @@ class User(Base):
     groups = relationship('Group', secondary='user_group_association', back_populates='users')
 
     @staticmethod
-    def getUserByUsername(db: Session, username: str):
-        return db.query(User).filter(User.username == username).first()
+    async def getUserByUsername(db: AsyncSession, username: str):
+        return (await db.scalars(select(User).where(User.username == username))).first()
+
+    @staticmethod
+    async def getPrincipalByUsername(db: AsyncSession, username: str):
+        row = (await db.execute(
+            select(User.id, User.username, User.email).where(User.username == username)
+        )).first()
+        return Principal.model_validate(row) if row else None
 
     @staticmethod
-    def getUsernameById(db: Session, user_id: int):
-        user = User.getUserById(db, user_id)
+    async def getUsernameById(db: AsyncSession, user_id: int):
+        user = await User.getUserById(db, user_id)
         return user.username
 
     @staticmethod
-    def getUserById(db: Session, user_id: int):
-        return db.query(User).filter(User.id == user_id).first()
+    async def getUsernamesByIds(db: AsyncSession, user_ids) -> dict:
+        """Resolves many user ids to usernames with a single query."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        rows = await db.execute(select(User.id, User.username).where(User.id.in_(user_ids)))
+        return {user_id: username for user_id, username in rows}
 
     @staticmethod
-    def getAllUsernames(db: Session):
-        return [user.username for user in db.query(User).all()]
+    async def getUserIdsByUsernames(db: AsyncSession, usernames) -> dict:
+        """Resolves many usernames to user ids with a single query."""
+        usernames = list(usernames)
+        if not usernames:
+            return {}
+        rows = await db.execute(select(User.username, User.id).where(User.username.in_(usernames)))
+        return {username: user_id for username, user_id in rows}
 
     @staticmethod
-    def getSumOfUserDebts(db: Session) -> float:
-        total_debt = db.query(func.sum(Debt.amount)).scalar()
-        return total_debt if total_debt is not None else 0.0
+    async def getUserById(db: AsyncSession, user_id: int):
+        return await db.get(User, user_id)
 
     @staticmethod
-    def getAllUserDebts(db: Session):
-        results = (
-            db.query(User.username, func.sum(Debt.amount).label("total_debt"))
-            .join(Debt, Debt.user_id == User.id, isouter=True)
-            .group_by(User.id)
-            .all()
+    async def searchUsernames(db: AsyncSession, prefix: str, limit: int):
+        """Up to `limit` (id, username) pairs whose username starts with prefix, as a range scan on the username index."""
+        statement = select(User.id, User.username).where(User.username >= prefix)
+        upper_bound = username_prefix_upper_bound(prefix)
+        if upper_bound is not None:
+            statement = statement.where(User.username < upper_bound)
+        rows = await db.execute(statement.order_by(User.username).limit(limit))
+        return [tuple(row) for row in rows]
+
+    @staticmethod
+    async def getUsernameDirectory(db: AsyncSession, max_size: int):
+        """Every (id, username) pair, or None when there are more than max_size users."""
+        rows = (await db.execute(select(User.id, User.username).limit(max_size + 1))).all()
+        return None if len(rows) > max_size else [tuple(row) for row in rows]
+
+    @staticmethod
+    async def getSumOfUserDebts(db: AsyncSession) -> int:
+        """Everything owed by everyone, in cents."""
+        total_debt_cents = await db.scalar(select(func.sum(UserBalance.total_owed_cents)))
+        return int(total_debt_cents or 0)
+
+    @staticmethod
+    async def getAllUserDebts(db: AsyncSession):
+        results = await db.execute(
+            select(User.username, UserBalance.total_owed_cents.label("total_debt_cents"))
+            .join(UserBalance, UserBalance.user_id == User.id, isouter=True)
         )
 
-        return [{"username": username, "total_debt": total_debt or 0.0} for username, total_debt in results]
+        return [{"username": username, "total_debt_cents": total_debt_cents or 0}
+                for username, total_debt_cents in results]
 
     @staticmethod
-    def create_user(db: Session, username: str, email: str, password: str):
-        hashed_password = hash_password(password)
+    async def create_user(db: AsyncSession, username: str, email: str, password: str):
+        hashed_password = await password_pool.hash(password)
         new_user = User(username=username, email=email, password=hashed_password)
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.flush()
+        db.add(UserBalance(user_id=new_user.id, total_owed_cents=0, total_receivable_cents=0))
+        await db.commit()
+        invalidate_cached_user(username)
+        username_index.add(new_user.id, username)
         return new_user
 
     @staticmethod
-    def authenticate_user(db: Session, username: str, password: str):
-        user = db.query(User).filter(User.username == username).first()
-        if user and verify_password(password, user.password):
-            return user
-        return None
-
-
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+    async def authenticate_user(db: AsyncSession, username: str, password: str):
+        user = await User.getUserByUsername(db, username)
+        if not user:
+            return None
+
+        is_valid, new_hash = await password_pool.verify_and_update(password, user.password)
+        if not is_valid:
+            return None
+        if new_hash:
+            # The configured bcrypt cost changed since this hash was made
+            user.password = new_hash
+            await db.commit()
+        return user
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
     """
     Retrieve the currently authenticated user based on the JWT token.
+    Served from principal_cache when the subject was resolved recently,
+    otherwise looked up on the read replica. The lookup has a session of its
+    own, closed right away, so a write route never holds two connections.
     """
     try:
         payload = decode_access_token(token)
@@ -89,7 +162,15 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
     except Exception as e:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
 
-    user = User.getUserByUsername(db, username)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
\ No newline at end of file
+    principal = principal_cache.get(username)
+    if principal is None:
+        async with open_session(read_only=True) as db:
+            principal = await User.getPrincipalByUsername(db, username)
+        if not principal and has_read_replica():
+            # Registered moments ago, the replica may not have the row yet
+            async with open_session() as primary:
+                principal = await User.getPrincipalByUsername(primary, username)
+        if not principal:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal_cache.set(username, principal)
+    return principal
\ No newline at end of file
@@ -0,0 +1,134 @@
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import BigInteger, Column, Integer, ForeignKey, bindparam, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.db_configuration import Base
+from models.debts import Debt
+
+# (debtor_id, creditor_id, amount_cents)
+DebtChange = Tuple[int, int, int]
+
+
+class UserBalance(Base):
+    """
+    Per-user running totals of the debts table, maintained in the same
+    transaction as every Debt insert or delete. ledger_version counts those
+    changes and is the ETag of the user's debt endpoints.
+    """
+    __tablename__ = "user_balances"
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    total_owed_cents = Column(BigInteger, nullable=False, default=0, server_default="0")  # What the user owes others
+    total_receivable_cents = Column(BigInteger, nullable=False, default=0, server_default="0")  # What others owe the user
+    ledger_version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped on every debt change
+
+    @staticmethod
+    async def getUserBalance(db: AsyncSession, user_id: int) -> 'UserBalance':
+        balance = await db.get(UserBalance, user_id)
+        return balance if balance else UserBalance(user_id=user_id, total_owed_cents=0, total_receivable_cents=0,
+                                                   ledger_version=0)
+
+    @staticmethod
+    async def getLedgerVersion(db: AsyncSession, user_id: int) -> int:
+        """Primary key lookup that never touches the debts table."""
+        version = await db.scalar(select(UserBalance.ledger_version).where(UserBalance.user_id == user_id))
+        return version or 0
+
+    @staticmethod
+    async def applyDebtChanges(db: AsyncSession, changes: Iterable[DebtChange], sign: int = 1) -> None:
+        """
+        Adds (sign=1) or removes (sign=-1) debts from the balances of both
+        sides and bumps their ledger_version. Does not commit, the caller
+        commits together with the debts.
+        """
+        deltas: Dict[int, List[int]] = {}
+        for debtor_id, creditor_id, amount_cents in changes:
+            deltas.setdefault(debtor_id, [0, 0])[0] += sign * amount_cents
+            deltas.setdefault(creditor_id, [0, 0])[1] += sign * amount_cents
+        if not deltas:
+            return
+
+        existing = set(await db.scalars(
+            select(UserBalance.user_id).where(UserBalance.user_id.in_(list(deltas)))
+        ))
+        missing = [user_id for user_id in deltas if user_id not in existing]
+        if missing:
+            await db.execute(
+                UserBalance.__table__.insert(),
+                [{"user_id": user_id, "total_owed_cents": 0, "total_receivable_cents": 0} for user_id in missing]
+            )
+
+        table = UserBalance.__table__
+        await db.execute(
+            table.update()
+            .where(table.c.user_id == bindparam("b_user_id"))
+            .values(
+                total_owed_cents=table.c.total_owed_cents + bindparam("b_owed"),
+                total_receivable_cents=table.c.total_receivable_cents + bindparam("b_receivable"),
+                ledger_version=table.c.ledger_version + 1,
+            ),
+            [
+                {"b_user_id": user_id, "b_owed": owed, "b_receivable": receivable}
+                for user_id, (owed, receivable) in deltas.items()
+            ]
+        )
+
+    @staticmethod
+    async def computeFromDebts(db: AsyncSession) -> Dict[int, Tuple[int, int]]:
+        """Recomputes {user_id: (total_owed_cents, total_receivable_cents)} straight from the open debts."""
+        totals: Dict[int, List[int]] = {}
+        open_debts = Debt.settled_at.is_(None)
+        owed_rows = await db.execute(
+            select(Debt.user_id, func.sum(Debt.amount_cents)).where(open_debts).group_by(Debt.user_id))
+        for user_id, owed in owed_rows:
+            totals.setdefault(user_id, [0, 0])[0] = int(owed or 0)
+        receivable_rows = await db.execute(
+            select(Debt.receiver_id, func.sum(Debt.amount_cents)).where(open_debts).group_by(Debt.receiver_id))
+        for user_id, receivable in receivable_rows:
+            totals.setdefault(user_id, [0, 0])[1] = int(receivable or 0)
+        return {user_id: (owed, receivable) for user_id, (owed, receivable) in totals.items()}
+
+    @staticmethod
+    async def findInconsistencies(db: AsyncSession) -> List[dict]:
+        expected = await UserBalance.computeFromDebts(db)
+        stored = {
+            balance.user_id: (balance.total_owed_cents, balance.total_receivable_cents)
+            for balance in await db.scalars(select(UserBalance))
+        }
+
+        mismatches = []
+        for user_id in sorted(set(expected) | set(stored)):
+            # Cents add up exactly, any difference at all is drift
+            expected_totals = expected.get(user_id, (0, 0))
+            stored_totals = stored.get(user_id, (0, 0))
+            if expected_totals != stored_totals:
+                mismatches.append({"user_id": user_id, "expected": expected_totals, "stored": stored_totals})
+        return mismatches
+
+    @staticmethod
+    async def rebuild(db: AsyncSession) -> int:
+        """Replaces the whole table with totals recomputed from debts. Returns the number of rows written."""
+        from models.user import User
+
+        expected = await UserBalance.computeFromDebts(db)
+        # Versions only ever grow, so no ETag handed out before the rebuild matches afterwards
+        versions = dict((await db.execute(select(UserBalance.user_id, UserBalance.ledger_version))).all())
+        rows = [
+            {
+                "user_id": user_id,
+                "total_owed_cents": expected.get(user_id, (0, 0))[0],
+                "total_receivable_cents": expected.get(user_id, (0, 0))[1],
+                "ledger_version": versions.get(user_id, 0) + 1,
+            }
+            for user_id in await db.scalars(select(User.id))
+        ]
+        try:
+            await db.execute(delete(UserBalance))
+            if rows:
+                await db.execute(UserBalance.__table__.insert(), rows)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return len(rows)
@@ -1,52 +1,133 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from config.db_configuration import get_db
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.db_configuration import get_db, get_read_db, reads_from_replica
+from models.debt_history import DebtHistory
 from models.debts import Debt
-from sqlalchemy import func
-from pydantic import BaseModel
-from models.user import get_current_user, User
+from models.group import Group
+from models.user_balance import UserBalance
+from sqlalchemy import and_, or_, select
+from models.user import get_current_user
+from schemas import MessageSchema, PaginatedSchema
+from schemas.debt_import import DebtImportReport
+from schemas.debt_schema import (DebtCreateRequest, DebtCreatedSchema, DebtHistorySchema, DebtSchema, SettleUpRequest,
+                                 SettledSchema)
 from schemas.debts_summary import DebtSummary
+from schemas.user_schema import Principal
+from services.debt_export_service import export_csv, export_ndjson
+from services.debt_import_service import import_debts
+from services.debt_lifecycle_service import settle_debts
+from services.ledger_event_service import publish_debt_changes
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate_by_id
+from utils.etag import etag_matches, ledger_etag, not_modified, set_etag
+from utils.money import from_cents
+from utils.instrumentation import InstrumentedRoute
 
-router = APIRouter()
-
-class DebtCreateRequest(BaseModel):
-    title: str
-    receiver: str
-    receiver_id: int
-    amount: float
-    user_id: int
+router = APIRouter(route_class=InstrumentedRoute)
 
-@router.get("/debts", tags=["Debts"])
-def get_all_debts(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.get("/debts", response_model=PaginatedSchema[DebtSchema], tags=["Debts"])
+async def get_all_debts(request: Request, response: Response,
+                  cursor: Optional[str] = None,
+                  limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                  include_total: bool = False,
+                  db: AsyncSession = Depends(get_read_db),
+                  current_user: Principal = Depends(get_current_user)):
     user_id = current_user.id
-    user_debts = db.query(Debt).filter(Debt.user_id == user_id).all()
-    return {"debts": user_debts}
+    # Read before the page, so a concurrent change can only make the ETag older than the body, never newer
+    etag = ledger_etag(user_id, await UserBalance.getLedgerVersion(db, user_id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    # Only the columns DebtSchema needs, no ORM objects
+    statement = (select(*(getattr(Debt, field) for field in DebtSchema.model_fields))
+                 .where(Debt.user_id == user_id, Debt.settled_at.is_(None)))
+    return await paginate_by_id(db, statement, Debt.id, cursor, limit, include_total)
 
-@router.post("/debts", tags=["Debts"])
-def create_debt(request: DebtCreateRequest, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    new_debt = Debt(title=request.title, receiver=request.receiver, amount=request.amount, user_id=request.user_id, receiver_id=request.receiver_id)
+@router.post("/debts", response_model=DebtCreatedSchema, tags=["Debts"])
+async def create_debt(request: DebtCreateRequest, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    if request.group_id is not None:
+        memberships = await Group.findMemberships(db, {request.user_id, request.receiver_id}, {request.group_id})
+        if len(memberships) != len({request.user_id, request.receiver_id}):
+            raise HTTPException(status_code=400, detail="Debtor and receiver must both be members of the group.")
+    change = (request.user_id, request.receiver_id, request.amount_cents)
+    new_debt = Debt(title=request.title, receiver=request.receiver, amount_cents=request.amount_cents,
+                    user_id=request.user_id, receiver_id=request.receiver_id, group_id=request.group_id)
     db.add(new_debt)
-    db.commit()
-    db.refresh(new_debt)
-    return {"message": "Debt created", "debt": new_debt}
+    await UserBalance.applyDebtChanges(db, [change])
+    await db.commit()
+    await publish_debt_changes("debt_created", [change], debt_id=new_debt.id)
+    return DebtCreatedSchema(message="Debt created", debt=DebtSchema(
+        id=new_debt.id, amount_cents=new_debt.amount_cents, **request.model_dump(exclude={"amount"})))
+
+@router.post("/debts/import", response_model=DebtImportReport, tags=["Debts"], openapi_extra={
+    "requestBody": {"required": True, "content": {"text/csv": {}, "application/x-ndjson": {}}}
+})
+async def import_debts_stream(request: Request, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    """Bulk import from a streamed CSV (title,receiver,amount[,user_id]) or NDJSON body."""
+    return await import_debts(db, request.stream(), request.headers.get("content-type", ""), current_user.id)
 
-@router.delete("/debts/{debt_id}", tags=["Debts"])
-def delete_debt(debt_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    debt = db.query(Debt).filter(Debt.id == debt_id).first()
+@router.get("/debts/export", tags=["Debts"], response_class=StreamingResponse)
+async def export_debts(request: Request, export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+                       current_user: Principal = Depends(get_current_user)):
+    """Streams every debt the current user owes or is owed, as NDJSON or CSV, from the read replica."""
+    read_only = reads_from_replica(request)
+    if export_format == "csv":
+        return StreamingResponse(export_csv(current_user.id, read_only), media_type="text/csv",
+                                 headers={"Content-Disposition": 'attachment; filename="debts.csv"'})
+    return StreamingResponse(export_ndjson(current_user.id, read_only), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": 'attachment; filename="debts.ndjson"'})
+
+@router.delete("/debts/{debt_id}", response_model=MessageSchema, tags=["Debts"])
+async def delete_debt(debt_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    debt = await db.get(Debt, debt_id)
     if not debt:
         raise HTTPException(status_code=404, detail="Debt not found")
-    db.delete(debt)
-    db.commit()
-    return {"message": "Debt deleted"}
+    if debt.settled_at is not None:
+        raise HTTPException(status_code=409, detail="Debt is already settled")
+    change = (debt.user_id, debt.receiver_id, debt.amount_cents)
+    await UserBalance.applyDebtChanges(db, [change], sign=-1)
+    await db.delete(debt)
+    await db.commit()
+    await publish_debt_changes("debt_deleted", [change], sign=-1, debt_id=debt_id)
+    return MessageSchema(message="Debt deleted")
 
-@router.get("/my_debts/sum", tags=["Debts"])  # Nowa trasa do sumowania długów
-def get_sum_of_my_debts(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.get("/my_debts/sum", response_model=DebtSummary, tags=["Debts"])  # Nowa trasa do sumowania długów
+async def get_sum_of_my_debts(request: Request, response: Response,
+                              db: AsyncSession = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
     user_id = current_user.id
-    user_debts = db.query(Debt).filter(Debt.user_id == user_id).all()
-    total_debt = sum(debt.amount for debt in user_debts)
+    balance = await UserBalance.getUserBalance(db, user_id)
+    etag = ledger_etag(user_id, balance.ledger_version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
 
     return DebtSummary(
         user_id=user_id,
-        total_debt=total_debt or 0.0
+        total_debt=from_cents(balance.total_owed_cents or 0)
     )
 
+@router.post("/debts/settle-up", response_model=SettledSchema, tags=["Debts"])
+async def settle_up(request: SettleUpRequest, db: AsyncSession = Depends(get_db),
+                    current_user: Principal = Depends(get_current_user)):
+    """Settles every open debt between the current user and another user, in both directions."""
+    me, other = current_user.id, request.user_id
+    settled = await settle_debts(db, or_(and_(Debt.user_id == me, Debt.receiver_id == other),
+                                         and_(Debt.user_id == other, Debt.receiver_id == me)))
+    return SettledSchema(message=f"Settled {len(settled)} debt pair(s)", settled=settled)
+
+@router.get("/debts/history", response_model=PaginatedSchema[DebtHistorySchema], tags=["Debts"])
+async def get_debt_history(cursor: Optional[str] = None,
+                           limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                           side: Literal["owed", "receivable"] = "owed",
+                           db: AsyncSession = Depends(get_read_db),
+                           current_user: Principal = Depends(get_current_user)):
+    """
+    Settled and archived debts the current user owed (or, with side=receivable,
+    was owed). Debts appear here once the archiver has moved them.
+    """
+    user_column = DebtHistory.user_id if side == "owed" else DebtHistory.receiver_id
+    statement = (select(*(getattr(DebtHistory, field) for field in DebtHistorySchema.model_fields))
+                 .where(user_column == current_user.id))
+    return await paginate_by_id(db, statement, DebtHistory.id, cursor, limit)
@@ -0,0 +1,56 @@
+import asyncio
+import json
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+
+from models.user import get_current_user
+from schemas.user_schema import Principal
+from utils.event_hub import RESYNC, ledger_hub
+
+# A comment line is sent after this many idle seconds, so proxies keep the stream open
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+
+router = APIRouter()
+
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+
+async def get_subscriber(header_token: Optional[str] = Depends(optional_oauth2_scheme),
+                         token: Optional[str] = Query(None, description="JWT, for EventSource which cannot set headers")
+                         ) -> Principal:
+    return await get_current_user(header_token or token or "")
+
+
+async def ledger_stream(queue: asyncio.Queue, heartbeat: float):
+    yield b"retry: 5000\n\n"
+    while True:
+        try:
+            payload = await asyncio.wait_for(queue.get(), heartbeat)
+        except asyncio.TimeoutError:
+            yield b": keepalive\n\n"
+            continue
+        if payload is RESYNC:
+            yield b"event: resync\ndata: {}\n\n"
+        else:
+            yield b"event: ledger\ndata: " + json.dumps(payload, separators=(",", ":")).encode() + b"\n\n"
+
+
+@router.get("/events/ledger", tags=["Events"], response_class=StreamingResponse)
+async def ledger_events(current_user: Principal = Depends(get_subscriber)):
+    """
+    Server-Sent Events stream of the current user's ledger changes: a `ledger`
+    event with a LedgerDelta whenever a debt they owe or are owed is created,
+    deleted or split, and `resync` when events were dropped and the client
+    should reload instead.
+    """
+    async def stream():
+        async with ledger_hub.subscribe(current_user.id) as queue:
+            async for frame in ledger_stream(queue, EVENT_HEARTBEAT_SECONDS):
+                yield frame
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
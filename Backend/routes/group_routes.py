@@ -1,55 +1,147 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from config.db_configuration import get_db
-from models.expense_request import ExpenseRequest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from config.db_configuration import get_db, get_read_db
+from models.expense_request import ExpenseBatchRequest
 from models.user import User, get_current_user
-from models.group import Group
+from models.group import Group, user_group_association
 from models.debts import Debt
+from models.user_balance import UserBalance
 from typing import List, Dict
 
 from models.user_ids import UserIds
 from schemas.debt_response import DebtResponse
+from schemas.debt_schema import SettledSchema
 from schemas.debt_split_request import DebtSplitRequest
+from schemas.expense_settlement import ExpenseSettlement
+from schemas.group_schema import GroupBalances, GroupCreatedSchema, GroupMembershipResponse, GroupSummary
+from schemas.settle_plan import SettlePlan, SettleTransfer
+from schemas.user_schema import Principal
+from services.debt_lifecycle_service import settle_debts
+from services.group_balance_service import get_group_balances
+from services.ledger_event_service import publish_debt_changes
+from utils.instrumentation import InstrumentedRoute
+from utils.money import from_cents, to_cents
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
-@router.post("/groups", tags=["Groups"])
-def create_group(name: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.post("/groups", response_model=GroupCreatedSchema, tags=["Groups"])
+async def create_group(name: str, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """
     Create a new group and add only the currently logged-in user to it.
     """
     # Check if a group with the same name exists (optional validation)
-    existing_group = db.query(Group).filter(Group.name == name).first()
+    existing_group = (await db.scalars(select(Group.id).where(Group.name == name))).first()
     if existing_group:
         raise HTTPException(status_code=400, detail="A group with this name already exists.")
 
     # Create the group and add the current user as a member
     group = Group(name=name)
-    group.users.append(current_user)  # Add the logged-in user
     db.add(group)
-    db.commit()
-    db.refresh(group)
-    return {"message": "Group created", "group": group}
+    await db.flush()
+    # Add the logged-in user
+    await db.execute(insert(user_group_association).values(user_id=current_user.id, group_id=group.id))
+    await db.commit()
+    return GroupCreatedSchema(message="Group created", group=GroupSummary(id=group.id, name=name))
 
 
-@router.post("/groups/{group_id}/add_users", tags=["Groups"])
-def add_users_to_group(group_id: int,
-                       user_ids: UserIds,  # Use the Pydantic model
-                       db: Session = Depends(get_db)):
-    group = db.query(Group).filter(Group.id == group_id).first()
-    if not group:
+@router.post("/groups/{group_id}/add_users", response_model=GroupMembershipResponse, tags=["Groups"])
+async def add_users_to_group(group_id: int,
+                             user_ids: UserIds,  # Use the Pydantic model
+                             db: AsyncSession = Depends(get_db),
+                             current_user: Principal = Depends(get_current_user)):
+    """
+    Add users to a group. Users that are already members or do not exist are
+    skipped, so the call can safely be repeated.
+    """
+    group = await _get_group_summary(db, group_id)
+    added = await Group.addMembers(db, group_id, user_ids.user_ids)
+    member_count = await Group.countMembers(db, group_id)
+    await db.commit()
+    return GroupMembershipResponse(message="Users added to group", group=group, added=added, member_count=member_count)
+
+
+@router.post("/groups/{group_id}/remove_users", response_model=GroupMembershipResponse, tags=["Groups"])
+async def remove_users_from_group(group_id: int, user_ids: UserIds, db: AsyncSession = Depends(get_db),
+                                  current_user: Principal = Depends(get_current_user)):
+    """
+    Remove users from a group. Users that are not members are skipped.
+    """
+    group = await _get_group_summary(db, group_id)
+    removed = await Group.removeMembers(db, group_id, user_ids.user_ids)
+    member_count = await Group.countMembers(db, group_id)
+    await db.commit()
+    return GroupMembershipResponse(message="Users removed from group", group=group, removed=removed,
+                                   member_count=member_count)
+
+
+async def _get_group_summary(db: AsyncSession, group_id: int) -> GroupSummary:
+    row = (await db.execute(select(Group.id, Group.name).where(Group.id == group_id))).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Group not found.")
+    return GroupSummary(id=row.id, name=row.name)
+
+
+@router.get("/groups/{group_id}/balances", response_model=GroupBalances, tags=["Groups"])
+async def get_group_balances_view(group_id: int, db: AsyncSession = Depends(get_read_db),
+                                  current_user: Principal = Depends(get_current_user)):
+    """
+    Every member's total owed, total receivable and net balance over the
+    debts made in the group, from one aggregated query. Only members may
+    see them.
+    """
+    if not await Group.findMemberships(db, {current_user.id}, {group_id}):
+        raise HTTPException(status_code=404, detail="Group not found.")
+    members = await get_group_balances(db, group_id)
+    return GroupBalances(group_id=group_id, members=members)
+
+
+@router.post("/groups/{group_id}/settle-up", response_model=SettledSchema, tags=["Groups"])
+async def settle_up_group(group_id: int, db: AsyncSession = Depends(get_db),
+                          current_user: Principal = Depends(get_current_user)):
+    """
+    Settles every open debt made in the group. Only members may do this.
+    """
+    if not await Group.findMemberships(db, {current_user.id}, {group_id}):
+        raise HTTPException(status_code=404, detail="Group not found.")
+    settled = await settle_debts(db, Debt.group_id == group_id)
+    return SettledSchema(message=f"Settled {len(settled)} debt pair(s)", settled=settled)
+
+
+@router.get("/groups/{group_id}/settle-plan", response_model=SettlePlan, tags=["Groups"])
+async def get_settle_plan(group_id: int, db: AsyncSession = Depends(get_read_db),
+                          current_user: Principal = Depends(get_current_user)):
+    """
+    Net all open debts made in the group and return the shortest list of
+    transfers that settles everyone up, what its settle-up would settle.
+    Only members may see it.
+    """
+    if not await Group.findMemberships(db, {current_user.id}, {group_id}):
         raise HTTPException(status_code=404, detail="Group not found.")
 
-    users = db.query(User).filter(User.id.in_(user_ids.user_ids)).all()
-    group.users.extend(users)
-    db.commit()
-    return {"message": "Users added to group", "group": group}
+    # numpy is only needed here, so it is loaded by the first settle-plan request instead of at startup
+    from services import settlement_service
+    from utils.settlement import build_settle_plan
+
+    debts = await settlement_service.load_open_debts(db, group_id)
+    transfers = build_settle_plan(debts)
+
+    return SettlePlan(
+        group_id=group_id,
+        debts_considered=len(debts),
+        transfers=[
+            SettleTransfer(debtor=debtor_id, creditor=creditor_id, amount=from_cents(amount_cents))
+            for debtor_id, creditor_id, amount_cents in transfers
+        ]
+    )
 
 
 @router.post("/split-debts/", response_model=List[DebtResponse])
-def split_debts(request: DebtSplitRequest, db: Session = Depends(get_db)):
-    costs = request.costs
-    payments = request.payments
+async def split_debts(request: DebtSplitRequest, db: AsyncSession = Depends(get_db)):
+    # Everything below is integer cents, so sums compare exactly and settling leaves no remainder
+    costs = to_cents(request.costs)
+    payments = {user_id: to_cents(paid) for user_id, paid in request.payments.items()}
 
     num_users = len(payments)
     if num_users == 0:
@@ -60,15 +152,16 @@ def split_debts(request: DebtSplitRequest, db: Session = Depends(get_db)):
     if total_payments != costs:
         raise HTTPException(
             status_code=400,
-            detail=f"Sum of payments ({total_payments}) must be equal to total costs ({costs})."
+            detail=f"Sum of payments ({from_cents(total_payments)}) must be equal to total costs ({from_cents(costs)})."
         )
 
-    fair_share = costs / num_users
+    # Fair shares differ by at most a cent; the first users in the request carry the leftover cents
+    fair_share, leftover = divmod(costs, num_users)
 
     # Compute net balances
     balances = {}
-    for user_id, paid in payments.items():
-        balances[user_id] = round(paid - fair_share, 2)  # Rounded to 2 decimal places
+    for position, (user_id, paid) in enumerate(payments.items()):
+        balances[user_id] = paid - fair_share - (1 if position < leftover else 0)
 
     # Separate into creditors and debtors
     creditors = []
@@ -84,7 +177,8 @@ def split_debts(request: DebtSplitRequest, db: Session = Depends(get_db)):
     creditors.sort(key=lambda x: x["balance"], reverse=True)  # Largest creditor first
     debtors.sort(key=lambda x: x["balance"], reverse=True)  # Largest debtor first
 
-    debts_response = []
+    # Settle everything in memory first, the database is touched only afterwards
+    settlements = []
 
     i = 0  # Index for debtors
     j = 0  # Index for creditors
@@ -94,25 +188,7 @@ def split_debts(request: DebtSplitRequest, db: Session = Depends(get_db)):
         creditor = creditors[j]
 
         debt_amount = min(debtor["balance"], creditor["balance"])
-
-        # Create Debt record
-        debt_record = Debt(
-            title=f"Debt from User {User.getUsernameById(db, debtor['user_id'])} to User {User.getUsernameById(db, creditor['user_id'])}",
-            receiver=User.getUsernameById(db, creditor['user_id']),
-            receiver_id=creditor['user_id'],
-            amount=debt_amount,
-            user_id=debtor['user_id']
-        )
-        db.add(debt_record)
-        db.commit()
-        db.refresh(debt_record)
-
-        # Append to response
-        debts_response.append(DebtResponse(
-            debtor=debtor["user_id"],
-            creditor=creditor["user_id"],
-            amount=debt_amount
-        ))
+        settlements.append((debtor["user_id"], creditor["user_id"], debt_amount))
 
         # Update balances
         debtors[i]["balance"] -= debt_amount
@@ -124,4 +200,95 @@ def split_debts(request: DebtSplitRequest, db: Session = Depends(get_db)):
         if creditors[j]["balance"] == 0:
             j += 1
 
-    return debts_response
\ No newline at end of file
+    if not settlements:
+        return []
+
+    # Resolve every username with a single IN (...) query
+    usernames = await User.getUsernamesByIds(db, payments.keys())
+    missing = [user_id for user_id in payments if user_id not in usernames]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Users not found: {missing}")
+    if request.group_id is not None:
+        memberships = await Group.findMemberships(db, payments.keys(), {request.group_id})
+        if len(memberships) != len(payments):
+            raise HTTPException(status_code=400, detail="Every user must be a member of the group.")
+
+    debt_rows = [
+        {
+            "title": f"Debt from User {usernames[debtor_id]} to User {usernames[creditor_id]}",
+            "receiver": usernames[creditor_id],
+            "receiver_id": creditor_id,
+            "amount_cents": amount_cents,
+            "user_id": debtor_id,
+            "group_id": request.group_id,
+        }
+        for debtor_id, creditor_id, amount_cents in settlements
+    ]
+
+    # One bulk insert, committed as a single all-or-nothing transaction
+    try:
+        await db.execute(insert(Debt), debt_rows)
+        await UserBalance.applyDebtChanges(db, settlements)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    await publish_debt_changes("debts_split", settlements)
+
+    return [
+        DebtResponse(debtor=debtor_id, creditor=creditor_id, amount=from_cents(amount_cents))
+        for debtor_id, creditor_id, amount_cents in settlements
+    ]
+
+
+@router.post("/split-expenses/", response_model=ExpenseSettlement, tags=["Groups"])
+async def split_expenses(request: ExpenseBatchRequest, db: AsyncSession = Depends(get_db),
+                         current_user: Principal = Depends(get_current_user)):
+    """
+    Settle a batch of expenses, each with any number of payers and optional
+    per-user weights, with the fewest debts that leave everyone's net balance
+    as if every expense had been split on its own.
+    """
+    # numpy is only needed here, so it is loaded by the first request instead of at startup
+    from services.expense_service import InvalidExpense, settle_expenses
+
+    try:
+        user_ids, transfers = await run_in_threadpool(settle_expenses, request.expenses)
+    except InvalidExpense as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    usernames = await User.getUsernamesByIds(db, user_ids)
+    missing = [user_id for user_id in user_ids if user_id not in usernames]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Users not found: {missing}")
+    if request.group_id is not None:
+        memberships = await Group.findMemberships(db, user_ids, {request.group_id})
+        if len(memberships) != len(user_ids):
+            raise HTTPException(status_code=400, detail="Every user must be a member of the group.")
+
+    if transfers:
+        try:
+            await db.execute(insert(Debt), [
+                {
+                    "title": f"Debt from User {usernames[debtor_id]} to User {usernames[creditor_id]}",
+                    "receiver": usernames[creditor_id],
+                    "receiver_id": creditor_id,
+                    "amount_cents": amount_cents,
+                    "user_id": debtor_id,
+                    "group_id": request.group_id,
+                }
+                for debtor_id, creditor_id, amount_cents in transfers
+            ])
+            await UserBalance.applyDebtChanges(db, transfers)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        await publish_debt_changes("debts_split", transfers)
+
+    return ExpenseSettlement(
+        expenses=len(request.expenses),
+        participants=len(user_ids),
+        debts=[DebtResponse(debtor=debtor_id, creditor=creditor_id, amount=from_cents(amount_cents))
+               for debtor_id, creditor_id, amount_cents in transfers],
+    )
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from utils.metrics import registry
+
+router = APIRouter()
+
+@router.get("/metrics", tags=["Monitoring"], response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from utils.auth import create_access_token, verify_token
-from config.db_configuration import get_db
+from config.db_configuration import get_db, get_read_db
 from models.user import get_current_user, User
 from pydantic import BaseModel
+from schemas import MessageSchema, PaginatedSchema
+from schemas.user_schema import Principal, RegisteredSchema, TokenSchema, UsernameSchema
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate_by_id
+from utils.instrumentation import InstrumentedRoute
+from utils.username_index import username_index
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
 class LoginRequest(BaseModel):
     username: str
@@ -16,28 +24,43 @@ class RegisterRequest(BaseModel):
     email: str
     password: str
 
-@router.post("/register", tags=["Users"])
-def register_user(request: RegisterRequest, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == request.email).first():
+@router.post("/register", response_model=RegisteredSchema, tags=["Users"])
+async def register_user(request: RegisterRequest, db: AsyncSession = Depends(get_db)):
+    if (await db.scalars(select(User.id).where(User.email == request.email))).first():
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = User.create_user(db, request.username, request.email, request.password)
-    return {"message": "User registered", "user": user.username}
+    user = await User.create_user(db, request.username, request.email, request.password)
+    return RegisteredSchema(message="User registered", user=user.username)
 
-@router.post("/login", tags=["Users"])
-def login(request: LoginRequest, db: Session = Depends(get_db)):
-    user = User.authenticate_user(db, request.username, request.password)
+@router.post("/login", response_model=TokenSchema, tags=["Users"])
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
+    user = await User.authenticate_user(db, request.username, request.password)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     access_token = create_access_token(data={"sub": user.username})
-    return {"access_token": access_token, "token_type": "bearer"}
+    return TokenSchema(access_token=access_token, token_type="bearer")
 
-@router.get("/verifyToken/{token}", tags=["Users"])
+@router.get("/verifyToken/{token}", response_model=MessageSchema, tags=["Users"])
 def verify_token_endpoint(token: str):
     verify_token(token)
-    return {"message": "Token is valid"}
+    return MessageSchema(message="Token is valid")
+
+@router.get("/users/usernames", response_model=PaginatedSchema[UsernameSchema], tags=["Users"])
+async def get_all_usernames(cursor: Optional[str] = None,
+                      limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                      include_total: bool = False,
+                      db: AsyncSession = Depends(get_read_db),
+                      current_user: Principal = Depends(get_current_user)):
+    statement = select(User.id, User.username)
+    return await paginate_by_id(db, statement, User.id, cursor, limit, include_total)
 
-@router.get("/users/usernames", tags=["Users"])
-def get_all_usernames(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    users = db.query(User).all()
-    user_data = [{"id": user.id, "username": user.username} for user in users]
-    return {"users": user_data}
\ No newline at end of file
+@router.get("/users/search", response_model=List[UsernameSchema], tags=["Users"])
+async def search_usernames(prefix: str = Query(min_length=1, max_length=255),
+                           limit: int = Query(10, ge=1, le=50),
+                           db: AsyncSession = Depends(get_read_db),
+                           current_user: Principal = Depends(get_current_user)):
+    """Usernames starting with prefix, for autocomplete. Served from memory once the username index is loaded."""
+    if username_index.ready:
+        matches = username_index.search(prefix, limit)
+    else:
+        matches = await User.searchUsernames(db, prefix, limit)
+    return [{"id": user_id, "username": username} for user_id, username in matches]
@@ -1,4 +1,4 @@
-from typing import Generic, Sequence, TypeVar
+from typing import Generic, Optional, Sequence, TypeVar
 
 from pydantic import AliasGenerator, BaseModel, ConfigDict
 from pydantic.alias_generators import to_camel
@@ -17,8 +17,13 @@ class BaseSchema(BaseModel):
     )
 
 
+class MessageSchema(BaseSchema):
+    message: str
+
+
 class PaginatedSchema(BaseSchema, Generic[PaginatedSchemaType]):
     docs: Sequence[PaginatedSchemaType]
-    total_docs: int
-    total_pages: int
-    has_next_page: bool
\ No newline at end of file
+    total_docs: Optional[int] = None
+    total_pages: Optional[int] = None
+    has_next_page: bool
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,12 @@
+from typing import List
+from schemas import BaseSchema
+
+class DebtImportError(BaseSchema):
+    line: int
+    error: str
+
+class DebtImportReport(BaseSchema):
+    imported: int
+    failed: int
+    errors: List[DebtImportError]
+    errors_truncated: bool
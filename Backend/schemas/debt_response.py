@@ -1,10 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import Field
+from schemas import BaseSchema
 
-class DebtResponse(BaseModel):
-    debtor: int = Field(..., example=3)
-    creditor: int = Field(..., example=1)
-    amount: float = Field(..., example=50.0)
-
-    model_config = {
-        "orm_mode": False  # Explicitly disable ORM mode
-    }
\ No newline at end of file
+class DebtResponse(BaseSchema):
+    debtor: int = Field(..., examples=[3])
+    creditor: int = Field(..., examples=[1])
+    amount: float = Field(..., examples=[50.0])
@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, FiniteFloat, computed_field
+from schemas import BaseSchema, MessageSchema
+from schemas.debt_response import DebtResponse
+from utils.money import from_cents, to_cents
+
+class DebtCreateRequest(BaseModel):
+    title: str
+    receiver: str
+    receiver_id: int
+    amount: FiniteFloat
+    user_id: int
+    group_id: Optional[int] = None
+
+    @property
+    def amount_cents(self) -> int:
+        return to_cents(self.amount)
+
+class DebtSchema(BaseSchema):
+    id: int
+    title: Optional[str] = None
+    receiver: Optional[str] = None
+    receiver_id: int
+    amount_cents: int
+    user_id: int
+    group_id: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def amount(self) -> float:
+        return from_cents(self.amount_cents)
+
+
+class DebtCreatedSchema(MessageSchema):
+    debt: DebtSchema
+
+
+class DebtHistorySchema(DebtSchema):
+    settled_at: datetime
+    archived_at: datetime
+
+
+class SettleUpRequest(BaseModel):
+    user_id: int  # The other side; every open debt between them and the current user is settled
+
+
+class SettledSchema(MessageSchema):
+    # Settled totals per (debtor, creditor) pair
+    settled: List[DebtResponse]
@@ -1,7 +1,8 @@
-from typing import Dict, List
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+from pydantic import BaseModel, FiniteFloat
 from models.debts import Debt
 
 class DebtSplitRequest(BaseModel):
-    costs: float
-    payments: Dict[int, float]
+    costs: FiniteFloat
+    payments: Dict[int, FiniteFloat]
+    group_id: Optional[int] = None
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
+from schemas import BaseSchema
 
-class DebtSummary(BaseModel):
+class DebtSummary(BaseSchema):
     user_id: int
     total_debt: float
@@ -0,0 +1,11 @@
+from typing import List
+
+from schemas import BaseSchema
+from schemas.debt_response import DebtResponse
+
+
+class ExpenseSettlement(BaseSchema):
+    """The debts that settle a whole batch of expenses at once."""
+    expenses: int
+    participants: int
+    debts: List[DebtResponse]
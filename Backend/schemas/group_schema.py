@@ -0,0 +1,26 @@
+from typing import List
+from schemas import BaseSchema, MessageSchema
+
+class GroupSummary(BaseSchema):
+    id: int
+    name: str
+
+class GroupCreatedSchema(MessageSchema):
+    group: GroupSummary
+
+class GroupMembershipResponse(MessageSchema):
+    group: GroupSummary
+    added: int = 0
+    removed: int = 0
+    member_count: int
+
+class GroupMemberBalance(BaseSchema):
+    user_id: int
+    username: str
+    total_owed: float
+    total_receivable: float
+    net_balance: float
+
+class GroupBalances(BaseSchema):
+    group_id: int
+    members: List[GroupMemberBalance]
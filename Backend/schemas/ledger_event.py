@@ -0,0 +1,12 @@
+from typing import Literal, Optional
+
+from schemas import BaseSchema
+
+
+class LedgerDelta(BaseSchema):
+    """What changed in one user's ledger, pushed on /events/ledger instead of being polled for."""
+    reason: Literal["debt_created", "debt_deleted", "debts_split", "debts_imported", "debts_settled"]
+    debt_id: Optional[int] = None
+    debts: int
+    owed_delta: float
+    receivable_delta: float
@@ -0,0 +1,13 @@
+from typing import List
+from pydantic import Field
+from schemas import BaseSchema
+
+class SettleTransfer(BaseSchema):
+    debtor: int = Field(..., examples=[3])
+    creditor: int = Field(..., examples=[1])
+    amount: float = Field(..., examples=[50.0])
+
+class SettlePlan(BaseSchema):
+    group_id: int
+    debts_considered: int
+    transfers: List[SettleTransfer]
@@ -1,6 +1,6 @@
 from fastapi.security import HTTPBasicCredentials
 from pydantic import BaseModel, ConfigDict
-from schemas import BaseSchema
+from schemas import BaseSchema, MessageSchema
 
 class UserSignUpSchema(BaseSchema, HTTPBasicCredentials):
     username: str
@@ -38,4 +38,27 @@ class UserSchema(BaseSchema):
                 "email": "email",
             }
         },
-    )
\ No newline at end of file
+    )
+
+class Principal(BaseSchema):
+    """The authenticated user as seen by the routes, without the password hash."""
+    id: int
+    username: str
+    email: str
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+class UsernameSchema(BaseSchema):
+    id: int
+    username: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RegisteredSchema(MessageSchema):
+    user: str
+
+class TokenSchema(BaseModel):
+    """OAuth2 token response; plain BaseModel so the field names stay snake_case as the spec requires."""
+    access_token: str
+    token_type: str
@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from config import db_configuration
+from config.db_configuration import DATABASE_ASYNC
+from models.debts import Debt
+from utils.money import from_cents
+
+# Rows fetched from the server-side cursor and written to the response at a time
+DEBT_EXPORT_BATCH_SIZE = int(os.getenv("DEBT_EXPORT_BATCH_SIZE", "1000"))
+
+# Same field names as the import, so an export can be imported again
+EXPORT_FIELDS = ("id", "title", "receiver", "receiver_id", "amount", "user_id", "group_id")
+# The import takes currency units, the column holds cents
+AMOUNT_INDEX = EXPORT_FIELDS.index("amount")
+
+
+def user_debts_statements(user_id: int) -> list:
+    """
+    Every open debt the user is part of, projected to the exported columns: first
+    the ones they owe, then the ones owed to them. Two statements instead of
+    an OR so each follows its index and rows stream without a sort.
+    """
+    columns = [Debt.amount_cents if field == "amount" else getattr(Debt, field) for field in EXPORT_FIELDS]
+    return [
+        select(*columns).where(Debt.user_id == user_id, Debt.settled_at.is_(None)).order_by(Debt.id),
+        select(*columns).where(Debt.receiver_id == user_id, Debt.user_id != user_id, Debt.settled_at.is_(None)),
+    ]
+
+
+async def stream_rows(statements, read_only: bool = False) -> AsyncIterator[Sequence[Row]]:
+    """
+    Runs the statements one after another on a server-side cursor and yields
+    their rows DEBT_EXPORT_BATCH_SIZE at a time. Uses its own session because
+    a StreamingResponse outlives the request's get_db session; read_only puts
+    it on the read replica.
+    """
+    statements = [statement.execution_options(yield_per=DEBT_EXPORT_BATCH_SIZE) for statement in statements]
+    role = db_configuration.reader if read_only else db_configuration.writer
+    if DATABASE_ASYNC:
+        async with role.get_async_session_local()() as session:
+            for statement in statements:
+                result = await session.stream(statement)
+                async for partition in result.partitions():
+                    yield partition
+    else:
+        session = role.get_session_local()()
+        try:
+            for statement in statements:
+                result = await run_in_threadpool(session.execute, statement)
+                async for partition in iterate_in_threadpool(result.partitions()):
+                    yield partition
+        finally:
+            await run_in_threadpool(session.close)
+
+
+def exported_values(row: Row) -> tuple:
+    return (*row[:AMOUNT_INDEX], from_cents(row[AMOUNT_INDEX]), *row[AMOUNT_INDEX + 1:])
+
+
+async def export_ndjson(user_id: int, read_only: bool = False) -> AsyncIterator[bytes]:
+    async for partition in stream_rows(user_debts_statements(user_id), read_only):
+        yield "".join(json.dumps(dict(zip(EXPORT_FIELDS, exported_values(row)))) + "\n"
+                      for row in partition).encode()
+
+
+async def export_csv(user_id: int, read_only: bool = False) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue().encode()
+
+    async for partition in stream_rows(user_debts_statements(user_id), read_only):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(exported_values(row) for row in partition)
+        yield buffer.getvalue().encode()
@@ -0,0 +1,183 @@
+import csv
+import json
+import os
+from typing import AsyncIterable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.debts import Debt
+from models.group import Group
+from models.user import User
+from models.user_balance import UserBalance
+from schemas.debt_import import DebtImportError, DebtImportReport
+from schemas.debt_schema import DebtCreateRequest
+from services.ledger_event_service import publish_debt_changes
+from utils.streaming import iter_lines
+
+# Rows validated, looked up and inserted together; each chunk is its own transaction
+DEBT_IMPORT_CHUNK_SIZE = int(os.getenv("DEBT_IMPORT_CHUNK_SIZE", "1000"))
+# Only the first errors are listed in the report, the rest are just counted
+MAX_REPORTED_ERRORS = 1000
+
+CSV_TYPES = ("text/csv",)
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/jsonlines")
+REQUIRED_CSV_COLUMNS = {"title", "receiver", "amount"}
+
+
+class _ImportState:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[DebtImportError] = []
+
+    def fail(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(DebtImportError(line=line, error=error))
+
+    def report(self) -> DebtImportReport:
+        errors = sorted(self.errors, key=lambda error: error.line)
+        return DebtImportReport(imported=self.imported, failed=self.failed, errors=errors,
+                                errors_truncated=self.failed > len(self.errors))
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors())
+
+
+async def _import_chunk(db: AsyncSession, rows: List[Tuple[int, dict]], default_user_id: int,
+                        state: _ImportState) -> None:
+    """Validates one chunk, resolves its usernames in batch and inserts it in a single transaction."""
+    receiver_ids = await User.getUserIdsByUsernames(
+        db, {raw["receiver"] for _, raw in rows if isinstance(raw.get("receiver"), str)}
+    )
+
+    validated: List[Tuple[int, DebtCreateRequest]] = []
+    for line, raw in rows:
+        raw.setdefault("user_id", default_user_id)
+        receiver = raw.get("receiver")
+        receiver_id = receiver_ids.get(receiver) if isinstance(receiver, str) else None
+        if isinstance(receiver, str) and receiver_id is None:
+            state.fail(line, f"Unknown receiver {receiver!r}")
+            continue
+        supplied_id = raw.get("receiver_id")
+        if supplied_id is not None and str(supplied_id) != str(receiver_id):
+            state.fail(line, "receiver_id does not match receiver")
+            continue
+        raw["receiver_id"] = receiver_id
+        try:
+            validated.append((line, DebtCreateRequest.model_validate(raw)))
+        except ValidationError as error:
+            state.fail(line, _validation_message(error))
+
+    debtor_ids = {debt.user_id for _, debt in validated} - {default_user_id}
+    known_debtors = await User.getUsernamesByIds(db, debtor_ids)
+    grouped = [debt for _, debt in validated if debt.group_id is not None]
+    memberships = await Group.findMemberships(
+        db, {user_id for debt in grouped for user_id in (debt.user_id, debt.receiver_id)},
+        {debt.group_id for debt in grouped},
+    )
+    accepted = []
+    for line, debt in validated:
+        if debt.user_id != default_user_id and debt.user_id not in known_debtors:
+            state.fail(line, f"Unknown user_id {debt.user_id}")
+        elif debt.group_id is not None and not {(debt.user_id, debt.group_id),
+                                                (debt.receiver_id, debt.group_id)} <= memberships:
+            state.fail(line, f"Debtor and receiver must both be members of group {debt.group_id}")
+        else:
+            accepted.append((line, debt))
+    if not accepted:
+        return
+
+    changes = [(debt.user_id, debt.receiver_id, debt.amount_cents) for _, debt in accepted]
+    try:
+        await db.execute(insert(Debt), [{**debt.model_dump(exclude={"amount"}), "amount_cents": debt.amount_cents}
+                                        for _, debt in accepted])
+        await UserBalance.applyDebtChanges(db, changes)
+        await db.commit()
+        state.imported += len(accepted)
+    except SQLAlchemyError as error:
+        await db.rollback()
+        message = f"Database error: {error.__class__.__name__}"
+        for line, _ in accepted:
+            state.fail(line, message)
+        return
+    await publish_debt_changes("debts_imported", changes)
+
+
+def _csv_parser():
+    """Returns a function turning CSV lines into row dicts; the first line is the header."""
+    header: Optional[List[str]] = None
+
+    def parse(line: str) -> Optional[dict]:
+        nonlocal header
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            missing = REQUIRED_CSV_COLUMNS - set(header)
+            if missing:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail=f"CSV header is missing columns: {', '.join(sorted(missing))}")
+            return None
+        if len(values) != len(header):
+            raise ValueError(f"Expected {len(header)} columns, got {len(values)}")
+        return {name: value for name, value in zip(header, values)
+                if value != "" or name not in ("user_id", "receiver_id", "group_id")}
+
+    return parse
+
+
+def _ndjson_parse(line: str) -> dict:
+    row = json.loads(line)
+    if not isinstance(row, dict):
+        raise ValueError("Expected a JSON object")
+    return row
+
+
+async def import_debts(db: AsyncSession, chunks: AsyncIterable[bytes], content_type: str,
+                       default_user_id: int) -> DebtImportReport:
+    """
+    Imports debts from a streamed CSV or NDJSON body, one record per line.
+
+    Rows are handled DEBT_IMPORT_CHUNK_SIZE at a time, so memory stays flat
+    regardless of file size. A bad row is reported and skipped; it does not
+    abort the import. Chunks commit independently, so rows before a failure
+    stay imported. user_id defaults to the importing user and receiver_id is
+    resolved from the receiver username.
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in CSV_TYPES:
+        parse = _csv_parser()
+    elif media_type in NDJSON_TYPES:
+        parse = _ndjson_parse
+    else:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Expected text/csv or application/x-ndjson")
+
+    state = _ImportState()
+    pending: List[Tuple[int, Dict]] = []
+    async for line_number, line in iter_lines(chunks):
+        if line is None:
+            state.fail(line_number, "Line too long")
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = parse(line)
+        except (ValueError, csv.Error) as error:
+            state.fail(line_number, str(error))
+            continue
+        if row is None:
+            continue
+        pending.append((line_number, row))
+        if len(pending) >= DEBT_IMPORT_CHUNK_SIZE:
+            await _import_chunk(db, pending, default_user_id, state)
+            pending = []
+
+    if pending:
+        await _import_chunk(db, pending, default_user_id, state)
+    return state.report()
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import os
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.db_configuration import open_session
+from models.debt_history import DebtHistory
+from models.debts import Debt, DebtsChanged
+from schemas.debt_response import DebtResponse
+from services.ledger_event_service import publish_debt_changes
+from utils.money import from_cents
+
+# Settled debts moved to debts_history per transaction
+DEBT_ARCHIVE_CHUNK_SIZE = int(os.getenv("DEBT_ARCHIVE_CHUNK_SIZE", "1000"))
+# Seconds between two archiver passes, 0 disables the background archiver
+DEBT_ARCHIVE_INTERVAL_SECONDS = float(os.getenv("DEBT_ARCHIVE_INTERVAL_SECONDS", "60"))
+# Pause between chunks, so other writers get the tables in between
+DEBT_ARCHIVE_PAUSE_SECONDS = float(os.getenv("DEBT_ARCHIVE_PAUSE_SECONDS", "0.05"))
+
+logger = logging.getLogger(__name__)
+
+
+async def settle_debts(db: AsyncSession, *criteria) -> List[DebtResponse]:
+    """Settles the open debts matching criteria in one transaction and notifies both sides."""
+    try:
+        changes = await Debt.settleDebts(db, *criteria)
+        await db.commit()
+    except DebtsChanged:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Debts changed while settling, try again")
+    except Exception:
+        await db.rollback()
+        raise
+    await publish_debt_changes("debts_settled", changes, sign=-1)
+    return [DebtResponse(debtor=debtor_id, creditor=creditor_id, amount=from_cents(amount_cents))
+            for debtor_id, creditor_id, amount_cents in changes]
+
+
+async def archive_settled_debts(chunk_size: int = DEBT_ARCHIVE_CHUNK_SIZE,
+                                pause: float = DEBT_ARCHIVE_PAUSE_SECONDS) -> int:
+    """Moves every settled debt to debts_history, one short transaction per chunk. Returns the rows moved."""
+    moved = 0
+    while True:
+        async with open_session() as db:
+            archived = await DebtHistory.archiveSettledChunk(db, chunk_size)
+        moved += archived
+        if archived < chunk_size:
+            return moved
+        await asyncio.sleep(pause)
+
+
+class DebtArchiver:
+    """Runs archive_settled_debts in the background every interval seconds."""
+
+    def __init__(self, interval: float = DEBT_ARCHIVE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        async def run():
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    moved = await archive_settled_debts()
+                    if moved:
+                        logger.info("Archived %d settled debts", moved)
+                except Exception:
+                    logger.exception("Archiving settled debts failed")
+
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+debt_archiver = DebtArchiver()
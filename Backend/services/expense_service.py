@@ -0,0 +1,57 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from models.expense_request import ExpenseRequest
+from utils.money import parts_to_cents, to_cents
+from utils.settlement import Transfer, minimal_transfers, split_expenses
+
+
+class InvalidExpense(ValueError):
+    def __init__(self, index: int, reason: str):
+        super().__init__(f"Expense {index}: {reason}")
+        self.index = index
+
+
+def settle_expenses(expenses: List[ExpenseRequest]) -> Tuple[List[int], List[Transfer]]:
+    """
+    Nets a batch of multi-payer expenses and returns (every user id involved,
+    the minimal transfers in cents). Raises InvalidExpense for the first
+    expense whose payments do not add up or whose weights are unusable.
+    """
+    totals = np.array([to_cents(expense.total_cost) for expense in expenses], dtype=np.int64)
+
+    # Payers are converted together so amounts that only add up before rounding still match the total
+    payment_rows = [(index, payer.user_id, cents)
+                    for index, expense in enumerate(expenses)
+                    for payer, cents in zip(expense.payers, parts_to_cents([payer.amount for payer in expense.payers]))]
+    share_rows: List[Tuple[int, int]] = []
+    share_weights: List[float] = []
+    for index, expense in enumerate(expenses):
+        sharers = dict.fromkeys([payer.user_id for payer in expense.payers] + expense.participants)
+        weights: Dict[int, float] = expense.weights or {}
+        unknown = weights.keys() - sharers.keys()
+        if unknown:
+            raise InvalidExpense(index, f"weights for users who neither paid nor participated: {sorted(unknown)}")
+        for user_id in sharers:
+            share_rows.append((index, user_id))
+            share_weights.append(weights.get(user_id, 1.0))
+
+    payments = np.array(payment_rows, dtype=np.int64).reshape(-1, 3)
+    shares = np.array(share_rows, dtype=np.int64).reshape(-1, 2)
+    weights = np.array(share_weights, dtype=np.float64)
+
+    paid = np.bincount(payments[:, 0], weights=payments[:, 2], minlength=len(totals)).astype(np.int64)
+    wrong_total = np.flatnonzero(paid != totals)
+    if len(wrong_total):
+        index = int(wrong_total[0])
+        raise InvalidExpense(index, f"payments ({paid[index] / 100}) must equal the total cost ({totals[index] / 100})")
+    if (weights < 0).any() or not np.isfinite(weights).all():
+        raise InvalidExpense(int(shares[np.flatnonzero((weights < 0) | ~np.isfinite(weights))[0], 0]),
+                             "weights must be zero or positive")
+    no_weight = np.flatnonzero(np.bincount(shares[:, 0], weights=weights, minlength=len(totals)) <= 0)
+    if len(no_weight):
+        raise InvalidExpense(int(no_weight[0]), "at least one user must have a positive weight")
+
+    user_ids, net = split_expenses(totals, payments, shares, weights)
+    return user_ids.tolist(), minimal_transfers(user_ids, net)
@@ -0,0 +1,54 @@
+from typing import List
+
+from sqlalchemy import case, func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.debts import Debt
+from models.group import user_group_association
+from models.user import User
+from schemas.group_schema import GroupMemberBalance
+from utils.money import from_cents
+
+OWED, RECEIVABLE = 0, 1
+
+
+def group_balances_statement(group_id: int):
+    """
+    One row per member of the group with their totals over the group's debts.
+
+    Each side is summed per user by its own GROUP BY over the open debts,
+    which reads only the (group_id, settled_at, user_id, amount_cents) or
+    (group_id, settled_at, receiver_id, amount_cents) index. The sums are
+    over integer cents, so they are exact.
+    The outer query folds the two sides into per-member columns with
+    conditional sums, so the result is never larger than the member list.
+    """
+    sides = union_all(
+        select(Debt.user_id.label("member_id"), literal(OWED).label("side"), func.sum(Debt.amount_cents).label("total"))
+        .where(Debt.group_id == group_id, Debt.settled_at.is_(None)).group_by(Debt.user_id),
+        select(Debt.receiver_id, literal(RECEIVABLE), func.sum(Debt.amount_cents))
+        .where(Debt.group_id == group_id, Debt.settled_at.is_(None)).group_by(Debt.receiver_id),
+    ).subquery()
+
+    total_owed = func.coalesce(func.sum(case((sides.c.side == OWED, sides.c.total), else_=0)), 0)
+    total_receivable = func.coalesce(func.sum(case((sides.c.side == RECEIVABLE, sides.c.total), else_=0)), 0)
+    members = user_group_association
+    return (
+        select(members.c.user_id, User.username, total_owed.label("total_owed"),
+               total_receivable.label("total_receivable"), (total_receivable - total_owed).label("net_balance"))
+        .select_from(members.join(User, User.id == members.c.user_id)
+                     .outerjoin(sides, sides.c.member_id == members.c.user_id))
+        .where(members.c.group_id == group_id)
+        .group_by(members.c.user_id, User.username)
+        .order_by(members.c.user_id)
+    )
+
+
+async def get_group_balances(db: AsyncSession, group_id: int) -> List[GroupMemberBalance]:
+    rows = await db.execute(group_balances_statement(group_id))
+    # int(): MySQL returns SUM over integers as DECIMAL
+    return [GroupMemberBalance(user_id=row.user_id, username=row.username,
+                               total_owed=from_cents(int(row.total_owed)),
+                               total_receivable=from_cents(int(row.total_receivable)),
+                               net_balance=from_cents(int(row.net_balance)))
+            for row in rows]
@@ -0,0 +1,30 @@
+from typing import Dict, Iterable, List, Optional
+
+from models.user_balance import DebtChange
+from schemas.ledger_event import LedgerDelta
+from utils.event_hub import ledger_hub
+from utils.money import from_cents
+
+
+def ledger_deltas(reason: str, changes: Iterable[DebtChange], sign: int = 1,
+                  debt_id: Optional[int] = None) -> Dict[int, dict]:
+    """{user_id: LedgerDelta} for both sides of every change, netted per user like UserBalance.applyDebtChanges."""
+    totals: Dict[int, List[int]] = {}
+    for debtor_id, creditor_id, amount_cents in changes:
+        debtor = totals.setdefault(debtor_id, [0, 0, 0])
+        debtor[0] += 1
+        debtor[1] += sign * amount_cents
+        creditor = totals.setdefault(creditor_id, [0, 0, 0])
+        creditor[0] += 1
+        creditor[2] += sign * amount_cents
+    return {
+        user_id: LedgerDelta(reason=reason, debt_id=debt_id, debts=debts, owed_delta=from_cents(owed),
+                             receivable_delta=from_cents(receivable)).model_dump(by_alias=True)
+        for user_id, (debts, owed, receivable) in totals.items()
+    }
+
+
+async def publish_debt_changes(reason: str, changes: Iterable[DebtChange], sign: int = 1,
+                               debt_id: Optional[int] = None) -> None:
+    """Pushes the deltas to the users' open event streams. Call after the commit."""
+    await ledger_hub.publish(ledger_deltas(reason, changes, sign, debt_id))
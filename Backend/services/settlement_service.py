@@ -0,0 +1,17 @@
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.debts import Debt
+
+
+async def load_open_debts(db: AsyncSession, group_id: int) -> np.ndarray:
+    """
+    Loads (debtor_id, creditor_id, amount_cents) for every open debt made in
+    the group, the same debts its settle-up settles, as an (n, 3) int64 array.
+    """
+    rows = (await db.execute(select(Debt.user_id, Debt.receiver_id, Debt.amount_cents)
+                             .where(Debt.group_id == group_id, Debt.settled_at.is_(None)))).all()
+    if not rows:
+        return np.empty((0, 3), dtype=np.int64)
+    return np.array(rows, dtype=np.int64)
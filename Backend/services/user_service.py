@@ -1,31 +1,31 @@
-from typing import Sequence, Optional, List, Type
+from typing import Sequence, Optional, List
 
-from sqlalchemy.orm import Session
-from models.user import User
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.user import User, invalidate_cached_user
 from schemas.user_schema import UserSignUpSchema
 
 
-async def get_users(db: Session) -> List[Type[User]]:
-    return (db.query(User)
-            .all())
+async def get_users(db: AsyncSession) -> List[User]:
+    return list(await db.scalars(select(User)))
 
-async def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+    user = await db.get(User, user_id)
 
     return user
 
-async def get_user_by_username(db: Session, username: str) -> Optional[User]:
-    user = db.query(User).filter(User.username == username).first()
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    user = (await db.scalars(select(User).where(User.username == username))).first()
 
     return user
 
 
-async def get_user_by_email(db: Session, user_email: str) -> Optional[User]:
-    user = db.query(User).filter(User.email == user_email).first()
+async def get_user_by_email(db: AsyncSession, user_email: str) -> Optional[User]:
+    user = (await db.scalars(select(User).where(User.email == user_email))).first()
     return user
 
 async def create_user(
-        db: Session,
+        db: AsyncSession,
         user_data: UserSignUpSchema,
         commit_and_refresh: bool = True) -> User:
 
@@ -38,9 +38,10 @@ async def create_user(
     db.add(new_user)
 
     if commit_and_refresh:
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
 
+    invalidate_cached_user(new_user.username)
     return new_user
 
 #async def update_user(
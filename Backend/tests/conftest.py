@@ -0,0 +1,150 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite database before config/db_configuration.py is imported
+_database_path = os.path.join(tempfile.mkdtemp(prefix="debtapp-tests-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_database_path}"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_database_path}"
+os.environ["BCRYPT_ROUNDS"] = "4"
+# Every request of the suite comes from the same client
+os.environ["ADMISSION_AUTH_BURST"] = "1000"
+os.environ["ADMISSION_EXPENSIVE_BURST"] = "1000"
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+import main
+from config.db_configuration import SessionLocal, async_engine, create_schema, engine
+from models.debts import Debt
+from models.group import Group, user_group_association
+from models.user import User, principal_cache
+from models.user_balance import UserBalance
+from utils.auth import create_access_token, decoded_token_cache, hash_password
+
+PASSWORD = "test-password"
+
+# Members per group and debts per member for each data size the budgets are checked at
+SCALES = {"small": (5, 4), "large": (200, 40)}
+
+
+def auth_headers(username: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': username})}"}
+
+
+@dataclass
+class World:
+    """A group of users with debts between them, seeded at one of the SCALES."""
+    scale: str
+    prefix: str  # Every username and the group name start with it
+    user_ids: List[int]
+    usernames: List[str]
+    outsider_ids: List[int]
+    group_id: int
+    debt_ids: List[int] = field(default_factory=list)
+
+    @property
+    def owner(self) -> str:
+        return self.usernames[0]
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return auth_headers(self.owner)
+
+
+def seed_world(scale: str, password_hash: str, prefix: Optional[str] = None) -> World:
+    """Seeds a world of the given scale whose names start with prefix (the scale by default)."""
+    members, debts_per_member = SCALES[scale]
+    prefix = prefix or scale
+    db = SessionLocal()
+    try:
+        users = [User(username=f"{prefix}_user_{i}", email=f"{prefix}_user_{i}@example.com", password=password_hash)
+                 for i in range(members)]
+        outsiders = [User(username=f"{prefix}_outsider_{i}", email=f"{prefix}_outsider_{i}@example.com",
+                          password=password_hash)
+                     for i in range(members // 2 + 1)]
+        group = Group(name=f"{prefix} group")
+        db.add_all(users + outsiders + [group])
+        db.flush()
+        db.execute(insert(user_group_association),
+                   [{"user_id": user.id, "group_id": group.id} for user in users])
+
+        rows = [
+            {"title": f"{prefix} debt {i}-{j}", "receiver": users[(i + j + 1) % members].username,
+             "receiver_id": users[(i + j + 1) % members].id, "amount_cents": (j + 1) * 100, "user_id": users[i].id,
+             "group_id": group.id}
+            for i in range(members) for j in range(debts_per_member)
+        ]
+        db.execute(insert(Debt), rows)
+        db.commit()
+
+        balances = {user.id: [0, 0] for user in users + outsiders}
+        for row in rows:
+            balances[row["user_id"]][0] += row["amount_cents"]
+            balances[row["receiver_id"]][1] += row["amount_cents"]
+        db.execute(insert(UserBalance), [
+            {"user_id": user_id, "total_owed_cents": owed, "total_receivable_cents": receivable}
+            for user_id, (owed, receivable) in balances.items()
+        ])
+        db.commit()
+
+        debt_ids = [debt_id for debt_id, in db.query(Debt.id).filter(Debt.user_id == users[0].id)]
+        return World(scale=scale, prefix=prefix, user_ids=[user.id for user in users],
+                     usernames=[user.username for user in users], outsider_ids=[user.id for user in outsiders], group_id=group.id, debt_ids=debt_ids)
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    create_schema()
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def password_hash() -> str:
+    return hash_password(PASSWORD)
+
+
+@pytest.fixture(scope="session")
+def worlds(client, password_hash) -> Dict[str, World]:
+    return {scale: seed_world(scale, password_hash) for scale in SCALES}
+
+
+@contextmanager
+def record_queries():
+    """Collects every SQL statement sent by either engine while the block runs."""
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Returns run(send) which calls send() with cold authentication caches, so
+    every request pays for its user lookup, and returns (response, statements).
+    """
+    def run(send):
+        principal_cache.clear()
+        decoded_token_cache.clear()
+        with record_queries() as statements:
+            response = send()
+        return response, statements
+
+    return run
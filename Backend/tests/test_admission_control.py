@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from utils.admission import AdmissionControlMiddleware, EndpointClass, MemoryRateLimitBackend
+from utils.auth import create_access_token
+
+# More blocking requests than the threadpool has workers (40)
+SLOW_REQUESTS = 60
+
+
+def build_app(release: threading.Event, *classes: EndpointClass) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/slow")
+    def slow():
+        # Holds a threadpool worker, like a handler waiting on a busy database
+        release.wait(10)
+        return {"ok": True}
+
+    @app.get("/cheap")
+    def cheap():
+        return {"ok": True}
+
+    if classes:
+        app.add_middleware(AdmissionControlMiddleware, classes=classes, backend=MemoryRateLimitBackend(),
+                           enabled=True)
+    return app
+
+
+async def cheap_latency_while_saturated(app: FastAPI, release: threading.Event):
+    """Seconds GET /cheap took while /slow is flooded (None if it did not finish within 1s), and /slow's statuses."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        flood = [asyncio.create_task(client.post("/slow")) for _ in range(SLOW_REQUESTS)]
+        await asyncio.sleep(0.2)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(client.get("/cheap"), 1)
+            latency = time.perf_counter() - started
+        except asyncio.TimeoutError:
+            latency = None
+        release.set()
+        responses = await asyncio.gather(*flood)
+    return latency, [response.status_code for response in responses]
+
+
+def test_cheap_endpoints_keep_their_latency_while_an_expensive_one_is_saturated():
+    release = threading.Event()
+    latency, _ = asyncio.run(cheap_latency_while_saturated(build_app(release), release))
+    # Without admission control the flood takes every threadpool worker
+    assert latency is None
+
+    release = threading.Event()
+    expensive = EndpointClass("expensive", ("POST /slow",), concurrency=2, max_queue=8, queue_timeout=5)
+    latency, statuses = asyncio.run(cheap_latency_while_saturated(build_app(release, expensive), release))
+    assert latency is not None and latency < 0.25
+    assert statuses.count(200) == 10
+    assert statuses.count(503) == SLOW_REQUESTS - 10
+
+
+def test_each_caller_has_its_own_token_bucket():
+    release = threading.Event()
+    release.set()
+    app = build_app(release, EndpointClass("expensive", ("POST /slow",), rate=0.01, burst=2))
+    alice = {"Authorization": f"Bearer {create_access_token(data={'sub': 'alice'})}"}
+    bob = {"Authorization": f"Bearer {create_access_token(data={'sub': 'bob'})}"}
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            alice_responses = [await client.post("/slow", headers=alice) for _ in range(3)]
+            return alice_responses, await client.post("/slow", headers=bob), await client.get("/cheap", headers=alice)
+
+    alice_responses, bob_response, cheap_response = asyncio.run(run())
+    assert [response.status_code for response in alice_responses] == [200, 200, 429]
+    assert int(alice_responses[-1].headers["Retry-After"]) >= 1
+    assert bob_response.status_code == 200
+    # Routes outside every class are never limited
+    assert cheap_response.status_code == 200
+
+
+def test_token_bucket_refills_at_its_rate():
+    now = [0.0]
+    backend = MemoryRateLimitBackend(clock=lambda: now[0])
+    take = lambda: asyncio.run(backend.take("key", rate=2, burst=2))
+    assert [take(), take()] == [0, 0]
+    assert take() == 0.5
+    now[0] += 0.5
+    assert take() == 0
+
+
+def test_default_classes_cover_the_expensive_routes():
+    middleware = AdmissionControlMiddleware(app=None)
+    assert middleware.classify("POST", "/groups/7/settle-up").name == "expensive"
+    assert middleware.classify("POST", "/login").name == "auth"
+    assert middleware.classify("GET", "/debts") is None
+    assert middleware.classify("GET", "/groups/7/settle-up") is None
@@ -0,0 +1,38 @@
+import pytest
+
+from conftest import auth_headers
+
+ENDPOINTS = ["/debts", "/my_debts/sum"]
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_unchanged_ledger_is_answered_with_304_without_reading_debts(client, worlds, count_queries, path):
+    world = worlds["large"]
+    etag = client.get(path, headers=world.headers).headers["ETag"]
+
+    response, statements = count_queries(lambda: client.get(path, headers={**world.headers, "If-None-Match": etag}))
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    # The user lookup and the ledger version
+    assert len(statements) == 2
+    assert not any("debts" in statement for statement in statements), statements
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_debt_changes_on_either_side_change_the_etag(client, worlds, path):
+    world = worlds["small"]
+    creditor_headers = auth_headers(world.usernames[1])
+    debtor_etag = client.get(path, headers=world.headers).headers["ETag"]
+    creditor_etag = client.get(path, headers=creditor_headers).headers["ETag"]
+
+    created = client.post("/debts", headers=world.headers, json={
+        "title": "etag", "receiver": world.usernames[1], "receiver_id": world.user_ids[1],
+        "amount": 2.5, "user_id": world.user_ids[0]})
+    assert client.get(path, headers={**world.headers, "If-None-Match": debtor_etag}).status_code == 200
+    response = client.get(path, headers={**creditor_headers, "If-None-Match": creditor_etag})
+    assert response.status_code == 200
+
+    creditor_etag = response.headers["ETag"]
+    client.delete(f"/debts/{created.json()['debt']['id']}", headers=world.headers)
+    assert client.get(path, headers={**creditor_headers, "If-None-Match": creditor_etag}).status_code == 200
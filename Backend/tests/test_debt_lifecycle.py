@@ -0,0 +1,81 @@
+import asyncio
+
+from sqlalchemy import insert, select
+
+from conftest import auth_headers
+from config.db_configuration import SessionLocal, open_session
+from models.debt_history import ARCHIVED_COLUMNS, DebtHistory
+from models.debts import Debt
+from services.debt_lifecycle_service import archive_settled_debts
+
+
+def test_settled_debts_leave_live_queries_and_are_archived_to_history(client, worlds):
+    world = worlds["small"]
+    alice, bob = world.outsider_ids[0], world.outsider_ids[1]
+    alice_headers, bob_headers = auth_headers("small_outsider_0"), auth_headers("small_outsider_1")
+    for amount, debtor, creditor, creditor_name in ((5.0, alice, bob, "small_outsider_1"),
+                                                    (2.0, alice, bob, "small_outsider_1"),
+                                                    (3.0, bob, alice, "small_outsider_0")):
+        client.post("/debts", headers=alice_headers, json={
+            "title": "lifecycle", "receiver": creditor_name, "receiver_id": creditor, "amount": amount,
+            "user_id": debtor})
+    owed_before = client.get("/my_debts/sum", headers=alice_headers).json()["totalDebt"]
+    debt_id = client.get("/debts", headers=alice_headers).json()["docs"][0]["id"]
+
+    response = client.post("/debts/settle-up", headers=alice_headers, json={"user_id": bob})
+    assert response.status_code == 200
+    assert sorted((d["debtor"], d["creditor"], d["amount"]) for d in response.json()["settled"]) == sorted(
+        [(alice, bob, 7.0), (bob, alice, 3.0)])
+
+    assert client.get("/debts", headers=alice_headers).json()["docs"] == []
+    assert client.get("/my_debts/sum", headers=alice_headers).json()["totalDebt"] == owed_before - 7.0
+    assert client.delete(f"/debts/{debt_id}", headers=alice_headers).status_code == 409
+    # Nothing left to settle
+    assert client.post("/debts/settle-up", headers=alice_headers, json={"user_id": bob}).json()["settled"] == []
+
+    assert client.get("/debts/history", headers=alice_headers).json()["docs"] == []
+    assert client.portal.call(archive_settled_debts, 1, 0) >= 3
+
+    owed = client.get("/debts/history", headers=alice_headers).json()["docs"]
+    receivable = client.get("/debts/history?side=receivable", headers=alice_headers).json()["docs"]
+    assert sorted(debt["amount"] for debt in owed) == [2.0, 5.0]
+    assert [debt["amount"] for debt in receivable] == [3.0]
+    assert all(debt["settledAt"] and debt["archivedAt"] for debt in owed + receivable)
+    assert client.get("/debts/history?side=receivable", headers=bob_headers).json()["docs"][0]["userId"] == alice
+
+
+def test_only_members_can_settle_up_a_group(client, worlds):
+    world = worlds["small"]
+    response = client.post(f"/groups/{world.group_id}/settle-up", headers=auth_headers("small_outsider_2"))
+    assert response.status_code == 404
+
+
+def test_two_archivers_over_the_same_chunk_archive_each_debt_once(client, worlds):
+    world = worlds["large"]
+    alice, bob = world.outsider_ids[23], world.outsider_ids[24]
+    headers = auth_headers("large_outsider_23")
+    for amount in (1.0, 2.0):
+        client.post("/debts", headers=headers, json={
+            "title": "archive race", "receiver": "large_outsider_24", "receiver_id": bob, "amount": amount,
+            "user_id": alice})
+    client.post("/debts/settle-up", headers=headers, json={"user_id": bob})
+
+    with SessionLocal() as db:
+        ids = list(db.scalars(select(Debt.id).where(Debt.user_id == alice)))
+        # One of them was already copied by an archiver whose delete has not happened yet
+        copied = db.execute(select(*(getattr(Debt, name) for name in ARCHIVED_COLUMNS), Debt.settled_at)
+                            .where(Debt.id == ids[0])).one()
+        db.execute(insert(DebtHistory), [dict(zip([*ARCHIVED_COLUMNS, "archived_at"], copied))])
+        db.commit()
+
+    async def archive():
+        async with open_session() as db:
+            return await DebtHistory.archiveDebts(db, ids)
+
+    async def race():
+        return await asyncio.gather(archive(), archive())
+
+    assert sum(client.portal.call(race)) == len(ids)
+    with SessionLocal() as db:
+        assert list(db.scalars(select(Debt.id).where(Debt.id.in_(ids)))) == []
+        assert sorted(db.scalars(select(DebtHistory.id).where(DebtHistory.id.in_(ids)))) == sorted(ids)
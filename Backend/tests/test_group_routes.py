@@ -0,0 +1,36 @@
+import pytest
+
+from conftest import auth_headers
+
+
+@pytest.mark.parametrize("path", ["/groups/{group_id}/balances", "/groups/{group_id}/settle-plan"])
+def test_group_reads_are_for_members_only(client, worlds, path):
+    world = worlds["small"]
+    url = path.format(group_id=world.group_id)
+    assert client.get(url, headers=world.headers).status_code == 200
+    assert client.get(url, headers=auth_headers("small_outsider_2")).status_code == 404
+    assert client.get(path.format(group_id=10 ** 6), headers=world.headers).status_code == 404
+
+
+def test_settle_plan_covers_the_debts_its_settle_up_settles(client, worlds):
+    world = worlds["large"]
+    (alice, bob), names = world.outsider_ids[21:23], ["large_outsider_21", "large_outsider_22"]
+    headers = auth_headers(names[0])
+    group_ids = []
+    for name in ("plan group a", "plan group b"):
+        group_id = client.post(f"/groups?name={name}", headers=headers).json()["group"]["id"]
+        client.post(f"/groups/{group_id}/add_users", headers=headers, json={"user_ids": [bob]})
+        group_ids.append(group_id)
+    group_a, group_b = group_ids
+    for amount, group_id in ((4.0, group_a), (10.0, group_b), (1.5, None)):
+        client.post("/debts", headers=headers, json={
+            "title": "plan", "receiver": names[1], "receiver_id": bob, "amount": amount, "user_id": alice,
+            "group_id": group_id})
+
+    plan = client.get(f"/groups/{group_a}/settle-plan", headers=headers).json()
+    assert (plan["debtsConsidered"], plan["transfers"]) == (1, [{"debtor": alice, "creditor": bob, "amount": 4.0}])
+
+    settled = client.post(f"/groups/{group_a}/settle-up", headers=headers).json()["settled"]
+    assert settled == plan["transfers"]
+    assert client.get(f"/groups/{group_a}/settle-plan", headers=headers).json()["transfers"] == []
+    assert client.get(f"/groups/{group_b}/settle-plan", headers=headers).json()["transfers"][0]["amount"] == 10.0
@@ -0,0 +1,43 @@
+import asyncio
+
+from utils.event_hub import RESYNC, EventHub, LocalBroker, ledger_hub
+
+
+def test_debt_changes_are_pushed_to_both_sides(client, worlds):
+    world = worlds["small"]
+    debtor_id, creditor_id = world.user_ids[0], world.user_ids[1]
+    with client.portal.wrap_async_context_manager(ledger_hub.subscribe(debtor_id)) as debtor, \
+            client.portal.wrap_async_context_manager(ledger_hub.subscribe(creditor_id)) as creditor:
+        created = client.post("/debts", headers=world.headers, json={
+            "title": "pushed", "receiver": world.usernames[1], "receiver_id": creditor_id,
+            "amount": 2.5, "user_id": debtor_id})
+        debt_id = created.json()["debt"]["id"]
+        client.delete(f"/debts/{debt_id}", headers=world.headers)
+
+        def received(queue):
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+        assert received(debtor) == [
+            {"reason": "debt_created", "debtId": debt_id, "debts": 1, "owedDelta": 2.5, "receivableDelta": 0.0},
+            {"reason": "debt_deleted", "debtId": debt_id, "debts": 1, "owedDelta": -2.5, "receivableDelta": 0.0},
+        ]
+        assert [event["receivableDelta"] for event in received(creditor)] == [2.5, -2.5]
+
+
+def test_event_stream_requires_a_token(client):
+    assert client.get("/events/ledger").status_code == 401
+    assert client.get("/events/ledger?token=not-a-jwt").status_code == 401
+
+
+def test_slow_subscriber_gets_a_resync_instead_of_a_backlog():
+    async def run():
+        hub = EventHub(broker=LocalBroker(), queue_size=2)
+        await hub.start()
+        async with hub.subscribe(1) as slow, hub.subscribe(2) as other:
+            for amount in range(3):
+                await hub.publish({1: {"owedDelta": amount}})
+            assert [slow.get_nowait() for _ in range(slow.qsize())] == [RESYNC]
+            assert other.empty()
+        assert hub.subscriber_count == 0
+
+    asyncio.run(run())
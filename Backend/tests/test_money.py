@@ -0,0 +1,73 @@
+from sqlalchemy import select
+
+from conftest import auth_headers
+from config.db_configuration import SessionLocal
+from models.user_balance import UserBalance
+from utils.money import to_cents
+
+
+def _balances(user_ids):
+    with SessionLocal() as db:
+        return {balance.user_id: (balance.total_owed_cents, balance.total_receivable_cents)
+                for balance in db.scalars(select(UserBalance).where(UserBalance.user_id.in_(user_ids)))}
+
+
+def test_to_cents_rounds_what_the_client_wrote():
+    assert [to_cents(value) for value in (0.29, 1.005, 19.99, 0.1 + 0.2, 12)] == [29, 101, 1999, 30, 1200]
+
+
+def test_split_debts_adds_up_to_the_cent(client, worlds):
+    a, b, c = worlds["large"].outsider_ids[10:13]
+    before = _balances([a, b, c])
+
+    # 0.1 + 0.2 != 0.3 in floats, this used to be rejected
+    response = client.post("/split-debts/", json={"costs": 0.3, "payments": {a: 0.1, b: 0.2, c: 0}})
+    assert response.status_code == 200, response.text
+    assert response.json() == [{"debtor": c, "creditor": b, "amount": 0.1}]
+
+    # 10.00 over three: one share carries the extra cent, no sub-cent debt is left behind
+    response = client.post("/split-debts/", json={"costs": 10, "payments": {a: 10, b: 0, c: 0}})
+    assert sorted(debt["amount"] for debt in response.json()) == [3.33, 3.33]
+
+    after = _balances([a, b, c])
+    assert after[a][1] - before[a][1] == 666
+    assert after[b][0] - before[b][0] == 333
+    assert after[c][0] - before[c][0] == 10 + 333
+    assert after[b][1] - before[b][1] == 10
+
+
+def test_many_small_debts_sum_exactly(client, worlds):
+    world = worlds["large"]
+    debtor, creditor = world.outsider_ids[13], world.outsider_ids[14]
+    headers = auth_headers("large_outsider_13")
+    owed_before = client.get("/my_debts/sum", headers=headers).json()["totalDebt"]
+    for _ in range(10):
+        client.post("/debts", headers=headers, json={
+            "title": "dime", "receiver": "large_outsider_14", "receiver_id": creditor, "amount": 0.1,
+            "user_id": debtor})
+
+    assert client.get("/my_debts/sum", headers=headers).json()["totalDebt"] == owed_before + 1.0
+    debts = client.get("/debts", headers=headers).json()["docs"]
+    assert {(debt["amount"], debt["amountCents"]) for debt in debts} == {(0.1, 10)}
+
+
+def test_non_finite_amounts_are_rejected(client, worlds):
+    world = worlds["large"]
+    debtor, creditor = world.outsider_ids[15], world.outsider_ids[16]
+    headers = auth_headers("large_outsider_15")
+
+    response = client.post("/debts", headers=headers, json={
+        "title": "inf", "receiver": "large_outsider_16", "receiver_id": creditor, "amount": "Infinity",
+        "user_id": debtor})
+    assert response.status_code == 422
+    assert client.post("/split-debts/", json={"costs": "NaN", "payments": {debtor: "NaN"}}).status_code == 422
+    assert client.post("/split-expenses/", headers=headers, json={"expenses": [{
+        "total_cost": 1, "payers": [{"user_id": debtor, "amount": "Infinity"}], "participants": [creditor]}]}
+    ).status_code == 422
+
+    # A bad line is reported on its own, the rest of the chunk is still imported
+    response = client.post("/debts/import", headers={**headers, "Content-Type": "text/csv"},
+                           content="title,receiver,amount\nbad,large_outsider_16,nan\ngood,large_outsider_16,2.5\n")
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["imported"], [error["line"] for error in report["errors"]]) == (1, [2])
@@ -0,0 +1,146 @@
+"""
+Query budgets per endpoint.
+
+Every case runs once against the small and once against the large world,
+both seeded for that case alone, so cases can run in any order or on their
+own. The number of SQL statements must stay within the budget and must be
+the same at both sizes, so an N+1 pattern fails here instead of in production.
+Every route of the API needs a case.
+"""
+import itertools
+
+import anyio
+import httpx
+import pytest
+
+import main
+from conftest import PASSWORD, SCALES, seed_world
+from services.debt_import_service import DEBT_IMPORT_CHUNK_SIZE
+
+_unique = itertools.count()
+
+
+def _csv(world, rows):
+    lines = ["title,receiver,amount"]
+    lines += [f"imported {i},{world.usernames[1 + i % (len(world.usernames) - 1)]},1.5" for i in range(rows)]
+    return "\n".join(lines).encode()
+
+
+def _expenses(world):
+    users = world.user_ids
+    return {"group_id": world.group_id, "expenses": [
+        {"total_cost": 10.0 + i, "payers": [{"user_id": users[i % len(users)], "amount": 10.0 + i}],
+         "participants": users, "weights": {users[0]: 2}}
+        for i in range(len(users))
+    ]}
+
+
+def _open_stream(client, path, headers):
+    """Opens an endless stream, hangs up after its first bytes and returns the response status."""
+    async def run():
+        start, first_bytes = {}, anyio.Event()
+
+        async def receive():
+            await first_bytes.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message.get("body"):
+                first_bytes.set()
+
+        scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+                 "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+                 "root_path": "", "server": ("testserver", 80), "client": ("testclient", 50000),
+                 "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()]}
+        await main.app(scope, receive, send)
+        return httpx.Response(start["status"])
+
+    return client.portal.call(run)
+
+
+def _payments(world):
+    payments = {user_id: 0.0 for user_id in world.user_ids}
+    payments[world.user_ids[0]] = 10.0 * len(world.user_ids)
+    return {"costs": 10.0 * len(world.user_ids), "payments": payments}
+
+
+# name -> (statement budget, request); each request gets the test client and a seeded World
+CASES = {
+    # debts_routes
+    # One more than the page for the ledger version behind the ETag
+    "GET /debts": (3, lambda c, w: c.get("/debts", headers=w.headers)),
+    "GET /debts?include_total": (4, lambda c, w: c.get("/debts?include_total=true", headers=w.headers)),
+    "POST /debts": (4, lambda c, w: c.post("/debts", headers=w.headers, json={
+        "title": "budget", "receiver": w.usernames[1], "receiver_id": w.user_ids[1],
+        "amount": 1.0, "user_id": w.user_ids[0]})),
+    "DELETE /debts/{debt_id}": (5, lambda c, w: c.delete(f"/debts/{w.debt_ids.pop()}", headers=w.headers)),
+    "GET /my_debts/sum": (2, lambda c, w: c.get("/my_debts/sum", headers=w.headers)),
+    "POST /debts/import": (5, lambda c, w: c.post(
+        "/debts/import", headers={**w.headers, "Content-Type": "text/csv"},
+        # The import costs a fixed number of statements per chunk, so stay within one
+        content=_csv(w, min(DEBT_IMPORT_CHUNK_SIZE, 5 * len(w.user_ids))))),
+    "GET /debts/export": (3, lambda c, w: c.get("/debts/export", headers=w.headers)),
+    "GET /debts/history": (2, lambda c, w: c.get("/debts/history", headers=w.headers)),
+    "POST /debts/settle-up": (5, lambda c, w: c.post("/debts/settle-up", headers=w.headers,
+                                                     json={"user_id": w.user_ids[1]})),
+    # user_routes
+    "POST /register": (3, lambda c, w: c.post("/register", json={
+        "username": f"{w.scale}_new_{next(_unique)}", "email": f"{w.scale}_new_{next(_unique)}@example.com",
+        "password": PASSWORD})),
+    "POST /login": (1, lambda c, w: c.post("/login", json={"username": w.owner, "password": PASSWORD})),
+    "GET /verifyToken/{token}": (0, lambda c, w: c.get(f"/verifyToken/{w.headers['Authorization'][7:]}")),
+    "GET /users/usernames": (2, lambda c, w: c.get("/users/usernames", headers=w.headers)),
+    # 1 once the username index is loaded, 2 while it still falls back to the database
+    "GET /users/search": (2, lambda c, w: c.get(f"/users/search?prefix={w.prefix}", headers=w.headers)),
+    # group_routes
+    "POST /groups": (4, lambda c, w: c.post(f"/groups?name={w.scale}_group_{next(_unique)}", headers=w.headers)),
+    "POST /groups/{group_id}/add_users": (4, lambda c, w: c.post(
+        f"/groups/{w.group_id}/add_users", headers=w.headers, json={"user_ids": w.outsider_ids + w.user_ids})),
+    "POST /groups/{group_id}/remove_users": (4, lambda c, w: c.post(
+        f"/groups/{w.group_id}/remove_users", headers=w.headers, json={"user_ids": w.outsider_ids})),
+    "GET /groups/{group_id}/balances": (3, lambda c, w: c.get(f"/groups/{w.group_id}/balances",
+                                                              headers=w.headers)),
+    "GET /groups/{group_id}/settle-plan": (4, lambda c, w: c.get(f"/groups/{w.group_id}/settle-plan",
+                                                                 headers=w.headers)),
+    "POST /groups/{group_id}/settle-up": (6, lambda c, w: c.post(f"/groups/{w.group_id}/settle-up",
+                                                                 headers=w.headers)),
+    "POST /split-debts/": (4, lambda c, w: c.post("/split-debts/", json=_payments(w))),
+    "POST /split-expenses/": (6, lambda c, w: c.post("/split-expenses/", headers=w.headers, json=_expenses(w))),
+    # metrics_routes
+    "GET /metrics": (0, lambda c, w: c.get("/metrics")),
+    # events_routes
+    "GET /events/ledger": (1, lambda c, w: _open_stream(c, "/events/ledger", w.headers)),
+    # main
+    "GET /": (0, lambda c, w: c.get("/")),
+    "GET /hello/{name}": (0, lambda c, w: c.get(f"/hello/{w.owner}")),
+}
+
+
+@pytest.fixture
+def case_worlds(client, password_hash):
+    """A small and a large world seeded for one case."""
+    run = next(_unique)
+    return {scale: seed_world(scale, password_hash, prefix=f"budget{run}_{scale}") for scale in SCALES}
+
+
+def test_every_route_has_a_budget():
+    routes = {f"{method.upper()} {path}" for path, operations in main.app.openapi()["paths"].items()
+              for method in operations}
+    assert routes <= {name.split("?")[0] for name in CASES}, f"Routes without a budget: {routes - set(CASES)}"
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_query_budget(client, case_worlds, count_queries, name):
+    budget, send = CASES[name]
+    counts = {}
+    for scale, world in case_worlds.items():
+        response, statements = count_queries(lambda: send(client, world))
+        assert response.status_code < 400, f"{name} [{scale}]: {response.status_code} {response.text}"
+        assert len(statements) <= budget, (
+            f"{name} [{scale}] issued {len(statements)} statements, budget is {budget}:\n" + "\n".join(statements)
+        )
+        counts[scale] = len(statements)
+
+    assert len(set(counts.values())) == 1, f"{name} statement count grows with data size: {counts}"
@@ -0,0 +1,7 @@
+from config.db_configuration import engine
+from utils.query_plans import find_full_scans
+
+
+def test_hot_queries_use_an_index(worlds):
+    with engine.connect() as conn:
+        assert find_full_scans(conn) == {}
@@ -0,0 +1,107 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+
+from conftest import auth_headers
+from config import db_configuration
+from config.db_configuration import Base, DatabaseRole, async_engine, engine, pool_options, recent_writers
+from models.user import User, principal_cache
+
+
+@pytest.fixture
+def replica(client, monkeypatch):
+    """A second SQLite file as the read replica: empty except for one user only it knows about."""
+    path = os.path.join(tempfile.mkdtemp(prefix="debtapp-replica-"), "replica.db")
+    seed_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=seed_engine)
+    with seed_engine.begin() as conn:
+        conn.execute(insert(User), [{"username": "replica_only", "email": "replica_only@example.com", "password": "-"}])
+    seed_engine.dispose()
+
+    role = DatabaseRole(f"sqlite:///{path}", f"sqlite+aiosqlite:///{path}", pool_options("DATABASE_READ"))
+    monkeypatch.setattr(db_configuration, "reader", role)
+    recent_writers.clear()
+    yield role
+    recent_writers.clear()
+    client.portal.call(role.dispose)
+
+
+def usernames(client, headers) -> list:
+    return [item["username"] for item in client.get("/users/usernames?limit=100", headers=headers).json()["docs"]]
+
+
+def test_reads_go_to_the_replica(client, worlds, replica):
+    # The caller only exists on the primary, the lookup falls back to it
+    assert usernames(client, auth_headers(worlds["small"].usernames[2])) == ["replica_only"]
+
+
+def test_a_user_reads_their_own_writes_from_the_primary(client, worlds, replica):
+    world = worlds["small"]
+    writer, bystander = auth_headers(world.usernames[3]), auth_headers(world.usernames[4])
+    created = client.post("/debts", headers=writer, json={
+        "title": "replica", "receiver": world.usernames[0], "receiver_id": world.user_ids[0],
+        "amount": 1.5, "user_id": world.user_ids[3]})
+    debt_id = created.json()["debt"]["id"]
+
+    assert debt_id in [item["id"] for item in client.get("/debts", headers=writer).json()["docs"]]
+    assert "replica_only" not in usernames(client, writer)
+    assert usernames(client, bystander) == ["replica_only"]
+
+    # Once the sticky window is over the writer is back on the replica
+    recent_writers.clear()
+    assert usernames(client, writer) == ["replica_only"]
+
+    client.delete(f"/debts/{debt_id}", headers=writer)
+
+
+def test_a_user_registered_moments_ago_is_found_on_the_primary(client, replica):
+    client.post("/register", json={"username": "replica_newcomer", "email": "replica_newcomer@example.com",
+                                   "password": "pw"})
+    response = client.get("/users/usernames", headers=auth_headers("replica_newcomer"))
+    assert response.status_code == 200
+    assert [item["username"] for item in response.json()["docs"]] == ["replica_only"]
+
+
+def test_an_authenticated_write_holds_one_connection(client, worlds):
+    world = worlds["small"]
+    checked_out, peak = [0], [0]
+
+    def checkout(*args):
+        checked_out[0] += 1
+        peak[0] = max(peak[0], checked_out[0])
+
+    def checkin(*args):
+        checked_out[0] -= 1
+
+    pools = (engine.pool, async_engine.sync_engine.pool)
+    for pool in pools:
+        event.listen(pool, "checkout", checkout)
+        event.listen(pool, "checkin", checkin)
+    try:
+        # Without a replica the user lookup and the write share one pool
+        principal_cache.clear()
+        created = client.post("/debts", headers=auth_headers(world.usernames[2]), json={
+            "title": "pool", "receiver": world.usernames[0], "receiver_id": world.user_ids[0],
+            "amount": 1.0, "user_id": world.user_ids[2]})
+    finally:
+        for pool in pools:
+            event.remove(pool, "checkout", checkout)
+            event.remove(pool, "checkin", checkin)
+    assert created.status_code == 200
+    assert peak[0] == 1
+
+    client.delete(f"/debts/{created.json()['debt']['id']}", headers=auth_headers(world.usernames[2]))
+
+
+def test_exports_stream_from_the_replica(client, worlds, replica):
+    world = worlds["small"]
+    exporter = auth_headers(world.usernames[4])
+    # The replica has none of the seeded debts
+    assert client.get("/debts/export", headers=exporter).text == ""
+    assert client.get("/debts/export?format=csv", headers=exporter).text == \
+        "id,title,receiver,receiver_id,amount,user_id,group_id\n"
+
+    recent_writers.set(world.usernames[4], True)
+    assert client.get("/debts/export", headers=exporter).text != ""
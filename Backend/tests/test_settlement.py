@@ -0,0 +1,56 @@
+import numpy as np
+
+from utils.settlement import build_settle_plan
+
+
+def _debts(rows):
+    return np.array(rows, dtype=np.int64).reshape(-1, 3)
+
+
+def _net(rows):
+    net = {}
+    for debtor_id, creditor_id, amount in rows:
+        net[debtor_id] = net.get(debtor_id, 0) - amount
+        net[creditor_id] = net.get(creditor_id, 0) + amount
+    return net
+
+
+def test_plan_settles_every_balance():
+    rng = np.random.default_rng(0)
+    debtors = rng.integers(1, 50, 2_000)
+    creditors = (debtors + rng.integers(1, 49, 2_000) - 1) % 49 + 1
+    debts = _debts(np.column_stack([debtors, creditors, rng.integers(1, 100_000, 2_000)]))
+
+    plan = build_settle_plan(debts)
+
+    # Paying the plan back against the debts leaves every user at zero
+    net = _net(debts.tolist())
+    for user_id, amount in _net(plan).items():
+        net[user_id] -= amount
+    assert not any(net.values())
+    assert all(isinstance(amount, int) and amount > 0 for _, _, amount in plan)
+    assert len(plan) <= len(net) - 1
+
+
+def test_opposite_balances_are_paired_in_one_transfer():
+    # 1 owes 500 and 2 is owed 500; 3 owes 300 spread over 4 and 5
+    debts = _debts([(1, 6, 500), (6, 2, 500), (3, 4, 100), (3, 5, 200)])
+
+    plan = build_settle_plan(debts)
+
+    assert (1, 2, 500) in plan
+    assert sorted(plan) == [(1, 2, 500), (3, 4, 100), (3, 5, 200)]
+
+
+def test_nothing_to_settle():
+    assert build_settle_plan(np.empty((0, 3), dtype=np.int64)) == []
+    # Debts that cancel out in a circle
+    assert build_settle_plan(_debts([(1, 2, 700), (2, 3, 700), (3, 1, 700)])) == []
+
+
+def test_cent_totals_past_float64_precision_stay_exact():
+    # 2**53 + 1 is the first integer float64 cannot hold
+    big = 2 ** 53
+    debts = _debts([(1, 2, big), (1, 2, 1), (3, 2, 1)])
+
+    assert sorted(build_settle_plan(debts)) == [(1, 2, big + 1), (3, 2, 1)]
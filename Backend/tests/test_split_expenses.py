@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from models.expense_request import ExpenseRequest
+from services.expense_service import InvalidExpense, settle_expenses
+
+
+def _net(transfers):
+    net = {}
+    for debtor_id, creditor_id, amount in transfers:
+        net[debtor_id] = net.get(debtor_id, 0) - amount
+        net[creditor_id] = net.get(creditor_id, 0) + amount
+    return {user_id: amount for user_id, amount in net.items() if amount}
+
+
+def test_batch_nets_to_the_same_balances_as_splitting_each_expense_in_cents():
+    expenses = [
+        # 10.00 over three: one of them pays the extra cent
+        ExpenseRequest(total_cost=10.0, payers=[{"user_id": 1, "amount": 10.0}], participants=[2, 3]),
+        # Two payers, user 4 counts double
+        ExpenseRequest(total_cost=0.07, payers=[{"user_id": 2, "amount": 0.05}, {"user_id": 3, "amount": 0.02}],
+                       participants=[4], weights={4: 2}),
+    ]
+    user_ids, transfers = settle_expenses(expenses)
+
+    assert sorted(user_ids) == [1, 2, 3, 4]
+    # 1000 = 334 + 333 + 333, 7 = 2 + 2 + 3 with the largest remainder (user 4) getting the extra cent
+    assert _net(transfers) == {1: 1000 - 334, 2: -333 + 5 - 2, 3: -333 + 2 - 2, 4: -3}
+    assert len(transfers) <= len(user_ids) - 1
+    assert all(isinstance(amount, int) and amount > 0 for _, _, amount in transfers)
+
+
+def test_payments_must_add_up_to_the_cost():
+    expenses = [
+        ExpenseRequest(total_cost=5.0, payers=[{"user_id": 1, "amount": 5.0}], participants=[2]),
+        ExpenseRequest(total_cost=5.0, payers=[{"user_id": 1, "amount": 4.99}], participants=[2]),
+    ]
+    with pytest.raises(InvalidExpense) as error:
+        settle_expenses(expenses)
+    assert error.value.index == 1
+
+
+def test_amounts_round_to_cents_like_every_other_endpoint():
+    # 0.125 rounds half up to 13 cents, the 10 + 3 paid must match it
+    expense = ExpenseRequest(total_cost=0.125, payers=[{"user_id": 1, "amount": 0.1}, {"user_id": 2, "amount": 0.025}],
+                             participants=[3])
+    _, transfers = settle_expenses([expense])
+    # 13 = 5 + 4 + 4
+    assert _net(transfers) == {1: 10 - 5, 2: 3 - 4, 3: -4}
+
+
+def test_payments_that_add_up_before_rounding_match_the_cost():
+    # Rounded one by one 0.015 + 0.015 would be 2 + 2 cents against a total of 3, together they are 2 + 1
+    expense = ExpenseRequest(total_cost=0.03, payers=[{"user_id": 1, "amount": 0.015}, {"user_id": 2, "amount": 0.015}],
+                             participants=[3])
+    _, transfers = settle_expenses([expense])
+    # 3 = 1 + 1 + 1
+    assert _net(transfers) == {1: 2 - 1, 3: -1}
+
+
+def test_split_expenses_endpoint_writes_the_minimal_debts(client, worlds):
+    world = worlds["small"]
+    users = world.user_ids
+    rng = np.random.default_rng(0)
+    expenses = []
+    for _ in range(200):
+        payer, total = int(rng.choice(users)), int(rng.integers(1, 10_000)) / 100
+        expenses.append({"total_cost": total, "payers": [{"user_id": payer, "amount": total}],
+                         "participants": users, "weights": {str(users[1]): 0.5}})
+
+    response = client.post("/split-expenses/", headers=world.headers,
+                           json={"expenses": expenses, "group_id": world.group_id})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["expenses"] == 200 and body["participants"] == len(users)
+    assert 0 < len(body["debts"]) <= len(users) - 1
+    assert all(debt["amount"] > 0 and round(debt["amount"], 2) == debt["amount"] for debt in body["debts"])
+
+    outsider = client.post("/split-expenses/", headers=world.headers, json={"group_id": world.group_id, "expenses": [
+        {"total_cost": 1, "payers": [{"user_id": world.outsider_ids[0], "amount": 1}], "participants": users}]})
+    assert outsider.status_code == 400
@@ -0,0 +1,222 @@
+import asyncio
+import importlib
+import math
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from utils.auth import request_subject
+from utils.metrics import Counter, Gauge, Histogram, registry
+
+# false turns the middleware into a pass-through, f.ex for raw throughput benchmarks
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() in ("1", "true", "yes")
+# "module:factory" returning the RateLimitBackend that holds the token buckets
+ADMISSION_BACKEND = os.getenv("ADMISSION_BACKEND", "utils.admission:MemoryRateLimitBackend")
+# Token buckets kept by the in-memory backend, the least recently used are dropped first (as if full)
+ADMISSION_BUCKETS_MAX_SIZE = int(os.getenv("ADMISSION_BUCKETS_MAX_SIZE", "100000"))
+
+in_flight_gauge = registry.register(Gauge(
+    "admission_in_flight", "Requests of an endpoint class being handled.", ("endpoint_class",)))
+rejected_total = registry.register(Counter(
+    "admission_rejected_total", "Requests turned away before reaching the handler.", ("endpoint_class", "reason")))
+queue_seconds = registry.register(Histogram(
+    "admission_queue_seconds", "Time a request waited for a slot of its endpoint class.", ("endpoint_class",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)))
+
+
+class RateLimitBackend(ABC):
+    """
+    Holds the token buckets. The in-memory backend limits each worker on its
+    own; a shared store (Redis, Memcached) subclasses this and is selected
+    with ADMISSION_BACKEND so the limits hold across workers.
+    """
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Takes one token from key's bucket. Returns 0 if there was one, else the seconds until there is."""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Buckets in a bounded LRU dict. Only touched from the event loop, so no lock."""
+
+    def __init__(self, maxsize: int = ADMISSION_BUCKETS_MAX_SIZE, clock=time.monotonic):
+        self.maxsize = maxsize
+        self._clock = clock
+        # key -> (tokens, time they were counted)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = self._clock()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+def load_backend(path: str = ADMISSION_BACKEND) -> RateLimitBackend:
+    module_name, _, factory = path.partition(":")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+@dataclass
+class EndpointClass:
+    """
+    Routes that share a budget. Up to `concurrency` of their requests run at
+    once (0: no limit) and up to `max_queue` more wait for a slot, each for at
+    most `queue_timeout` seconds. Every caller also gets a token bucket of
+    `rate` requests per second and `burst` size (rate 0: no limit).
+    """
+    name: str
+    routes: Sequence[str]
+    concurrency: int = 0
+    max_queue: int = 0
+    queue_timeout: float = 1.0
+    rate: float = 0.0
+    burst: int = 1
+
+    @classmethod
+    def from_env(cls, name: str, routes: Sequence[str], **defaults) -> "EndpointClass":
+        """Defaults overridable with ADMISSION_<NAME>_CONCURRENCY, _MAX_QUEUE, _QUEUE_SECONDS, _RATE and _BURST."""
+        prefix = f"ADMISSION_{name.upper()}"
+        return cls(name=name, routes=routes,
+                   concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", defaults.get("concurrency", 0))),
+                   max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", defaults.get("max_queue", 0))),
+                   queue_timeout=float(os.getenv(f"{prefix}_QUEUE_SECONDS", defaults.get("queue_timeout", 1.0))),
+                   rate=float(os.getenv(f"{prefix}_RATE", defaults.get("rate", 0.0))),
+                   burst=int(os.getenv(f"{prefix}_BURST", defaults.get("burst", 1))))
+
+
+ENDPOINT_CLASSES = (
+    # bcrypt already runs in the password pool, which sheds on its own; this stops password guessing
+    EndpointClass.from_env("auth", ("POST /login", "POST /register"), rate=5, burst=20),
+    # Requests that hold a DB connection (and often a threadpool worker) for a long time
+    EndpointClass.from_env("expensive", (
+        "POST /split-debts/", "POST /split-expenses/", "POST /debts/import", "GET /debts/export",
+        "POST /debts/settle-up", "POST /groups/{group_id}/settle-up",
+    ), concurrency=4, max_queue=32, queue_timeout=2.0, rate=2, burst=10),
+)
+
+
+class Shed(Exception):
+    pass
+
+
+class ConcurrencyLimiter:
+    """Slots for one endpoint class. A request that cannot get one soon enough is shed."""
+
+    def __init__(self, endpoint_class: EndpointClass):
+        self.endpoint_class = endpoint_class
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.endpoint_class.concurrency)
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self):
+        semaphore = self._get_semaphore()
+        labels = (self.endpoint_class.name,)
+        if semaphore.locked():
+            if self.waiting >= self.endpoint_class.max_queue:
+                raise Shed()
+            self.waiting += 1
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.endpoint_class.queue_timeout)
+            except asyncio.TimeoutError:
+                raise Shed()
+            finally:
+                self.waiting -= 1
+                queue_seconds.observe(labels, time.perf_counter() - started)
+        else:
+            await semaphore.acquire()
+            queue_seconds.observe(labels, 0.0)
+        in_flight_gauge.inc(labels)
+        try:
+            yield
+        finally:
+            in_flight_gauge.dec(labels)
+            semaphore.release()
+
+
+def _route_pattern(route: str) -> Tuple[str, "re.Pattern"]:
+    method, path = route.split(" ", 1)
+    return method, re.compile(re.sub(r"\\{[^/]+?\\}", "[^/]+", re.escape(path)) + "$")
+
+
+class AdmissionControlMiddleware:
+    """
+    Runs before routing and keeps expensive endpoints from using up the DB
+    pool and the threadpool that every other request needs. For each request
+    of an EndpointClass it checks the caller's token bucket (keyed by the JWT
+    subject, else the client IP) and answers 429 when it is empty, then
+    waits for one of the class's slots and answers 503 when the queue is full
+    or the wait gets too long. Both carry Retry-After. Requests outside every
+    class pass straight through.
+    """
+
+    def __init__(self, app, classes: Sequence[EndpointClass] = ENDPOINT_CLASSES,
+                 backend: Optional[RateLimitBackend] = None, enabled: bool = ADMISSION_CONTROL):
+        self.app = app
+        self.enabled = enabled
+        self.backend = backend or load_backend()
+        self._routes = [(_route_pattern(route), endpoint_class)
+                        for endpoint_class in classes for route in endpoint_class.routes]
+        self._limiters = {endpoint_class.name: ConcurrencyLimiter(endpoint_class)
+                          for endpoint_class in classes if endpoint_class.concurrency > 0}
+
+    def classify(self, method: str, path: str) -> Optional[EndpointClass]:
+        for (route_method, pattern), endpoint_class in self._routes:
+            if route_method == method and pattern.match(path):
+                return endpoint_class
+        return None
+
+    async def __call__(self, scope, receive, send):
+        endpoint_class = self.classify(scope["method"], scope["path"]) \
+            if self.enabled and scope["type"] == "http" else None
+        if endpoint_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if endpoint_class.rate > 0:
+            caller = request_subject(Request(scope)) or (scope.get("client") or ("unknown",))[0]
+            wait = await self.backend.take(f"{endpoint_class.name}:{caller}", endpoint_class.rate,
+                                           endpoint_class.burst)
+            if wait > 0:
+                rejected_total.inc((endpoint_class.name, "rate_limited"))
+                await self._reject(scope, receive, send, 429, "Too many requests, slow down", wait)
+                return
+
+        limiter = self._limiters.get(endpoint_class.name)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            async with limiter.slot():
+                await self.app(scope, receive, send)
+        except Shed:
+            rejected_total.inc((endpoint_class.name, "overloaded"))
+            await self._reject(scope, receive, send, 503, "Server busy, retry later", endpoint_class.queue_timeout)
+
+    @staticmethod
+    async def _reject(scope, receive, send, status_code: int, detail: str, retry_after: float) -> None:
+        response = JSONResponse({"detail": detail}, status_code=status_code,
+                                headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+        await response(scope, receive, send)
@@ -1,37 +1,77 @@
+import functools
+import os
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Request, status
+
+from utils.cache import TTLCache
 
 SECRET_KEY = "your_secret_key_here"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Changing the cost makes existing hashes "need update", they are rehashed on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# passlib/bcrypt and jose are imported on first use: hashing runs in the password pool's
+# worker processes, so the server process usually never loads passlib at all
+@functools.lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+# Verified token payloads, each kept until the token's own exp
+decoded_token_cache = TTLCache(
+    maxsize=int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000")),
+    ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def hash_password(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+def verify_and_update_password(plain_password, hashed_password):
+    """Returns (is_valid, new_hash), new_hash is None unless the stored hash uses outdated settings."""
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_access_token(token: str):
+    payload = decoded_token_cache.get(token)
+    if payload is not None:
+        return payload
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
+    if "exp" in payload:
+        decoded_token_cache.set(token, payload, ttl=payload["exp"] - time.time())
+    return payload
 
 def verify_token(token: str):
     payload = decode_access_token(token)
     if payload is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    return payload
\ No newline at end of file
+    return payload
+
+def request_subject(request: Request) -> Optional[str]:
+    """The `sub` of the request's bearer token, None for anonymous or invalid tokens."""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    token = token if scheme.lower() == "bearer" else request.query_params.get("token")
+    payload = decode_access_token(token) if token else None
+    return payload.get("sub") if payload else None
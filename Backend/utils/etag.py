@@ -0,0 +1,28 @@
+from fastapi import Request, Response
+
+# Clients may keep the response but must revalidate it with If-None-Match before every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def ledger_etag(user_id: int, ledger_version: int) -> str:
+    """Validator for everything derived from a user's debts, changes whenever UserBalance.ledger_version does."""
+    return f'"ledger-{user_id}-{ledger_version}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match lists etag (weak comparison, as RFC 9110 requires for it)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,142 @@
+import asyncio
+import importlib
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+from utils.metrics import Counter, Gauge, Histogram, registry
+
+# "module:factory" returning the Broker that carries events between workers
+EVENT_BROKER = os.getenv("EVENT_BROKER", "utils.event_hub:LocalBroker")
+# Undelivered events kept per connection; a slower client is told to resync instead
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "64"))
+
+logger = logging.getLogger(__name__)
+
+subscribers_gauge = registry.register(Gauge(
+    "event_subscribers", "Open event stream connections in this worker."))
+events_total = registry.register(Counter(
+    "events_delivered_total", "Events put on a subscriber's queue, or dropped because it was full.", ("outcome",)))
+fanout_seconds = registry.register(Histogram(
+    "event_fanout_seconds", "Time from publishing an event to it being queued for every local subscriber.",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)))
+
+# Marker put on a queue that overflowed: the client missed events and must reload
+RESYNC = object()
+
+# Message delivered by a broker: {"users": {user_id: payload}, "published_at": epoch seconds}
+Deliver = Callable[[dict], None]
+
+
+class Broker(ABC):
+    """
+    Carries published events to every worker's hub, including the
+    publisher's own. Implementations for a shared bus (Redis pub/sub, NATS,
+    Postgres LISTEN) subclass this and are selected with EVENT_BROKER.
+    """
+
+    @abstractmethod
+    async def start(self, deliver: Deliver) -> None:
+        ...
+
+    @abstractmethod
+    async def publish(self, message: dict) -> None:
+        ...
+
+    async def stop(self) -> None:
+        pass
+
+
+class LocalBroker(Broker):
+    """Delivers in-process only. Enough for a single worker and for tests."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, message: dict) -> None:
+        if self._deliver is not None:
+            # Same round trip through JSON as a networked broker, so keys behave the same
+            self._deliver(json.loads(json.dumps(message)))
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+
+def load_broker(path: str = EVENT_BROKER) -> Broker:
+    module_name, _, factory = path.partition(":")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+class EventHub:
+    """
+    Fans events out to the open streams of this worker, keyed by user id.
+    Publishing goes through the broker, so every worker delivers to its
+    own subscribers. Subscribing costs a bounded queue and nothing else.
+    """
+
+    def __init__(self, broker: Optional[Broker] = None, queue_size: int = EVENT_QUEUE_SIZE):
+        self.broker = broker
+        self.queue_size = queue_size
+        self._queues: Dict[int, Set[asyncio.Queue]] = {}
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._queues.values())
+
+    async def start(self) -> None:
+        if self.broker is None:
+            self.broker = load_broker()
+        await self.broker.start(self.dispatch)
+
+    async def stop(self) -> None:
+        if self.broker is not None:
+            await self.broker.stop()
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[asyncio.Queue]:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues.setdefault(user_id, set()).add(queue)
+        subscribers_gauge.inc()
+        try:
+            yield queue
+        finally:
+            subscribers_gauge.dec()
+            queues = self._queues.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._queues[user_id]
+
+    async def publish(self, payloads: Dict[int, dict]) -> None:
+        """Sends each user their payload, on every worker. Failures are logged, never raised."""
+        if not payloads:
+            return
+        try:
+            await self.broker.publish({"users": payloads, "published_at": time.time()})
+        except Exception:
+            logger.exception("Publishing an event failed")
+
+    def dispatch(self, message: dict) -> None:
+        """Called by the broker for every published message."""
+        for user_id, payload in message["users"].items():
+            for queue in self._queues.get(int(user_id), ()):
+                try:
+                    queue.put_nowait(payload)
+                    events_total.inc(("queued",))
+                except asyncio.QueueFull:
+                    # Replace the backlog with one resync, the client reloads instead of replaying
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(RESYNC)
+                    events_total.inc(("dropped",))
+        fanout_seconds.observe((), max(time.time() - message["published_at"], 0.0))
+
+
+ledger_hub = EventHub()
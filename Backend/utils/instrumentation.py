@@ -0,0 +1,173 @@
+import functools
+import inspect
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from utils.metrics import Counter, Histogram, registry
+
+# Requests issuing more statements than this are logged as likely N+1 patterns
+SQL_QUERY_WARN_THRESHOLD = int(os.getenv("SQL_QUERY_WARN_THRESHOLD", "20"))
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LABELS = ("method", "route")
+
+requests_total = registry.register(Counter(
+    "http_requests_total", "Requests handled.", REQUEST_LABELS + ("status",)))
+request_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "Time until the response was complete.", REQUEST_LABELS))
+handler_seconds = registry.register(Histogram(
+    "http_request_handler_seconds", "Time spent in the endpoint function.", REQUEST_LABELS))
+serialize_seconds = registry.register(Histogram(
+    "http_request_serialization_seconds", "Time spent turning the endpoint result into a response.", REQUEST_LABELS))
+db_seconds = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent executing SQL statements.", REQUEST_LABELS))
+db_queries = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", REQUEST_LABELS,
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100)))
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "handler_time", "serialize_time", "handler_done")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.handler_time = 0.0
+        self.serialize_time = 0.0
+        self.handler_done: Optional[float] = None
+
+    def server_timing(self, total: float) -> str:
+        return (f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries", '
+                f"handler;dur={self.handler_time * 1000:.2f}, "
+                f"serialize;dur={self.serialize_time * 1000:.2f}, "
+                f"total;dur={total * 1000:.2f}")
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request_stats.get()
+    if stats is not None:
+        finished = time.perf_counter()
+        stats.queries += 1
+        stats.db_time += finished - getattr(context, "_query_started", finished)
+
+
+def instrument_engine(engine) -> None:
+    """Counts and times every statement of a (sync) engine against the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _record_handler(started: float) -> None:
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.handler_done = time.perf_counter()
+        stats.handler_time += stats.handler_done - started
+
+
+def _timed_endpoint(endpoint):
+    if getattr(endpoint, "__timed__", False):
+        return endpoint
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _record_handler(started)
+    else:
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _record_handler(started)
+
+    timed.__timed__ = True
+    return timed
+
+
+class InstrumentedRoute(APIRoute):
+    """APIRoute that times the endpoint function and the serialization of its result separately."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if not inspect.isasyncgenfunction(endpoint) and not inspect.isgeneratorfunction(endpoint):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            stats = current_request_stats.get()
+            if stats is not None and stats.handler_done is not None:
+                stats.serialize_time += time.perf_counter() - stats.handler_done
+            return response
+
+        return timed_handler
+
+
+class RequestMetricsMiddleware:
+    """
+    Collects per-request SQL count, DB time, handler time and serialization
+    time. Sends them as a Server-Timing header and records them in the
+    /metrics histograms, labelled with the route template.
+    """
+
+    def __init__(self, app, query_warn_threshold: int = SQL_QUERY_WARN_THRESHOLD):
+        self.app = app
+        self.query_warn_threshold = query_warn_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            self._observe(scope, stats, status_code, time.perf_counter() - started)
+
+    def _observe(self, scope, stats: RequestStats, status_code: int, elapsed: float) -> None:
+        route = scope.get("route")
+        labels = (scope["method"], getattr(route, "path", "unmatched"))
+        requests_total.inc(labels + (str(status_code),))
+        request_seconds.observe(labels, elapsed)
+        handler_seconds.observe(labels, stats.handler_time)
+        serialize_seconds.observe(labels, stats.serialize_time)
+        db_seconds.observe(labels, stats.db_time)
+        db_queries.observe(labels, stats.queries)
+        if stats.queries > self.query_warn_threshold:
+            logger.warning("%s %s issued %d SQL statements (threshold %d), possible N+1 query pattern",
+                           labels[0], labels[1], stats.queries, self.query_warn_threshold)
@@ -0,0 +1,28 @@
+from decimal import ROUND_FLOOR, ROUND_HALF_UP, Decimal
+from typing import List
+
+# Amounts are stored and added up as integer cents; the API speaks currency units
+
+
+def to_cents(amount: float) -> int:
+    """Currency units as sent by a client to cents, rounding half away from zero on what was written (1.005 -> 101)."""
+    return int(Decimal(str(amount)).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def parts_to_cents(amounts: List[float]) -> List[int]:
+    """
+    Converts the parts of one sum to cents that add up to to_cents of their
+    exact sum (0.005 + 0.005 -> 1 + 0): every part gets the floor of its cents
+    and the cents left over go to the largest remainders, earliest on ties.
+    """
+    exact = [Decimal(str(amount)).scaleb(2) for amount in amounts]
+    total = int(sum(exact, Decimal(0)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    cents = [int(part.to_integral_value(rounding=ROUND_FLOOR)) for part in exact]
+    by_remainder = sorted(range(len(exact)), key=lambda i: cents[i] - exact[i])
+    for i in by_remainder[:total - sum(cents)]:
+        cents[i] += 1
+    return cents
+
+
+def from_cents(cents: int) -> float:
+    return cents / 100
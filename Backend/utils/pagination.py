@@ -0,0 +1,76 @@
+import base64
+import binascii
+import json
+import math
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Returns the last seen id encoded in an opaque cursor, or None for the first page."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+        if not isinstance(last_id, int):
+            raise ValueError(last_id)
+        return last_id
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _selects_entity(statement) -> bool:
+    """True for select(Model), whose rows should be unwrapped to ORM objects."""
+    descriptions = statement.column_descriptions
+    return len(descriptions) == 1 and isinstance(descriptions[0]["type"], type)
+
+
+async def paginate_by_id(db, statement, id_column, cursor: Optional[str], limit: int, include_total: bool = False) -> dict:
+    """
+    Keyset pagination on a monotonically increasing id column.
+
+    Fetches limit + 1 rows after the cursor so has_next_page is known without
+    a count. The total is only counted when explicitly asked for.
+    """
+    total_docs = None
+    total_pages = None
+    if include_total:
+        total_docs = await db.scalar(select(func.count()).select_from(statement.order_by(None).subquery()))
+        total_pages = math.ceil(total_docs / limit)
+
+    last_id = decode_cursor(cursor)
+    if last_id is not None:
+        statement = statement.where(id_column > last_id)
+
+    result = await db.execute(statement.order_by(id_column).limit(limit + 1))
+    if _selects_entity(statement):
+        rows = result.scalars().all()
+    else:
+        # Plain dicts, which pydantic validates much faster than Row objects
+        rows = [row._asdict() for row in result]
+    has_next_page = len(rows) > limit
+    docs = rows[:limit]
+
+    next_cursor = None
+    if has_next_page:
+        last = docs[-1]
+        next_cursor = encode_cursor(last[id_column.key] if isinstance(last, dict) else getattr(last, id_column.key))
+
+    return {
+        "docs": docs,
+        "total_docs": total_docs,
+        "total_pages": total_pages,
+        "has_next_page": has_next_page,
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,87 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from utils.auth import hash_password, verify_and_update_password
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", str(PASSWORD_HASH_WORKERS)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "1"))
+
+
+class PasswordPool:
+    """
+    Runs bcrypt in a dedicated process pool so password work neither holds
+    the GIL nor occupies the threadpool that serves the cheap endpoints.
+
+    At most `concurrency` operations run at once and at most `max_queue` wait
+    for a slot. Anything beyond that is rejected immediately with a 503 and a
+    Retry-After header instead of waiting without bound.
+    """
+
+    def __init__(self, workers: int, concurrency: int, max_queue: int, retry_after: int):
+        self.workers = workers
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forked workers would inherit the server's listening socket and outlive it
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def _run(self, fn, *args):
+        if self.in_flight >= self.concurrency + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password operations in progress, retry later",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        self.in_flight += 1
+        try:
+            async with self._get_semaphore():
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "rejected": self.rejected,
+                "concurrency": self.concurrency, "max_queue": self.max_queue}
+
+
+password_pool = PasswordPool(
+    workers=PASSWORD_HASH_WORKERS,
+    concurrency=PASSWORD_HASH_CONCURRENCY,
+    max_queue=PASSWORD_HASH_MAX_QUEUE,
+    retry_after=PASSWORD_HASH_RETRY_AFTER,
+)
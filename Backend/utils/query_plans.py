@@ -0,0 +1,66 @@
+from typing import Callable, Dict, List
+
+from sqlalchemy import and_, func, or_, select, text
+
+from models.debt_history import DebtHistory
+from models.debts import Debt
+from models.user import User, username_prefix_upper_bound
+from schemas.debt_schema import DebtSchema
+from services.group_balance_service import group_balances_statement
+
+# Statements the API runs on every page load, with representative parameters
+HOT_QUERIES: Dict[str, Callable] = {
+    "debts page": lambda: (select(*(getattr(Debt, field) for field in DebtSchema.model_fields))
+                           .where(Debt.user_id == 1, Debt.settled_at.is_(None), Debt.id > 0)
+                           .order_by(Debt.id).limit(51)),
+    "debts count": lambda: select(func.count()).select_from(
+        select(Debt.id).where(Debt.user_id == 1, Debt.settled_at.is_(None)).subquery()),
+    "receivables": lambda: select(Debt).where(Debt.receiver_id == 1, Debt.settled_at.is_(None)),
+    "group netting": lambda: select(Debt.user_id, Debt.receiver_id, Debt.amount_cents).where(
+        Debt.group_id == 1, Debt.settled_at.is_(None)),
+    "settle up": lambda: select(Debt.user_id, Debt.receiver_id, func.sum(Debt.amount_cents)).where(
+        or_(and_(Debt.user_id == 1, Debt.receiver_id == 2), and_(Debt.user_id == 2, Debt.receiver_id == 1)),
+        Debt.settled_at.is_(None)).group_by(Debt.user_id, Debt.receiver_id),
+    "settled debts to archive": lambda: select(Debt.id).where(Debt.settled_at.is_not(None))
+                                        .order_by(Debt.settled_at, Debt.id).limit(1000),
+    "debts history page": lambda: select(DebtHistory).where(DebtHistory.user_id == 1, DebtHistory.id > 0)
+                                  .order_by(DebtHistory.id).limit(51),
+    "group balances": lambda: group_balances_statement(1),
+    "username search": lambda: (select(User.id, User.username)
+                                .where(User.username >= "ab", User.username < username_prefix_upper_bound("ab"))
+                                .order_by(User.username).limit(10)),
+}
+
+WATCHED_TABLES = ("debts", "debts_history", "users")
+
+
+def _explain(conn, statement) -> List[str]:
+    """Returns the full-table-scan steps of a statement's plan on MySQL or SQLite."""
+    dialect = conn.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+    if dialect.name == "sqlite":
+        details = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+        return [detail for detail in details
+                if any(detail.startswith(f"SCAN {table}") for table in WATCHED_TABLES)
+                and "INDEX" not in detail]
+
+    rows = conn.execute(text(f"EXPLAIN {sql}")).mappings().all()
+    return [f"{row['table']}: type=ALL rows={row['rows']}" for row in rows
+            if row["table"] in WATCHED_TABLES and row["type"] == "ALL"]
+
+
+def find_full_scans(conn) -> Dict[str, List[str]]:
+    """
+    EXPLAINs every hot query and returns {query name: offending plan steps}
+    for those that fall back to a full table scan. Empty means all good.
+
+    MySQL only trusts an index once the table has data, so run this against
+    a database with a realistic amount of rows.
+    """
+    failures = {}
+    for name, build in HOT_QUERIES.items():
+        scans = _explain(conn, build())
+        if scans:
+            failures[name] = scans
+    return failures
@@ -0,0 +1,123 @@
+from typing import List, Tuple
+
+import numpy as np
+
+# (debtor_id, creditor_id, amount_cents)
+Transfer = Tuple[int, int, int]
+
+
+def compute_net_balances(debts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (user_ids, net_cents) where a positive net balance means the user
+    is owed money and a negative one means the user owes money.
+    """
+    if len(debts) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    user_ids, inverse = np.unique(debts[:, :2], return_inverse=True)
+    inverse = inverse.reshape(-1, 2)
+    amounts = debts[:, 2]
+
+    # Summed in int64 rather than with bincount, whose float64 weights lose cents past 2**53
+    net = np.zeros(len(user_ids), dtype=np.int64)
+    np.add.at(net, inverse[:, 1], amounts)
+    np.subtract.at(net, inverse[:, 0], amounts)
+    return user_ids, net
+
+
+def minimal_transfers(user_ids: np.ndarray, net: np.ndarray) -> List[Transfer]:
+    """
+    Turns net balances into a short list of transfers.
+
+    Debtors and creditors with exactly opposite balances are paired first, the
+    rest is settled greedily largest-first. The result never has more than
+    (number of non-zero balances - 1) transfers.
+    """
+    transfers: List[Transfer] = []
+
+    nonzero = net != 0
+    user_ids = user_ids[nonzero]
+    net = net[nonzero]
+
+    debtor_mask = net < 0
+    debtors = list(zip(user_ids[debtor_mask].tolist(), (-net[debtor_mask]).tolist()))
+    creditors = list(zip(user_ids[~debtor_mask].tolist(), net[~debtor_mask].tolist()))
+
+    # Exact matches settle two balances with a single transfer
+    creditors_by_amount = {}
+    for creditor_id, amount in creditors:
+        creditors_by_amount.setdefault(amount, []).append(creditor_id)
+
+    matched_creditors = set()
+    remaining_debtors = []
+    for debtor_id, amount in debtors:
+        candidates = creditors_by_amount.get(amount)
+        if candidates:
+            creditor_id = candidates.pop()
+            matched_creditors.add(creditor_id)
+            transfers.append((debtor_id, creditor_id, amount))
+        else:
+            remaining_debtors.append([debtor_id, amount])
+
+    remaining_creditors = [[creditor_id, amount] for creditor_id, amount in creditors
+                           if creditor_id not in matched_creditors]
+
+    remaining_debtors.sort(key=lambda x: x[1], reverse=True)  # Largest debtor first
+    remaining_creditors.sort(key=lambda x: x[1], reverse=True)  # Largest creditor first
+
+    i = 0  # Index for debtors
+    j = 0  # Index for creditors
+    while i < len(remaining_debtors) and j < len(remaining_creditors):
+        debtor = remaining_debtors[i]
+        creditor = remaining_creditors[j]
+
+        amount = min(debtor[1], creditor[1])
+        transfers.append((debtor[0], creditor[0], amount))
+
+        debtor[1] -= amount
+        creditor[1] -= amount
+        if debtor[1] == 0:
+            i += 1
+        if creditor[1] == 0:
+            j += 1
+
+    return transfers
+
+
+def build_settle_plan(debts: np.ndarray) -> List[Transfer]:
+    user_ids, net = compute_net_balances(debts)
+    return minimal_transfers(user_ids, net)
+
+
+def split_expenses(totals: np.ndarray, payments: np.ndarray, shares: np.ndarray,
+                   weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Nets a batch of expenses in one pass. Returns (user_ids, net_cents) like
+    compute_net_balances.
+
+    totals:   (e,) int64 cost of each expense in cents
+    payments: (p, 3) int64 rows of (expense index, user_id, amount_cents)
+    shares:   (s, 2) int64 rows of (expense index, user_id), one per user sharing an expense
+    weights:  (s,) float64 weight of each share row
+
+    Every expense is split by weight into whole cents: each share gets the
+    floor of its exact part and the cents left over go to the largest
+    remainders (lowest user id on ties), so the shares of an expense add up
+    to its total exactly.
+    """
+    weight_sums = np.bincount(shares[:, 0], weights=weights, minlength=len(totals))
+    exact = totals[shares[:, 0]] * weights / weight_sums[shares[:, 0]]
+    share_cents = np.floor(exact).astype(np.int64)
+    leftover = totals - np.bincount(shares[:, 0], weights=share_cents, minlength=len(totals)).astype(np.int64)
+
+    # Rank the share rows of each expense by remainder, largest first
+    order = np.lexsort((shares[:, 1], share_cents - exact, shares[:, 0]))
+    expense_sorted = shares[order, 0]
+    first_of_expense = np.searchsorted(expense_sorted, expense_sorted, side="left")
+    rank = np.arange(len(order)) - first_of_expense
+    share_cents[order[rank < leftover[expense_sorted]]] += 1
+
+    user_ids, inverse = np.unique(np.concatenate([payments[:, 1], shares[:, 1]]), return_inverse=True)
+    paid = np.bincount(inverse[:len(payments)], weights=payments[:, 2], minlength=len(user_ids))
+    owed = np.bincount(inverse[len(payments):], weights=share_cents, minlength=len(user_ids))
+    return user_ids, np.rint(paid - owed).astype(np.int64)
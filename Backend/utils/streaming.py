@@ -0,0 +1,36 @@
+import codecs
+from typing import AsyncIterable, AsyncIterator, Optional, Tuple
+
+MAX_LINE_LENGTH = 64 * 1024
+
+
+async def iter_lines(chunks: AsyncIterable[bytes],
+                     max_line_length: int = MAX_LINE_LENGTH) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """
+    Splits a streamed UTF-8 body into (line_number, line) pairs without
+    buffering more than one line. A leading BOM and trailing \\r are dropped.
+    Lines longer than max_line_length are discarded and yielded as None so the
+    caller can report them.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    line_number = 0
+    too_long = False
+
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            line_number += 1
+            if too_long or len(line) > max_line_length:
+                too_long = False
+                yield line_number, None
+            else:
+                yield line_number, line.rstrip("\r")
+        if len(buffer) > max_line_length:
+            too_long = True
+            buffer = ""
+
+    buffer += decoder.decode(b"", final=True)
+    if buffer or too_long:
+        yield line_number + 1, None if too_long else buffer.rstrip("\r")
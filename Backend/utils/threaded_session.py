@@ -0,0 +1,49 @@
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+
+class ThreadedSession:
+    """
+    Exposes the awaitable subset of the AsyncSession API over a blocking
+    Session. Every database call runs in the threadpool, so routes written
+    for AsyncSession also run on the synchronous drivers.
+    """
+
+    def __init__(self, sync_session: Session):
+        self.sync_session = sync_session
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def refresh(self, instance, *args, **kwargs) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance, *args, **kwargs)
+
+    async def flush(self, *args, **kwargs) -> None:
+        await run_in_threadpool(self.sync_session.flush, *args, **kwargs)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
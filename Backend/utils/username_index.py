@@ -0,0 +1,106 @@
+import asyncio
+import bisect
+import logging
+import os
+import time
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+
+# Seconds between two reloads of the username directory
+USERNAME_INDEX_REFRESH_SECONDS = float(os.getenv("USERNAME_INDEX_REFRESH_SECONDS", "60"))
+# Directories larger than this are not held in memory, searches then always go to the database
+USERNAME_INDEX_MAX_SIZE = int(os.getenv("USERNAME_INDEX_MAX_SIZE", "500000"))
+
+logger = logging.getLogger(__name__)
+
+# Returns every (id, username) pair, or None when there are more than the given limit
+DirectoryLoader = Callable[[int], Awaitable[Optional[Sequence[Tuple[int, str]]]]]
+
+
+class UsernameIndex:
+    """
+    In-process copy of the username directory as a sorted array, for
+    autocomplete without a database round trip. A prefix search is a binary
+    search plus a slice of at most `limit` entries.
+
+    The arrays are replaced wholesale on refresh, so readers never see a half
+    built index. Users registered through this process are added right away;
+    other processes' registrations appear after the next refresh.
+    """
+
+    def __init__(self, max_size: int = USERNAME_INDEX_MAX_SIZE):
+        self.max_size = max_size
+        self.loaded_at: Optional[float] = None
+        self._usernames: List[str] = []
+        self._ids: List[int] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded_at is not None
+
+    def __len__(self) -> int:
+        return len(self._usernames)
+
+    def load(self, entries: Sequence[Tuple[int, str]]) -> None:
+        """Replaces the index with (id, username) pairs."""
+        # Sorted here rather than by the database, whose collation may not order strings like Python does
+        entries = sorted(entries, key=lambda entry: entry[1])
+        self._ids, self._usernames = [entry[0] for entry in entries], [entry[1] for entry in entries]
+        self.loaded_at = time.monotonic()
+
+    def clear(self) -> None:
+        self._ids, self._usernames = [], []
+        self.loaded_at = None
+
+    def add(self, user_id: int, username: str) -> None:
+        if not self.ready or len(self._usernames) >= self.max_size:
+            return
+        position = bisect.bisect_left(self._usernames, username)
+        if position < len(self._usernames) and self._usernames[position] == username:
+            return
+        self._usernames.insert(position, username)
+        self._ids.insert(position, user_id)
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        """Up to `limit` (id, username) pairs whose username starts with prefix, in username order."""
+        usernames, ids = self._usernames, self._ids
+        start = bisect.bisect_left(usernames, prefix)
+        matches = []
+        for position in range(start, min(start + limit, len(usernames))):
+            if not usernames[position].startswith(prefix):
+                break
+            matches.append((ids[position], usernames[position]))
+        return matches
+
+    async def refresh(self, loader: DirectoryLoader) -> None:
+        entries = await loader(self.max_size)
+        if entries is None:
+            logger.warning("More than %d users, username search stays on the database", self.max_size)
+            self.clear()
+        else:
+            self.load(entries)
+
+    def start(self, loader: DirectoryLoader, interval: float = USERNAME_INDEX_REFRESH_SECONDS) -> None:
+        """Starts reloading the directory every `interval` seconds in the background, beginning now."""
+        async def run():
+            while True:
+                try:
+                    await self.refresh(loader)
+                except Exception:
+                    logger.exception("Refreshing the username index failed")
+                await asyncio.sleep(interval)
+
+        if self._task is None and interval > 0:
+            self._task = asyncio.get_running_loop().create_task(run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+username_index = UsernameIndex()
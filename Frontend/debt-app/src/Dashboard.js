@@ -2,6 +2,31 @@ import React, { useEffect, useState } from 'react';
 import {useNavigate} from 'react-router-dom';
 import CustomAlert from './CustomAlert';
 
+// Follows the keyset cursors of a paginated endpoint and returns all docs
+const fetchAllPages = async (url, token) => {
+    const docs = [];
+    let cursor = null;
+    do {
+        const pageUrl = cursor ? `${url}?limit=500&cursor=${encodeURIComponent(cursor)}` : `${url}?limit=500`;
+        const response = await fetch(pageUrl, {
+            method: "GET",
+            headers: {
+                "Authorization": `Bearer ${token}`,
+                "Content-Type": "application/json"
+            }
+        });
+
+        if (!response.ok) {
+            throw new Error(`Failed to fetch ${url}!`);
+        }
+
+        const page = await response.json();
+        docs.push(...page.docs);
+        cursor = page.hasNextPage ? page.nextCursor : null;
+    } while (cursor);
+    return docs;
+};
+
 function Dashboard(){
     const navigate = useNavigate();
 
@@ -68,28 +93,16 @@ function Dashboard(){
                 }
 
                 const sumData = await sumResponse.json();
-                setTotalDebt(Number(sumData.total_debt).toFixed(2));
-                setReceiverId(sumData.user_id);
+                setTotalDebt(Number(sumData.totalDebt).toFixed(2));
+                setReceiverId(sumData.userId);
 
                 //--------------------------------------------------------------------------------
 
                 //Fetch all user debts
                 //--------------------------------------------------------------------------------
 
-                const debtsResponse = await fetch(`http://localhost:8000/debts`, {
-                    method: "GET",
-                    headers: {
-                        "Authorization": `Bearer ${token}`,
-                        "Content-Type": "application/json"
-                    }
-                });
-
-                if (!debtsResponse.ok) {
-                    throw new Error("Failed to fetch debts!");
-                }
-
-                const debtsData = await debtsResponse.json();
-                setDebts(debtsData.debts);
+                const userDebts = await fetchAllPages(`http://localhost:8000/debts`, token);
+                setDebts(userDebts);
 
                 //--------------------------------------------------------------------------------
 
@@ -133,20 +146,8 @@ function Dashboard(){
     const getUsers = async () => {
         const token = localStorage.getItem('token');
         try {
-            const usersResponse = await fetch(`http://localhost:8000/users/usernames`, {
-                method: "GET",
-                headers: {
-                    "Content-Type": "application/json",
-                    "Authorization": `Bearer ${token}`
-                }
-            });
-
-            if (!usersResponse.ok) {
-                throw new Error("Failed to get all users!");
-            }
-
-            const usersData = await usersResponse.json();
-            setUsers(usersData.users)
+            const users = await fetchAllPages(`http://localhost:8000/users/usernames`, token);
+            setUsers(users)
 
         } catch (error) {
             console.log("Error getting users:", error)